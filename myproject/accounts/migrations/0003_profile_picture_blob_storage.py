@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:29
+
+import events.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_userprofile_email_verification_token"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userprofile",
+            name="profile_picture",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=events.storage.ContentAddressedStorage(),
+                upload_to="profiles/",
+            ),
+        ),
+    ]
@@ -1,16 +1,21 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
+from events.models import Blob
+from events.storage import ContentAddressedStorage
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     phone = models.CharField(max_length=15, blank=True)
     address = models.TextField(blank=True)
-    profile_picture = models.ImageField(upload_to="profiles/", blank=True, null=True)
+    profile_picture = models.ImageField(
+        upload_to="profiles/", storage=ContentAddressedStorage(), blank=True, null=True
+    )
     email_verified = models.BooleanField(default=False)
-    email_verification_token = models.CharField(max_length=100, blank=True, null=True)
+    email_verification_token = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -28,3 +33,26 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, created, **kwargs):
     if hasattr(instance, "profile"):
         instance.profile.save()
+
+
+@receiver(post_init, sender=UserProfile)
+def remember_profile_picture(sender, instance, **kwargs):
+    # None marks a deferred picture, which this instance cannot have changed.
+    if "profile_picture" not in instance.__dict__:
+        instance._saved_picture = None
+        return
+    value = instance.__dict__["profile_picture"]
+    instance._saved_picture = getattr(value, "name", value) or ""
+
+
+@receiver(post_save, sender=UserProfile)
+def count_profile_picture(sender, instance, **kwargs):
+    if instance._saved_picture is None:
+        return
+    Blob.replace(instance._saved_picture, instance.profile_picture.name)
+    instance._saved_picture = instance.profile_picture.name or ""
+
+
+@receiver(post_delete, sender=UserProfile)
+def uncount_profile_picture(sender, instance, **kwargs):
+    Blob.replace(instance.profile_picture.name, None)
@@ -1,3 +1,43 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from events.testing import PASSWORD, QueryBudgetMixin, seed_catalogue
+
+
+class AccountQueryBudgetMixin(QueryBudgetMixin):
+    # Queries per request once the category list is cached. Logged-in pages
+    # include the session and user lookups.
+    ANONYMOUS_BUDGETS = {
+        "login": 0,
+        "register": 0,
+        "password_reset": 0,
+        "verification_sent": 0,
+    }
+    MEMBER_BUDGETS = {
+        "profile": 3,
+        "edit_profile": 3,
+        "change_password": 2,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, _ = seed_catalogue(cls.n_events, n_users=cls.n_events // 5)
+
+    def test_anonymous_pages(self):
+        for name, budget in self.ANONYMOUS_BUDGETS.items():
+            with self.subTest(name):
+                self.assertQueryBudget(reverse(f"accounts:{name}"), budget)
+
+    def test_member_pages(self):
+        self.client.login(username=self.users[0].username, password=PASSWORD)
+        for name, budget in self.MEMBER_BUDGETS.items():
+            with self.subTest(name):
+                self.assertQueryBudget(reverse(f"accounts:{name}"), budget)
+
+
+class SmallSiteQueryTests(AccountQueryBudgetMixin, TestCase):
+    n_events = 15
+
+
+class LargeSiteQueryTests(AccountQueryBudgetMixin, TestCase):
+    n_events = 150
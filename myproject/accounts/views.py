@@ -11,19 +11,20 @@ from django.contrib.auth.views import (
     PasswordResetConfirmView,
     PasswordResetCompleteView,
 )
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from django.urls import reverse_lazy
 
+from events.outbox import queue_mail
+
 from .forms import RegistrationForm, LoginForm, UserUpdateForm, ProfileUpdateForm
 from .models import UserProfile
 
 
-def send_verification_email(user, token, request):
+def queue_verification_email(user, token, request):
     verification_url = request.build_absolute_uri(
         f"/accounts/verify-email/{token}/"
     )
-    send_mail(
+    queue_mail(
         subject="Verify Your Email - EventManager",
         message=(
             f"Hi {user.first_name},\n\n"
@@ -31,7 +32,6 @@ def send_verification_email(user, token, request):
             f"{verification_url}\n\n"
             f"Thank you!"
         ),
-        from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[user.email],
     )
 
@@ -42,12 +42,13 @@ def register_view(request):
     if request.method == "POST":
         form = RegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            user.profile.phone = form.cleaned_data.get("phone", "")
-            token = uuid.uuid4().hex
-            user.profile.email_verification_token = token
-            user.profile.save()
-            send_verification_email(user, token, request)
+            with transaction.atomic():
+                user = form.save()
+                user.profile.phone = form.cleaned_data.get("phone", "")
+                token = uuid.uuid4().hex
+                user.profile.email_verification_token = token
+                user.profile.save()
+                queue_verification_email(user, token, request)
             messages.success(request, "Registration successful! Please check your email to verify your account.")
             return redirect("accounts:verification_sent")
     else:
@@ -1,5 +1,10 @@
-from django.contrib import admin
-from .models import Category, Event, Booking, Payment, Review, ContactMessage, FAQ
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import F
+from .models import (
+    Category, Event, Booking, Payment, Review, ContactMessage, FAQ, OutboxMessage, WebhookEvent,
+    CategoryStats, DailyStats, Blob,
+)
 
 
 @admin.register(Category)
@@ -8,10 +13,23 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
 
 
+class OversoldFilter(admin.SimpleListFilter):
+    title = "seats"
+    parameter_name = "oversold"
+
+    def lookups(self, request, model_admin):
+        return [("yes", "Oversold")]
+
+    def queryset(self, request, queryset):
+        if self.value() == "yes":
+            return queryset.filter(booked_seats__gt=F("capacity"))
+        return queryset
+
+
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ["title", "category", "location", "date", "price", "capacity", "is_active"]
-    list_filter = ["category", "is_active", "date"]
+    list_display = ["title", "category", "location", "date", "price", "capacity", "booked_seats", "is_active"]
+    list_filter = ["category", "is_active", "date", OversoldFilter]
     search_fields = ["title", "location"]
     prepopulated_fields = {"slug": ("title",)}
 
@@ -22,6 +40,24 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ["status"]
     search_fields = ["user__username", "event__title"]
 
+    def save_model(self, request, obj, form, change):
+        # Staff may change the status and guest count; move the seats with
+        # them. Releasing the old seats locks the event row, so the new ones
+        # are reserved against the same count.
+        status = obj.status
+        with transaction.atomic():
+            if change:
+                saved = Booking.objects.select_for_update().get(pk=obj.pk)
+                if saved.status in Booking.SEAT_HOLDING_STATUSES:
+                    obj.event.release_seats(saved.number_of_guests)
+            obj.status = "cancelled"  # holds no seats until set_status below
+            super().save_model(request, obj, form, change)
+            obj.set_status(status)
+        if obj.event.is_oversold:
+            self.message_user(
+                request, f"{obj.event} is now booked past its capacity.", messages.WARNING
+            )
+
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -46,3 +82,36 @@ class FAQAdmin(admin.ModelAdmin):
     list_display = ["question", "order", "is_active"]
     list_filter = ["is_active"]
     list_editable = ["order", "is_active"]
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ["subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at"]
+    list_filter = ["status"]
+    search_fields = ["subject"]
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["event_id", "received_at", "processed_at"]
+    list_filter = ["processed_at"]
+    search_fields = ["event_id"]
+    readonly_fields = ["event_id", "signature", "body", "received_at", "processed_at", "last_error"]
+
+
+@admin.register(DailyStats)
+class DailyStatsAdmin(admin.ModelAdmin):
+    list_display = ["date", "new_users", "bookings", "revenue"]
+    date_hierarchy = "date"
+
+
+@admin.register(CategoryStats)
+class CategoryStatsAdmin(admin.ModelAdmin):
+    list_display = ["category", "events", "bookings", "revenue"]
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ["name", "size", "refcount", "created_at", "touched_at"]
+    search_fields = ["name"]
+    readonly_fields = ["name", "size", "refcount", "created_at", "touched_at"]
@@ -0,0 +1,63 @@
+"""Process-local + shared-cache registry of event categories.
+
+Categories change a few times a year but are shown on every page, so the
+list is cached under a version number held in the shared cache. Saving or
+deleting a ``Category`` bumps the version (see the signals in
+``events.models``); every process notices on its next lookup and reloads.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = "events:categories:version"
+
+_lock = threading.Lock()
+_local = {"version": None, "categories": None}
+
+
+def _new_version():
+    # Time-based so a version key evicted from the cache never comes back
+    # with a number an older category list was stored under.
+    return time.time_ns()
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+def get_categories():
+    """Return all categories, ordered by name, hitting the DB once per version."""
+    from .models import Category
+
+    version = get_version()
+    with _lock:
+        if _local["version"] == version:
+            return _local["categories"]
+
+    key = f"events:categories:{version}"
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.all())
+        cache.set(key, categories, timeout=None)
+
+    with _lock:
+        _local["version"] = version
+        _local["categories"] = categories
+    return categories
+
+
+def get_category(slug):
+    return next((category for category in get_categories() if category.slug == slug), None)
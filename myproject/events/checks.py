@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """The category list, listing cache and search index are invalidated
+    through version keys in the default cache, and staff profiles are stored
+    there, so it must be shared."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f"CACHES['default'] uses {backend.rsplit('.', 1)[-1]}, which is private to each process.",
+        hint=(
+            "With more than one worker, the others keep their category list "
+            "and search index after a catalogue change, and their event_list "
+            "results until the cache TTL expires, and /monitoring/profiles/ "
+            "only lists the profiles taken by the worker that serves it. Use "
+            "a shared backend such as DatabaseCache or RedisCache."
+        ),
+        id="events.W001",
+    )]
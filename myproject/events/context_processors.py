@@ -1,5 +1,8 @@
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+
+from .categories import get_categories
 
 
 def categories_processor(request):
-    return {"all_categories": Category.objects.all()}
+    # Lazy so pages that never render the navbar menu skip the lookup.
+    return {"all_categories": SimpleLazyObject(get_categories)}
@@ -0,0 +1,129 @@
+"""Resized WebP and JPEG derivatives of ``Event.image`` for responsive markup.
+
+``generate_derivatives()`` decodes an upload once and writes it at each width
+in ``WIDTHS`` that does not upscale it. Names are derived from the upload's
+SHA-256, so identical uploads share files and a name never changes content.
+
+The ``generate_image_derivatives`` command does this in the background for
+every event whose ``image_digest`` is empty, which covers new and replaced
+images. Until it has, the ``event_image`` template tag points ``srcset`` at
+the ``event_image`` view. That view generates the files on demand under a
+cache lock, so concurrent requests for the same event do the work once.
+"""
+
+import hashlib
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+WIDTHS = (320, 640, 1024, 1600)
+FORMATS = ("webp", "jpeg")
+QUALITY = {"webp": 80, "jpeg": 82}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+LOCK_KEY = "events:image-derivatives:{}"
+LOCK_TIMEOUT = 120
+
+
+def derivative_name(digest, width, fmt):
+    return f"derivatives/{digest[:2]}/{digest}-{width}w.{EXTENSIONS[fmt]}"
+
+
+def _digest(field_file):
+    sha = hashlib.sha256()
+    field_file.open("rb")
+    try:
+        for chunk in field_file.chunks():
+            sha.update(chunk)
+    finally:
+        field_file.close()
+    return sha.hexdigest()
+
+
+def _flatten(image):
+    """JPEG has no alpha channel: composite transparent images onto white."""
+    if image.mode in ("RGBA", "LA", "PA"):
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def generate_derivatives(field_file):
+    """Write the derivatives of an uploaded image.
+
+    Returns ``(digest, variants)`` where ``variants`` maps each format to the
+    widths written. Files that already exist are reused. An upload Pillow
+    cannot read gets empty ``variants`` so it is not retried forever.
+    """
+    digest = _digest(field_file)
+    formats = [fmt for fmt in FORMATS if fmt != "webp" or features.check("webp")]
+    field_file.open("rb")
+    try:
+        image = Image.open(field_file)
+        # Let the JPEG decoder skip detail the largest derivative cannot use.
+        image.draft("RGB", (WIDTHS[-1], WIDTHS[-1]))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return digest, {}
+    finally:
+        field_file.close()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    widths = sorted({width for width in WIDTHS if width < image.width} | {min(image.width, WIDTHS[-1])})
+    for width in widths:
+        names = {fmt: derivative_name(digest, width, fmt) for fmt in formats}
+        missing = [fmt for fmt, name in names.items() if not default_storage.exists(name)]
+        if not missing:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in missing:
+            buffer = BytesIO()
+            output = resized if fmt == "webp" else _flatten(resized)
+            output.save(buffer, format=fmt.upper(), quality=QUALITY[fmt], optimize=True)
+            saved = default_storage.save(names[fmt], ContentFile(buffer.getvalue()))
+            if saved != names[fmt]:
+                # Another worker wrote the same content first.
+                default_storage.delete(saved)
+    return digest, {fmt: widths for fmt in formats}
+
+
+def generate_for_event(event):
+    """Generate and record ``event``'s derivatives unless another request or
+    worker is already doing so. Returns True once they are recorded."""
+    from .models import Event
+
+    if event.image_digest or not event.image:
+        return bool(event.image_digest)
+    lock = LOCK_KEY.format(event.pk)
+    if not cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+        return False
+    try:
+        digest, variants = generate_derivatives(event.image)
+        # Skip the write if the image was replaced while we worked.
+        recorded = Event.objects.filter(pk=event.pk, image=event.image.name).update(
+            image_digest=digest, image_variants=variants
+        )
+    finally:
+        cache.delete(lock)
+    if recorded:
+        event.image_digest, event.image_variants = digest, variants
+    return bool(recorded)
+
+
+def variant_url(event, width, fmt):
+    """URL of the smallest recorded derivative at least ``width`` wide, or of
+    the original upload when there are none."""
+    widths = event.image_variants.get(fmt) or event.image_variants.get("jpeg")
+    if not widths:
+        return event.image.url
+    if fmt not in event.image_variants:
+        fmt = "jpeg"
+    chosen = next((w for w in widths if w >= width), widths[-1])
+    return default_storage.url(derivative_name(event.image_digest, chosen, fmt))
@@ -0,0 +1,146 @@
+"""Result cache for the ``event_list`` filters.
+
+Most listing traffic repeats a handful of filter combinations. For each
+normalized combination we cache the ordered sort keys of the matching events
+(``(date, time, id)``, ``(search_rank, id)`` or
+``(rating_average, rating_count, id)`` tuples, never rendered HTML) in
+a per-process LRU with a TTL. Combinations matching more than
+``MAX_CACHED_RESULTS`` events are remembered as ``TOO_BROAD`` so later
+requests go straight to keyset pagination; the unfiltered listing (only a
+``sort``) never uses the cache, as its first page is already one indexed
+``LIMIT`` query.
+
+Entries are tagged with a catalogue generation number kept in
+``CACHES["default"]`` and bumped whenever an ``Event`` or ``Category`` is
+saved or deleted. Reviews do not bump it, so a ``top_rated`` entry keeps its
+rating order until its TTL expires. A process never serves an entry from an older generation
+than the one it reads there, so with a cache shared by all workers (see the
+``events.W001`` check) a change is visible everywhere once committed. With a
+per-process cache such as ``LocMemCache``, other workers only drop their
+entries when the TTL expires.
+"""
+
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+from django.core.cache import cache
+
+GENERATION_KEY = "events:catalogue:generation"
+
+FILTER_PARAMS = ("q", "category", "location", "date", "price_range", "sort")
+PRICE_RANGES = ("0-1000", "1000-5000", "5000-10000", "10000+")
+SORT_OPTIONS = ("top_rated",)
+
+# Filters broader than this fall back to plain keyset pagination.
+MAX_CACHED_RESULTS = 1000
+
+# Cached in place of the keys of a filter combination that matched more than
+# MAX_CACHED_RESULTS events.
+TOO_BROAD = object()
+
+
+def normalize_filters(params):
+    """Reduce GET parameters to a canonical, hashable filter tuple.
+
+    Case and whitespace differences collapse to one key, and values the view
+    would ignore or reject (unknown price ranges, malformed dates) are dropped.
+    """
+    filters = {}
+    for name in FILTER_PARAMS:
+        value = " ".join(params.get(name, "").split())
+        if not value:
+            continue
+        if name in ("q", "category", "location"):
+            value = value.lower()
+        elif name == "date":
+            try:
+                value = datetime.date.fromisoformat(value).isoformat()
+            except ValueError:
+                continue
+        elif name == "price_range" and value not in PRICE_RANGES:
+            continue
+        elif name == "sort" and value not in SORT_OPTIONS:
+            continue
+        filters[name] = value
+    return tuple(sorted(filters.items()))
+
+
+def is_cacheable(filters):
+    """Whether a normalized filter tuple narrows the catalogue at all."""
+    return any(name != "sort" for name, _ in filters)
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+class ResultCache:
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filters):
+        """The cached keys (or ``TOO_BROAD``) for ``filters``, or None."""
+        generation = get_generation()
+        with self._lock:
+            entry = self._entries.get(filters)
+            if entry is None:
+                return None
+            expires, entry_generation, keys = entry
+            if entry_generation != generation or expires < time.monotonic():
+                del self._entries[filters]
+                return None
+            self._entries.move_to_end(filters)
+            return keys
+
+    def set(self, filters, keys, generation):
+        with self._lock:
+            self._entries[filters] = (time.monotonic() + self.ttl, generation, keys)
+            self._entries.move_to_end(filters)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def fetch(self, filters, queryset, ordering):
+        """Evaluate ``queryset``'s sort keys and cache them.
+
+        When more than ``MAX_CACHED_RESULTS`` events match, ``TOO_BROAD`` is
+        cached and returned instead.
+        """
+        # Read the generation first: a change committed while we query makes
+        # the entry stale immediately rather than hiding the change.
+        generation = get_generation()
+        fields = [name.lstrip("-") for name in ordering]
+        # Unordered, so the database can seek on the filter's own index
+        # instead of walking the ordering index; at most MAX_CACHED_RESULTS
+        # rows are sorted here.
+        keys = list(queryset.order_by().values_list(*fields)[:MAX_CACHED_RESULTS + 1])
+        if len(keys) > MAX_CACHED_RESULTS:
+            keys = TOO_BROAD
+        else:
+            for position in reversed(range(len(ordering))):
+                keys.sort(key=itemgetter(position), reverse=ordering[position].startswith("-"))
+        self.set(filters, keys, generation)
+        return keys
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+result_cache = ResultCache()
@@ -0,0 +1,219 @@
+import json
+import logging
+import platform
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Booking, Category, Event
+
+URL_MODULES = ("events", "accounts")
+
+# Routes whose GET changes state or that only accept POST.
+SKIPPED_ROUTES = {
+    "accounts:logout": "ends the persona's session",
+    "events:booking_cancel": "cancels the booking",
+    "events:event_image": "writes image derivatives on first request",
+    "events:payment_checkout": "confirms the booking or creates a Razorpay order",
+    "events:payment_callback": "POST only",
+    "events:payment_webhook": "POST only",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every named events/accounts route as an anonymous visitor, a "
+        "member and a staff user, and report latency percentiles, query counts "
+        "and SQL time per route. Run against a seeded scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=20, help="Timed requests per route")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per route")
+        parser.add_argument(
+            "--personas",
+            default="anonymous,member,staff",
+            help="Comma-separated subset of anonymous,member,staff",
+        )
+        parser.add_argument("--only", default="", help="Only routes whose name contains this")
+        parser.add_argument("--output", default="bench-report.json", help="Where to write the JSON report")
+        parser.add_argument("--baseline", help="Earlier report to compare against")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed p95 slowdown against the baseline before flagging (0.25 = 25%%)",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=2.0,
+            help="Ignore p95 slowdowns smaller than this, which are mostly noise",
+        )
+
+    def handle(self, *args, **options):
+        member_booking = (
+            Booking.objects.filter(status="confirmed", user__is_staff=False)
+            .select_related("user", "event")
+            .order_by("-created_at")
+            .first()
+        )
+        category = Category.objects.order_by("pk").first()
+        if member_booking is None or category is None:
+            raise CommandError("No data to benchmark against; run seed_benchmark_data first")
+
+        personas = {
+            "anonymous": None,
+            "member": member_booking.user,
+            "staff": self._staff_user(),
+        }
+        selected = [name.strip() for name in options["personas"].split(",") if name.strip()]
+        unknown = set(selected) - set(personas)
+        if unknown:
+            raise CommandError(f"Unknown persona(s): {', '.join(sorted(unknown))}")
+
+        values = {
+            "slug": member_booking.event.slug,
+            "pk": member_booking.pk,
+            "booking_id": member_booking.pk,
+            "token": "bench-invalid-token",
+            "uidb64": "MQ",
+        }
+        routes = self._routes(values, category.slug, options["only"])
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+
+        # 404s for other personas' bookings are expected; keep them off stderr.
+        request_logger = logging.getLogger("django.request")
+        log_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+
+        results = {}
+        self.stdout.write(
+            f"{'route':<46} {'status':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>7} {'sql':>8}"
+        )
+        try:
+            for persona in selected:
+                client = Client(HTTP_HOST=host)
+                if personas[persona] is not None:
+                    client.force_login(personas[persona])
+                for name, url in routes:
+                    key = f"{persona} {name}"
+                    results[key] = result = self._measure(
+                        client, url, options["warmup"], options["samples"]
+                    )
+                    self.stdout.write(
+                        f"{key:<46} {result['status']:>6} {result['p50_ms']:>7.1f}ms "
+                        f"{result['p95_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms "
+                        f"{result['queries']:>7} {result['sql_ms']:>6.1f}ms"
+                    )
+        finally:
+            request_logger.setLevel(log_level)
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "samples": options["samples"],
+                "rows": {
+                    "users": User.objects.count(),
+                    "events": Event.objects.count(),
+                    "bookings": Booking.objects.count(),
+                },
+                "skipped": SKIPPED_ROUTES,
+            },
+            "results": results,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                baseline = json.load(fh)["results"]
+            regressions = self._compare(
+                results, baseline, options["tolerance"], options["min_delta_ms"]
+            )
+            if regressions:
+                raise CommandError(f"{regressions} route(s) regressed against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def _staff_user(self):
+        staff = User.objects.filter(is_staff=True).order_by("pk").first()
+        if staff is None:
+            staff, _ = User.objects.get_or_create(
+                username="bench_staff", defaults={"is_staff": True}
+            )
+        return staff
+
+    def _routes(self, values, category_slug, only):
+        routes = []
+        for namespace in URL_MODULES:
+            for pattern in import_module(f"{namespace}.urls").urlpatterns:
+                name = f"{namespace}:{pattern.name}"
+                if name in SKIPPED_ROUTES or only not in name:
+                    continue
+                kwargs = {arg: values[arg] for arg in pattern.pattern.converters}
+                if pattern.name == "events_by_category":
+                    kwargs["slug"] = category_slug
+                routes.append((name, reverse(name, kwargs=kwargs)))
+        return routes
+
+    def _measure(self, client, url, warmup, samples):
+        for _ in range(warmup):
+            client.get(url)
+        timings, sql_times, query_counts = [], [], []
+        status = None
+        for _ in range(samples):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - start)
+            status = response.status_code
+            query_counts.append(len(ctx.captured_queries))
+            sql_times.append(sum(float(q["time"]) for q in ctx.captured_queries))
+        return {
+            "url": url,
+            "status": status,
+            "p50_ms": self._percentile(timings, 50),
+            "p95_ms": self._percentile(timings, 95),
+            "p99_ms": self._percentile(timings, 99),
+            "queries": max(query_counts),
+            "sql_ms": round(statistics.mean(sql_times) * 1000, 3),
+        }
+
+    def _percentile(self, timings, percentile):
+        if len(timings) < 2:
+            return round(timings[0] * 1000, 3)
+        cut = statistics.quantiles(timings, n=100, method="inclusive")[percentile - 1]
+        return round(cut * 1000, 3)
+
+    def _compare(self, results, baseline, tolerance, min_delta_ms):
+        regressions = 0
+        self.stdout.write("\nAgainst baseline:")
+        for key, result in results.items():
+            before = baseline.get(key)
+            if before is None:
+                self.stdout.write(f"  {key}: new route")
+                continue
+            problems = []
+            if result["queries"] > before["queries"]:
+                problems.append(f"queries {before['queries']} -> {result['queries']}")
+            slower = result["p95_ms"] - before["p95_ms"]
+            if slower > min_delta_ms and result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                problems.append(f"p95 {before['p95_ms']:.1f}ms -> {result['p95_ms']:.1f}ms")
+            if result["status"] != before["status"]:
+                problems.append(f"status {before['status']} -> {result['status']}")
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"  {key}: {', '.join(problems)}"))
+        return regressions
@@ -0,0 +1,120 @@
+import datetime
+import hashlib
+import hmac
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from events.models import Booking, Event, Payment
+
+BENCH_USERNAME = "bench_payment_callback"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure payment_callback latency as the Payment table grows. "
+        "Writes (and afterwards deletes) benchmark rows: run it on a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000,100000",
+            help="Comma-separated Payment table sizes to measure at",
+        )
+        parser.add_argument("--samples", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        event = Event.objects.create(
+            title="Callback benchmark",
+            description="Benchmark fixture",
+            location="Nowhere",
+            date=datetime.date.today() + datetime.timedelta(days=365),
+            time=datetime.time(12),
+            price=100,
+            capacity=10**9,
+        )
+        host = next(
+            (h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost"
+        )
+        client = Client(HTTP_HOST=host)
+        url = reverse("events:payment_callback")
+
+        self.stdout.write(f"{'rows':>10} {'first p50':>10} {'first p95':>10} {'replay p50':>11} {'queries':>8}")
+        try:
+            for size in sizes:
+                self._grow(user, event, size, options["batch_size"])
+                order_ids = list(
+                    Payment.objects.filter(booking__user=user, status="pending")
+                    .order_by("?")
+                    .values_list("razorpay_order_id", flat=True)[:options["samples"]]
+                )
+                first = [self._time(client, url, order_id) for order_id in order_ids]
+                replay = [self._time(client, url, order_id) for order_id in order_ids]
+                with CaptureQueriesContext(connection) as ctx:
+                    self._time(client, url, order_ids[0])
+                self.stdout.write(
+                    f"{Payment.objects.count():>10} "
+                    f"{self._ms(first, 50):>10} {self._ms(first, 95):>10} "
+                    f"{self._ms(replay, 50):>11} {len(ctx.captured_queries):>8}"
+                )
+        finally:
+            if not options["keep"]:
+                user.delete()
+                event.delete()
+
+    def _grow(self, user, event, size, batch_size):
+        missing = size - Payment.objects.count()
+        while missing > 0:
+            count = min(missing, batch_size)
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    user=user,
+                    event=event,
+                    booking_date=event.date,
+                    total_amount=event.price,
+                )
+                for _ in range(count)
+            ])
+            Payment.objects.bulk_create([
+                Payment(
+                    booking=booking,
+                    amount=booking.total_amount,
+                    razorpay_order_id=f"order_bench_{uuid.uuid4().hex}",
+                )
+                for booking in bookings
+            ])
+            missing -= count
+
+    def _time(self, client, url, order_id):
+        payment_id = f"pay_bench_{uuid.uuid4().hex[:14]}"
+        signature = hmac.new(
+            settings.RAZORPAY_KEY_SECRET.encode(),
+            f"{order_id}|{payment_id}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        start = time.perf_counter()
+        client.post(url, {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": signature,
+        })
+        return time.perf_counter() - start
+
+    def _ms(self, timings, percentile):
+        if len(timings) < 2:
+            return f"{timings[0] * 1000:.2f}ms" if timings else "-"
+        cut = statistics.quantiles(timings, n=100)[percentile - 1]
+        return f"{cut * 1000:.2f}ms"
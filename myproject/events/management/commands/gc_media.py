@@ -0,0 +1,115 @@
+import datetime
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from events.models import Blob, Event
+from events.storage import ContentAddressedStorage
+
+# (model, field) pairs whose values point into the blob store.
+REFERENCES = (
+    (Event, "image"),
+    (UserProfile, "profile_picture"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount references to content-addressed media blobs by streaming the "
+        "event and profile tables, fix drifted refcounts, and delete blobs (and "
+        "their image derivatives) that nothing references. Refcount fixes made "
+        "while uploads are in flight may be off by one until the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=24,
+            help="Keep unreferenced blobs uploaded more recently than this",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report without deleting")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        references = Counter()
+        for model, field in REFERENCES:
+            names = (
+                model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True).order_by().iterator(chunk_size=batch_size)
+            )
+            references.update(names)
+        # Derivatives are named after the image digest, which for a blob is
+        # its own hash; keep those still used by any event.
+        digests = set(
+            Event.objects.exclude(image_digest="").values_list("image_digest", flat=True)
+            .order_by().iterator(chunk_size=batch_size)
+        )
+
+        cutoff = timezone.now() - datetime.timedelta(hours=options["grace_hours"])
+        storage = ContentAddressedStorage()
+        totals = {"scanned": 0, "fixed": 0, "deleted": 0, "bytes": 0}
+        last_pk = 0
+        while True:
+            blobs = list(Blob.objects.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not blobs:
+                break
+            last_pk = blobs[-1].pk
+            totals["scanned"] += len(blobs)
+
+            drifted = []
+            for blob in blobs:
+                if blob.refcount != references[blob.name]:
+                    blob.refcount = references[blob.name]
+                    drifted.append(blob)
+            totals["fixed"] += len(drifted)
+
+            doomed = [
+                blob for blob in blobs
+                if not references[blob.name] and blob.touched_at < cutoff
+            ]
+            if options["dry_run"]:
+                for blob in doomed:
+                    self.stdout.write(f"Would delete {blob.name} ({blob.size} bytes)")
+                totals["deleted"] += len(doomed)
+                totals["bytes"] += sum(blob.size for blob in doomed)
+                continue
+
+            with transaction.atomic():
+                Blob.objects.bulk_update(drifted, ["refcount"])
+                # Re-check the grace period: a new upload of the same content
+                # may have touched a blob since it was read.
+                doomed = list(
+                    Blob.objects.select_for_update()
+                    .filter(pk__in=[blob.pk for blob in doomed], touched_at__lt=cutoff)
+                )
+                Blob.objects.filter(pk__in=[blob.pk for blob in doomed]).delete()
+            for blob in doomed:
+                storage.delete(blob.name)
+                self._delete_derivatives(blob.name, digests)
+            totals["deleted"] += len(doomed)
+            totals["bytes"] += sum(blob.size for blob in doomed)
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {totals['scanned']} blobs: {verb.lower()} {totals['deleted']} "
+            f"({totals['bytes'] / 1024 / 1024:.1f} MB), fixed {totals['fixed']} refcounts"
+        ))
+
+    def _delete_derivatives(self, name, digests):
+        digest = name.rsplit("/", 1)[-1].split(".", 1)[0]
+        if digest in digests:
+            return
+        directory = f"derivatives/{digest[:2]}"
+        try:
+            _, files = default_storage.listdir(directory)
+        except FileNotFoundError:
+            return
+        for filename in files:
+            if filename.startswith(f"{digest}-"):
+                default_storage.delete(f"{directory}/{filename}")
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.images import generate_for_event
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized WebP/JPEG copies of new and replaced event images "
+        "that listing cards and event pages serve"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when every image is done",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the images that are pending now and exit",
+        )
+        parser.add_argument(
+            "--regenerate",
+            action="store_true",
+            help="Mark every event image pending first, e.g. after changing the widths",
+        )
+
+    def handle(self, *args, **options):
+        if options["regenerate"]:
+            marked = Event.objects.exclude(image="").exclude(image__isnull=True).update(
+                image_digest="", image_variants={}
+            )
+            self.stdout.write(f"Marked {marked} images for regeneration")
+
+        last_pk = 0
+        while True:
+            pending = list(
+                Event.objects.filter(image_digest="", pk__gt=last_pk)
+                .exclude(image="")
+                .exclude(image__isnull=True)
+                .order_by("pk")[:options["batch_size"]]
+            )
+            if pending:
+                last_pk = pending[-1].pk
+                for event in pending:
+                    started = time.perf_counter()
+                    if not generate_for_event(event):
+                        # A request is generating them on demand, or the
+                        # image changed; the next pass picks it up if needed.
+                        continue
+                    variants = ", ".join(
+                        f"{fmt} {'/'.join(map(str, widths))}"
+                        for fmt, widths in event.image_variants.items()
+                    ) or "unreadable image, serving the original"
+                    self.stdout.write(
+                        f"{event.slug}: {variants} ({time.perf_counter() - started:.2f}s)"
+                    )
+                continue
+            if options["once"]:
+                break
+            last_pk = 0
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS("Image derivatives up to date"))
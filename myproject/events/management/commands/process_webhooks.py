@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.webhooks import process_batch
+
+
+class Command(BaseCommand):
+    help = "Apply queued Razorpay webhook deliveries to payments and bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain what is currently queued and exit",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            claimed, applied, errors = process_batch(options["batch_size"])
+            if claimed:
+                self.stdout.write(
+                    f"Processed {claimed}: applied {applied}, failed {errors}"
+                )
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS("Webhook queue drained"))
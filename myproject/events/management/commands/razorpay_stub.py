@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from events.razorpay_stub import make_server
+
+
+class Command(BaseCommand):
+    help = "Run a local stub of the Razorpay orders API for offline testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=0,
+            help="Delay added to every response",
+        )
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0,
+            help="Fraction of requests answered with a 503 (0-1)",
+        )
+
+    def handle(self, *args, **options):
+        server = make_server(
+            options["host"],
+            options["port"],
+            key_secret=settings.RAZORPAY_KEY_SECRET,
+            latency=options["latency_ms"] / 1000,
+            failure_rate=options["failure_rate"],
+        )
+        host, port = server.server_address
+        self.stdout.write(self.style.SUCCESS(
+            f"Razorpay stub listening on http://{host}:{port} "
+            f"(set RAZORPAY_BASE_URL to this address)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
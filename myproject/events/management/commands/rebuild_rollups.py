@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from events.models import Booking, CategoryStats, DailyStats, Event, Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the admin dashboard rollup tables from bookings, payments, "
+        "users and events. Run it after bulk imports or to repair drift; "
+        "writes made while it runs may be lost, so pick a quiet moment."
+    )
+
+    def handle(self, *args, **options):
+        daily = {}
+
+        def day(date):
+            return daily.setdefault(date, DailyStats(date=date))
+
+        for row in (
+            User.objects.annotate(day=TruncDate("date_joined"))
+            .values("day").annotate(n=Count("id")).order_by()
+        ):
+            day(row["day"]).new_users = row["n"]
+        for row in (
+            Booking.objects.annotate(day=TruncDate("created_at"))
+            .values("day").annotate(n=Count("id")).order_by()
+        ):
+            day(row["day"]).bookings = row["n"]
+        for row in (
+            Payment.objects.filter(status="success")
+            .annotate(day=TruncDate("created_at"))
+            .values("day").annotate(total=Sum("amount")).order_by()
+        ):
+            day(row["day"]).revenue = row["total"]
+
+        categories = {}
+
+        def category(category_id):
+            return categories.setdefault(
+                category_id, CategoryStats(key=category_id or 0, category_id=category_id)
+            )
+
+        for row in Event.objects.values("category").annotate(n=Count("id")).order_by():
+            category(row["category"]).events = row["n"]
+        for row in (
+            Booking.objects.values("event__category").annotate(n=Count("id")).order_by()
+        ):
+            category(row["event__category"]).bookings = row["n"]
+        for row in (
+            Payment.objects.filter(status="success")
+            .values("booking__event__category")
+            .annotate(total=Sum("amount")).order_by()
+        ):
+            category(row["booking__event__category"]).revenue = row["total"]
+
+        with transaction.atomic():
+            DailyStats.objects.all().delete()
+            CategoryStats.objects.all().delete()
+            DailyStats.objects.bulk_create(daily.values(), batch_size=1000)
+            CategoryStats.objects.bulk_create(categories.values())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(daily)} daily and {len(categories)} category rollup rows"
+        ))
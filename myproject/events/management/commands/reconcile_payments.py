@@ -0,0 +1,181 @@
+import datetime
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from events.models import Payment
+from events.outbox import queue_booking_confirmation
+from events.payments import PaymentGatewayError, get_gateway
+
+
+class RateLimiter:
+    """Let at most ``rate`` calls per second through, shared across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(self.next_at, now)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def gateway_outcome(items):
+    """Map Razorpay's payments for an order to ("success"|"failed", payment id).
+
+    Returns None while the order is still open: no attempts yet, or an
+    attempt that is authorized but not captured.
+    """
+    for item in items:
+        if item.get("status") == "captured":
+            return "success", item["id"]
+    if items and all(item.get("status") == "failed" for item in items):
+        return "failed", items[-1]["id"]
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Resolve stale pending payments, and recently failed ones that may since "
+        "have been captured, by asking Razorpay what happened to their orders"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=30,
+            help="Only check payments untouched for this many minutes",
+        )
+        parser.add_argument(
+            "--failed-within",
+            type=int,
+            default=24,
+            help="Also re-check failed payments whose order was created in the last N hours",
+        )
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent gateway calls")
+        parser.add_argument("--rate", type=float, default=20, help="Max gateway calls per second")
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many payments")
+        parser.add_argument("--dry-run", action="store_true", help="Report without writing")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - datetime.timedelta(minutes=options["older_than"])
+        # A payment the callback or a webhook marked failed can still be
+        # captured later (a retried UPI or card attempt on the same order).
+        unsettled = Q(status="pending") | Q(
+            status="failed",
+            razorpay_order_created_at__gte=now - datetime.timedelta(hours=options["failed_within"]),
+        )
+        gateway = get_gateway()
+        limiter = RateLimiter(options["rate"])
+        totals = {"checked": 0, "success": 0, "failed": 0, "open": 0, "errors": 0}
+        latencies = []
+        started = time.perf_counter()
+
+        def fetch(payment):
+            limiter.wait()
+            start = time.perf_counter()
+            try:
+                response = gateway.fetch_order_payments(payment.razorpay_order_id)
+            except PaymentGatewayError as exc:
+                return payment, exc, time.perf_counter() - start
+            return payment, gateway_outcome(response.get("items", [])), time.perf_counter() - start
+
+        last_pk = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                size = options["chunk_size"]
+                if options["limit"]:
+                    size = min(size, options["limit"] - totals["checked"])
+                    if size <= 0:
+                        break
+                chunk = list(
+                    Payment.objects.filter(
+                        unsettled,
+                        pk__gt=last_pk,
+                        razorpay_order_id__isnull=False,
+                        updated_at__lt=cutoff,
+                    )
+                    .only("pk", "razorpay_order_id", "status")
+                    .order_by("pk")[:size]
+                )
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+
+                outcomes = {}
+                for payment, outcome, seconds in pool.map(fetch, chunk):
+                    latencies.append(seconds)
+                    if isinstance(outcome, PaymentGatewayError):
+                        totals["errors"] += 1
+                        self.stderr.write(f"{payment.razorpay_order_id}: {outcome}")
+                    elif outcome is None:
+                        totals["open"] += 1
+                    elif outcome[0] != payment.status:
+                        outcomes[payment.pk] = outcome
+                totals["checked"] += len(chunk)
+
+                if options["dry_run"]:
+                    for pk, (status, payment_id) in outcomes.items():
+                        totals[status] += 1
+                        self.stdout.write(f"Would mark payment #{pk} {status} ({payment_id})")
+                else:
+                    for status, count in self._apply(outcomes).items():
+                        totals[status] += count
+
+        elapsed = time.perf_counter() - started
+        verb = "Would resolve" if options["dry_run"] else "Resolved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['success']} succeeded and {totals['failed']} failed of "
+            f"{totals['checked']} checked; {totals['open']} still open, "
+            f"{totals['errors']} gateway errors"
+        ))
+        self.stdout.write(
+            f"{elapsed:.2f}s total, {totals['checked'] / elapsed if elapsed else 0:.1f} payments/s, "
+            f"gateway p50 {self._ms(latencies, 50)} p95 {self._ms(latencies, 95)}"
+        )
+
+    def _apply(self, outcomes):
+        """Write one chunk's outcomes in a single transaction."""
+        applied = {"success": 0, "failed": 0}
+        if not outcomes:
+            return applied
+        with transaction.atomic():
+            # Re-read under lock: a callback or webhook may have settled some
+            # of these while the gateway calls were in flight.
+            payments = (
+                Payment.objects.select_related("booking__event", "booking__user")
+                .select_for_update(of=("self", "booking"))
+                .filter(pk__in=list(outcomes), status__in=("pending", "failed"))
+            )
+            for payment in payments:
+                status, payment_id = outcomes[payment.pk]
+                if status == "success":
+                    changed = payment.mark_success(payment_id)
+                    if changed:
+                        queue_booking_confirmation(payment.booking)
+                else:
+                    changed = payment.mark_failed()
+                applied[status] += int(changed)
+        return applied
+
+    def _ms(self, timings, percentile):
+        if len(timings) < 2:
+            return f"{timings[0] * 1000:.1f}ms" if timings else "-"
+        cut = statistics.quantiles(timings, n=100)[percentile - 1]
+        return f"{cut * 1000:.1f}ms"
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from events.models import Booking, Event
+
+
+class Command(BaseCommand):
+    help = "Recompute Event.booked_seats from pending and confirmed bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted events without updating them",
+        )
+
+    def handle(self, *args, **options):
+        booked = (
+            Booking.objects.filter(
+                event=OuterRef("pk"), status__in=Booking.SEAT_HOLDING_STATUSES
+            )
+            .values("event")
+            .annotate(total=Sum("number_of_guests"))
+            .values("total")
+        )
+        with transaction.atomic():
+            drifted = (
+                Event.objects.select_for_update()
+                .alias(actual=Coalesce(Subquery(booked), 0))
+                .filter(~Q(booked_seats=F("actual")))
+            )
+            pks = list(drifted.values_list("pk", flat=True))
+            if pks and not options["dry_run"]:
+                Event.objects.filter(pk__in=pks).update(
+                    booked_seats=Coalesce(Subquery(booked), 0)
+                )
+
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(pks)} event(s) with drifted seat counters"
+        ))
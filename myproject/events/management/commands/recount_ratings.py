@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from events.models import Event, Review, rating_average_expression
+
+
+def rating_stats():
+    """Correlated subqueries recomputing each rating column from reviews."""
+    reviews = Review.objects.filter(event=OuterRef("pk")).order_by().values("event")
+
+    def total(aggregate, **filters):
+        return Coalesce(
+            Subquery(reviews.filter(**filters).annotate(v=aggregate).values("v")), 0
+        )
+
+    stats = {
+        "rating_sum": total(Sum("rating")),
+        "rating_count": total(Count("pk")),
+    }
+    for stars in range(1, 6):
+        stats[f"rating_{stars}"] = total(Count("pk"), rating=stars)
+    return stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized review stats on Event from its reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted events without updating them",
+        )
+
+    def handle(self, *args, **options):
+        stats = rating_stats()
+        with transaction.atomic():
+            drift = Q()
+            for field in stats:
+                drift |= ~Q(**{field: F(f"actual_{field}")})
+            drifted = (
+                Event.objects.select_for_update()
+                .alias(**{f"actual_{field}": expr for field, expr in stats.items()})
+                .filter(drift)
+            )
+            pks = list(drifted.values_list("pk", flat=True))
+            if pks and not options["dry_run"]:
+                events = Event.objects.filter(pk__in=pks)
+                events.update(**stats)
+                events.update(rating_average=rating_average_expression())
+
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(pks)} event(s) with drifted rating stats"
+        ))
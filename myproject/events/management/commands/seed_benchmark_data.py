@@ -0,0 +1,313 @@
+import datetime
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from events.categories import bump_version as bump_category_version
+from events.listing_cache import bump_generation as bump_catalogue_generation
+from events.models import Booking, Category, Event, Payment, Review
+
+CITIES = (
+    "Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Pune",
+    "Ahmedabad", "Jaipur", "Lucknow", "Kochi", "Goa",
+)
+VENUES = ("Grand Hall", "Palace Grounds", "Convention Centre", "Rooftop", "Beach Resort", "Farmhouse")
+ADJECTIVES = ("Royal", "Sunset", "Golden", "Grand", "Intimate", "Vibrant", "Classic", "Modern")
+COMMENTS = (
+    "Wonderful evening, everything ran on time.",
+    "Good venue but the food could have been better.",
+    "Loved the decorations and the music.",
+    "Too crowded for my taste.",
+    "Would book again!",
+    "Staff were friendly and helpful.",
+)
+BOOKING_STATUSES = (("confirmed", 70), ("pending", 15), ("cancelled", 15))
+
+
+@contextmanager
+def explicit_timestamps(*model_classes):
+    """Let bulk_create keep the created_at/updated_at values we generate."""
+    fields = [
+        field
+        for model in model_classes
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic, production-sized dataset of users, events, "
+        "bookings, payments and reviews for performance work. Scratch databases only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--events", type=int, default=1000)
+        parser.add_argument("--bookings", type=int, default=20000)
+        parser.add_argument(
+            "--review-rate",
+            type=float,
+            default=0.3,
+            help="Share of confirmed bookings for past events that leave a review",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.2,
+            help="Power-law exponent for event popularity and user activity (0 = uniform)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="bench",
+            help="Username/slug prefix; must not already be in use",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(
+                f"Users prefixed '{self.prefix}_' already exist; pick another --prefix"
+            )
+        # Anchor every generated date on today so "upcoming" and "past" events
+        # stay meaningful, while the rows themselves depend only on --seed.
+        self.now = timezone.now().replace(microsecond=0)
+        started = time.perf_counter()
+
+        categories = self._categories()
+        user_ids = self._users(options["users"])
+        events = self._events(options["events"], categories)
+        self._bookings(options["bookings"], user_ids, events, options["skew"], options["review_rate"])
+
+        self.stdout.write("Recomputing counters and rollups...")
+        for command in ("recount_booked_seats", "recount_ratings", "rebuild_rollups"):
+            call_command(command, stdout=StringIO())
+        # Hot events may have sold more seats than their random capacity.
+        Event.objects.filter(booked_seats__gt=models.F("capacity")).update(
+            capacity=models.F("booked_seats")
+        )
+        bump_category_version()
+        bump_catalogue_generation()
+        # Give the planner statistics for the new volumes.
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute(
+                    "ANALYZE TABLE auth_user, events_event, events_booking, "
+                    "events_payment, events_review"
+                )
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.perf_counter() - started:.1f}s"
+        ))
+
+    # ─── Generators ──────────────────────────────────────────────────────────
+
+    def _categories(self):
+        call_command("seed_categories", stdout=StringIO())
+        return list(Category.objects.order_by("pk"))
+
+    def _users(self, count):
+        password = make_password("bench-pass-123")
+        joined_from = self.now - datetime.timedelta(days=730)
+
+        def rows():
+            for i in range(count):
+                yield User(
+                    username=f"{self.prefix}_user_{i}",
+                    email=f"{self.prefix}_user_{i}@example.com",
+                    first_name=f"User{i}",
+                    password=password,
+                    date_joined=joined_from + datetime.timedelta(
+                        seconds=self.rng.randrange(730 * 86400)
+                    ),
+                )
+
+        user_ids = self._insert(User, rows(), count)
+        with explicit_timestamps(UserProfile):
+            self._insert(UserProfile, (
+                UserProfile(user_id=pk, email_verified=True, created_at=self.now, updated_at=self.now)
+                for pk in user_ids
+            ), count)
+        return user_ids
+
+    def _events(self, count, categories):
+        def rows():
+            for i in range(count):
+                created = self.now - datetime.timedelta(days=self.rng.randrange(30, 400))
+                yield Event(
+                    title=f"{self.rng.choice(ADJECTIVES)} {self.rng.choice(categories).name} {i}",
+                    slug=f"{self.prefix}-event-{i}",
+                    description=f"{self.rng.choice(ADJECTIVES)} event at the {self.rng.choice(VENUES)}.",
+                    category=self.rng.choice(categories),
+                    location=f"{self.rng.choice(VENUES)}, {self.rng.choice(CITIES)}",
+                    date=(self.now + datetime.timedelta(days=self.rng.randrange(-365, 365))).date(),
+                    time=datetime.time(self.rng.randrange(8, 23), self.rng.choice((0, 30))),
+                    price=Decimal(self.rng.choice((0, 250, 500, 999, 1500, 2500, 5000, 12000))),
+                    capacity=self.rng.choice((50, 100, 200, 500, 1000)),
+                    is_active=self.rng.random() > 0.05,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        with explicit_timestamps(Event):
+            self._insert(Event, rows(), count)
+        return list(
+            Event.objects.filter(slug__startswith=f"{self.prefix}-event-")
+            .order_by("pk")
+            .values_list("pk", "date", "price")
+        )
+
+    def _pick(self, items, skew):
+        """Power-law pick: with skew > 0 the first items are far more popular."""
+        return items[int(len(items) * self.rng.random() ** (1 + skew))]
+
+    def _bookings(self, count, user_ids, events, skew, review_rate):
+        # Shuffle so popularity is unrelated to id or date order.
+        events = list(events)
+        users = list(user_ids)
+        self.rng.shuffle(events)
+        self.rng.shuffle(users)
+        statuses = [status for status, _ in BOOKING_STATUSES]
+        weights = [weight for _, weight in BOOKING_STATUSES]
+        today = self.now.date()
+
+        progress = self._progress(Booking, count)
+        made = 0
+        with explicit_timestamps(Booking, Payment, Review):
+            while made < count:
+                size = min(self.batch_size, count - made)
+                batch = []
+                for _ in range(size):
+                    event_id, event_date, price = self._pick(events, skew)
+                    guests = self.rng.choice((1, 1, 1, 2, 2, 3, 4, 6))
+                    # Booked up to three months ahead, never in the future.
+                    created = min(
+                        datetime.datetime.combine(event_date, datetime.time(), tzinfo=datetime.timezone.utc)
+                        - datetime.timedelta(seconds=self.rng.randrange(1, 90 * 86400)),
+                        self.now - datetime.timedelta(seconds=self.rng.randrange(1, 86400)),
+                    )
+                    batch.append(Booking(
+                        user_id=self._pick(users, skew / 2),
+                        event_id=event_id,
+                        number_of_guests=guests,
+                        booking_date=event_date,
+                        total_amount=price * guests,
+                        status=self.rng.choices(statuses, weights)[0],
+                        created_at=created,
+                        updated_at=created,
+                    ))
+                with transaction.atomic():
+                    pks = self._bulk_insert(Booking, batch)
+                    payments, reviews = [], []
+                    for pk, booking in zip(pks, batch):
+                        if booking.status == "cancelled" and self.rng.random() < 0.7:
+                            continue
+                        payments.append(Payment(
+                            booking_id=pk,
+                            amount=booking.total_amount,
+                            razorpay_order_id=f"order_{self.prefix}_{pk}",
+                            razorpay_payment_id=(
+                                f"pay_{self.prefix}_{pk}" if booking.status == "confirmed" else None
+                            ),
+                            status={"confirmed": "success", "pending": "pending"}.get(
+                                booking.status, "failed"
+                            ),
+                            created_at=booking.created_at,
+                            updated_at=booking.created_at,
+                        ))
+                        if (
+                            booking.status == "confirmed"
+                            and booking.booking_date < today
+                            and self.rng.random() < review_rate
+                        ):
+                            reviewed = min(
+                                datetime.datetime.combine(
+                                    booking.booking_date, datetime.time(22), tzinfo=datetime.timezone.utc
+                                ) + datetime.timedelta(days=self.rng.randrange(0, 14)),
+                                self.now,
+                            )
+                            reviews.append(Review(
+                                user_id=booking.user_id,
+                                event_id=booking.event_id,
+                                # Skewed towards 4 and 5 stars, like real reviews.
+                                rating=self.rng.choices((1, 2, 3, 4, 5), (5, 7, 15, 35, 38))[0],
+                                comment=self.rng.choice(COMMENTS),
+                                created_at=reviewed,
+                                updated_at=reviewed,
+                            ))
+                    Payment.objects.bulk_create(payments)
+                    # A user reviews an event at most once; drop repeats.
+                    Review.objects.bulk_create(reviews, ignore_conflicts=True)
+                made += size
+                progress(made, extra=f"{len(payments)} payments, {len(reviews)} reviews in last batch")
+
+    # ─── Helpers ─────────────────────────────────────────────────────────────
+
+    def _insert(self, model, rows, count):
+        """bulk_create ``rows`` in batches inside per-batch transactions."""
+        progress = self._progress(model, count)
+        pks, batch = [], []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                with transaction.atomic():
+                    pks.extend(self._bulk_insert(model, batch))
+                progress(len(pks))
+                batch = []
+        if batch:
+            with transaction.atomic():
+                pks.extend(self._bulk_insert(model, batch))
+            progress(len(pks))
+        return pks
+
+    def _bulk_insert(self, model, batch):
+        """Insert ``batch`` and return the new primary keys in order.
+
+        Backends that cannot return ids from a multi-row INSERT (MySQL) are
+        read back as the highest ids; this command assumes no other writers.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            return [obj.pk for obj in model.objects.bulk_create(batch)]
+        model.objects.bulk_create(batch)
+        pks = list(
+            model.objects.order_by("-pk").values_list("pk", flat=True)[:len(batch)]
+        )
+        pks.reverse()
+        return pks
+
+    def _progress(self, model, total):
+        label = model._meta.verbose_name_plural
+        started = time.perf_counter()
+
+        def report(done, extra=""):
+            elapsed = time.perf_counter() - started
+            rate = done / elapsed if elapsed else 0
+            suffix = f" ({extra})" if extra else ""
+            self.stdout.write(
+                f"{label}: {done}/{total} rows, {rate:,.0f} rows/s{suffix}"
+            )
+
+        return report
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.outbox import claim_batch, send_batch
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Dead-letter a message after this many failed attempts",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the outbox is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain what is currently due and exit",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            batch = claim_batch(options["batch_size"])
+            if batch:
+                sent, failed, dead = send_batch(batch, max_attempts=options["max_attempts"])
+                self.stdout.write(
+                    f"Sent {sent}, retrying {failed}, dead-lettered {dead}"
+                )
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS("Outbox drained"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-18 02:48
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_booked_seats(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    Booking = apps.get_model("events", "Booking")
+    booked = (
+        Booking.objects.filter(
+            event=OuterRef("pk"), status__in=["pending", "confirmed"]
+        )
+        .values("event")
+        .annotate(total=Sum("number_of_guests"))
+        .values("total")
+    )
+    Event.objects.update(booked_seats=Coalesce(Subquery(booked), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="booked_seats",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_booked_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+INDEX_NAME = "events_event_fulltext"
+COLUMNS = ("title", "location", "description")
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    qn = schema_editor.quote_name
+    schema_editor.execute(
+        f"CREATE FULLTEXT INDEX {qn(INDEX_NAME)} ON {qn('events_event')} "
+        f"({', '.join(qn(column) for column in COLUMNS)})"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    qn = schema_editor.quote_name
+    schema_editor.execute(f"DROP INDEX {qn(INDEX_NAME)} ON {qn('events_event')}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0002_event_booked_seats"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-18 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0005_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="razorpay_order_amount",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="razorpay_order_created_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
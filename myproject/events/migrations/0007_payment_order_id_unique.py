@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0006_payment_order_reuse"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="razorpay_order_id",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0008_webhookevent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["status", "id"], name="payment_status_idx"),
+        ),
+    ]
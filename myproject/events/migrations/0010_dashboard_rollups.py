@@ -0,0 +1,136 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """Same totals as ``manage.py rebuild_rollups``, for existing databases."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Event = apps.get_model("events", "Event")
+    Booking = apps.get_model("events", "Booking")
+    Payment = apps.get_model("events", "Payment")
+    DailyStats = apps.get_model("events", "DailyStats")
+    CategoryStats = apps.get_model("events", "CategoryStats")
+
+    daily = {}
+
+    def day(date):
+        return daily.setdefault(date, DailyStats(date=date))
+
+    for row in (
+        User.objects.annotate(day=TruncDate("date_joined"))
+        .values("day").annotate(n=Count("pk")).order_by()
+    ):
+        day(row["day"]).new_users = row["n"]
+    for row in (
+        Booking.objects.annotate(day=TruncDate("created_at"))
+        .values("day").annotate(n=Count("pk")).order_by()
+    ):
+        day(row["day"]).bookings = row["n"]
+    for row in (
+        Payment.objects.filter(status="success")
+        .annotate(day=TruncDate("created_at"))
+        .values("day").annotate(total=Sum("amount")).order_by()
+    ):
+        day(row["day"]).revenue = row["total"]
+
+    categories = {}
+
+    def category(category_id):
+        return categories.setdefault(
+            category_id, CategoryStats(key=category_id or 0, category_id=category_id)
+        )
+
+    for row in Event.objects.values("category").annotate(n=Count("pk")).order_by():
+        category(row["category"]).events = row["n"]
+    for row in Booking.objects.values("event__category").annotate(n=Count("pk")).order_by():
+        category(row["event__category"]).bookings = row["n"]
+    for row in (
+        Payment.objects.filter(status="success")
+        .values("booking__event__category")
+        .annotate(total=Sum("amount")).order_by()
+    ):
+        category(row["booking__event__category"]).revenue = row["total"]
+
+    DailyStats.objects.bulk_create(daily.values(), batch_size=1000)
+    CategoryStats.objects.bulk_create(categories.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0009_payment_status_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.PositiveIntegerField(unique=True)),
+                ("events", models.IntegerField(default=0)),
+                ("bookings", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Category stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("new_users", models.IntegerField(default=0)),
+                ("bookings", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Daily stats",
+                "ordering": ["date"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["-created_at"], name="booking_created_idx"),
+        ),
+        migrations.AddField(
+            model_name="categorystats",
+            name="category",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="stats",
+                to="events.category",
+            ),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
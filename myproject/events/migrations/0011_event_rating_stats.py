@@ -0,0 +1,87 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+
+
+def backfill_rating_stats(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    Review = apps.get_model("events", "Review")
+    reviews = Review.objects.filter(event=OuterRef("pk")).order_by().values("event")
+
+    def total(aggregate, **filters):
+        return Coalesce(
+            Subquery(reviews.filter(**filters).annotate(v=aggregate).values("v")), 0
+        )
+
+    stats = {
+        "rating_sum": total(Sum("rating")),
+        "rating_count": total(Count("pk")),
+    }
+    for stars in range(1, 6):
+        stats[f"rating_{stars}"] = total(Count("pk"), rating=stars)
+    Event.objects.update(**stats)
+    Event.objects.filter(rating_count__gt=0).update(
+        rating_average=Cast("rating_sum", models.FloatField()) / models.F("rating_count")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0010_dashboard_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="rating_1",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_2",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_3",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_4",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_5",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_average",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["-rating_average", "-rating_count", "id"],
+                name="event_top_rated_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0011_event_rating_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="review",
+            name="review_event_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["event", "-created_at", "-id"], name="review_event_recent_idx"
+            ),
+        ),
+    ]
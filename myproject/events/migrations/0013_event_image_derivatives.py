@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0012_review_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="image_digest",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:29
+
+import events.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0013_event_image_derivatives"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("refcount", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("touched_at", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=events.storage.ContentAddressedStorage(),
+                upload_to="events/",
+            ),
+        ),
+    ]
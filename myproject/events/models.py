@@ -1,12 +1,26 @@
 import datetime
+import logging
 import uuid
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Cast
+from django.db.models.lookups import LessThanOrEqual
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.utils.text import slugify
 
+from . import search
+from .categories import bump_version as bump_category_version
+from .listing_cache import bump_generation as bump_catalogue_generation
+from .storage import BLOB_PREFIX, ContentAddressedStorage
+
+logger = logging.getLogger(__name__)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -23,6 +37,39 @@ class Category(models.Model):
         return self.name
 
 
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    transaction.on_commit(bump_category_version)
+    # Listing filters match on category slugs.
+    transaction.on_commit(bump_catalogue_generation)
+
+
+class EventQuerySet(models.QuerySet):
+    def with_listing_stats(self):
+        """Fetch what listing cards show in one query.
+
+        Rating stats are denormalized onto ``Event`` (see ``record_rating``),
+        so only the category needs joining.
+        """
+        return self.select_related("category")
+
+    def with_review_eligibility(self, user):
+        """Annotate whether ``user`` has a confirmed booking for, and has
+        already reviewed, each event, so both checks ride on the event query."""
+        if not user.is_authenticated:
+            return self.annotate(
+                user_has_booking=models.Value(False),
+                user_has_review=models.Value(False),
+            )
+        return self.annotate(
+            user_has_booking=Exists(Booking.objects.filter(
+                user=user, event=OuterRef("pk"), status="confirmed"
+            )),
+            user_has_review=Exists(Review.objects.filter(user=user, event=OuterRef("pk"))),
+        )
+
+
 class Event(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
@@ -37,7 +84,25 @@ class Event(models.Model):
         max_digits=10, decimal_places=2, validators=[MinValueValidator(0)]
     )
     capacity = models.PositiveIntegerField()
-    image = models.ImageField(upload_to="events/", blank=True, null=True)
+    # Seats held by pending and confirmed bookings. Only ever changed through
+    # reserve_seats()/release_seats() so concurrent bookings cannot oversell.
+    booked_seats = models.PositiveIntegerField(default=0, editable=False)
+    # Review stats, kept in step by record_rating() on every review change.
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.FloatField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+    image = models.ImageField(
+        upload_to="events/", storage=ContentAddressedStorage(), blank=True, null=True
+    )
+    # Resized copies of image, written by events.images. An empty digest
+    # means they have not been generated for the current image yet.
+    image_digest = models.CharField(max_length=64, blank=True, default="", editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, related_name="created_events"
@@ -45,8 +110,30 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Changed only by F() updates; an ordinary save of an instance loaded
+    # earlier must not write back a stale copy over a concurrent change.
+    COUNTER_FIELDS = (
+        "booked_seats", "rating_sum", "rating_count", "rating_average",
+        "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+    )
+
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         ordering = ["date", "time"]
+        indexes = [
+            # Listing pages walk these in keyset order (date, time, id) and
+            # filter is_active row by row; leading with the boolean would stop
+            # SQLite from using the index at all.
+            models.Index(fields=["date", "time"], name="event_date_time_idx"),
+            models.Index(fields=["category", "date", "time"], name="event_category_date_idx"),
+            models.Index(fields=["price"], name="event_price_idx"),
+            # "Top rated" sort, keyset order (-rating_average, -rating_count, id).
+            models.Index(
+                fields=["-rating_average", "-rating_count", "id"],
+                name="event_top_rated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -55,14 +142,36 @@ class Event(models.Model):
         if not self.slug:
             base_slug = slugify(self.title)
             self.slug = f"{base_slug}-{uuid.uuid4().hex[:6]}"
+        existing = not (self._state.adding or kwargs.get("force_insert"))
+        if existing and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     @property
     def available_slots(self):
-        booked = self.bookings.filter(
-            status__in=["confirmed", "pending"]
-        ).aggregate(total=models.Sum("number_of_guests"))["total"] or 0
-        return self.capacity - booked
+        return max(self.capacity - self.booked_seats, 0)
+
+    @property
+    def is_oversold(self):
+        return self.booked_seats > self.capacity
+
+    def reserve_seats(self, count):
+        """Atomically claim ``count`` seats. Returns False if the event is full."""
+        claimed = Event.objects.filter(
+            LessThanOrEqual(models.F("booked_seats") + count, models.F("capacity")),
+            pk=self.pk,
+        ).update(booked_seats=models.F("booked_seats") + count)
+        self.refresh_from_db(fields=["booked_seats"])
+        return bool(claimed)
+
+    def release_seats(self, count):
+        Event.objects.filter(pk=self.pk, booked_seats__gte=count).update(
+            booked_seats=models.F("booked_seats") - count
+        )
+        self.refresh_from_db(fields=["booked_seats"])
 
     @property
     def is_past(self):
@@ -71,12 +180,35 @@ class Event(models.Model):
 
     @property
     def average_rating(self):
-        avg = self.reviews.aggregate(avg=models.Avg("rating"))["avg"]
-        return round(avg, 1) if avg else 0
+        return round(self.rating_average, 1) if self.rating_count else 0
 
     @property
     def review_count(self):
-        return self.reviews.count()
+        return self.rating_count
+
+    @property
+    def rating_histogram(self):
+        """``(stars, count, percent)`` rows from five stars down to one."""
+        rows = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f"rating_{stars}")
+            percent = round(100 * count / self.rating_count) if self.rating_count else 0
+            rows.append((stars, count, percent))
+        return rows
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_catalogue(sender, **kwargs):
+    # Cached listings follow this.
+    transaction.on_commit(bump_catalogue_generation)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def sync_search_index(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.event_changed(pk))
 
 
 class Booking(models.Model):
@@ -85,6 +217,7 @@ class Booking(models.Model):
         ("confirmed", "Confirmed"),
         ("cancelled", "Cancelled"),
     ]
+    SEAT_HOLDING_STATUSES = ("pending", "confirmed")
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bookings")
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="bookings")
@@ -99,10 +232,46 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Eligibility checks in event_detail/add_review.
+            models.Index(fields=["user", "event", "status"], name="booking_user_event_idx"),
+            # booking_history keyset order on (-created_at, id).
+            models.Index(fields=["user", "-created_at"], name="booking_user_created_idx"),
+            # Seat recounts sum guests per event by status.
+            models.Index(fields=["event", "status"], name="booking_event_status_idx"),
+            # Recent bookings on the admin dashboard.
+            models.Index(fields=["-created_at"], name="booking_created_idx"),
+        ]
 
     def __str__(self):
         return f"Booking #{self.pk} - {self.user.username} - {self.event.title}"
 
+    def set_status(self, status):
+        """Change status, keeping ``event.booked_seats`` in step.
+
+        Call inside a transaction with the booking row locked
+        (``select_for_update``) so two requests cannot both move it.
+        """
+        held = self.status in self.SEAT_HOLDING_STATUSES
+        holds = status in self.SEAT_HOLDING_STATUSES
+        if held and not holds:
+            self.event.release_seats(self.number_of_guests)
+        elif holds and not held and not self.event.reserve_seats(self.number_of_guests):
+            # Re-activating a cancelled booking (e.g. a payment that lands
+            # after the user cancelled) when its seats have been resold. The
+            # money is taken, so the booking stands and the counter keeps the
+            # true number of seats held; staff find the event under the
+            # "oversold" admin filter.
+            Event.objects.filter(pk=self.event_id).update(
+                booked_seats=models.F("booked_seats") + self.number_of_guests
+            )
+            logger.error(
+                "Event %s is oversold: booking %s re-activated %s seat(s) past capacity",
+                self.event_id, self.pk, self.number_of_guests,
+            )
+        self.status = status
+        self.save(update_fields=["status", "updated_at"])
+
 
 class Payment(models.Model):
     STATUS_CHOICES = [
@@ -114,7 +283,11 @@ class Payment(models.Model):
     booking = models.OneToOneField(
         Booking, on_delete=models.CASCADE, related_name="payment"
     )
-    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True)
+    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True, unique=True)
+    # Amount (in paise) and creation time of the current Razorpay order, so
+    # checkout reloads can reuse it instead of creating another.
+    razorpay_order_amount = models.PositiveIntegerField(blank=True, null=True)
+    razorpay_order_created_at = models.DateTimeField(blank=True, null=True)
     razorpay_payment_id = models.CharField(max_length=100, blank=True, null=True)
     razorpay_signature = models.CharField(max_length=200, blank=True, null=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -122,9 +295,51 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # reconcile_payments walks pending payments in id order.
+            models.Index(fields=["status", "id"], name="payment_status_idx"),
+        ]
+
     def __str__(self):
         return f"Payment #{self.pk} - {self.status} - Rs.{self.amount}"
 
+    def mark_success(self, razorpay_payment_id, razorpay_signature=None):
+        """Record a captured payment and confirm its booking.
+
+        Call inside a transaction with the payment and booking rows locked.
+        Returns False (and changes nothing) if the payment already succeeded.
+        """
+        if self.status == "success":
+            return False
+        self.razorpay_payment_id = razorpay_payment_id
+        if razorpay_signature:
+            self.razorpay_signature = razorpay_signature
+        self.status = "success"
+        self.save(update_fields=[
+            "razorpay_payment_id", "razorpay_signature", "status", "updated_at",
+        ])
+        self.booking.set_status("confirmed")
+        record_revenue([self])
+        return True
+
+    def mark_failed(self):
+        """Record a failed attempt unless the payment already succeeded."""
+        if self.status != "pending":
+            return False
+        self.status = "failed"
+        self.save(update_fields=["status", "updated_at"])
+        return True
+
+    def has_reusable_order(self, amount_in_paise):
+        if not self.razorpay_order_id or self.razorpay_order_amount != amount_in_paise:
+            return False
+        ttl = datetime.timedelta(seconds=getattr(settings, "RAZORPAY_ORDER_TTL", 3600))
+        return (
+            self.razorpay_order_created_at is not None
+            and timezone.now() - self.razorpay_order_created_at < ttl
+        )
+
 
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="reviews")
@@ -139,11 +354,74 @@ class Review(models.Model):
     class Meta:
         unique_together = ("user", "event")
         ordering = ["-created_at"]
+        indexes = [
+            # Review pages on event_detail, keyset order (-created_at, -id).
+            models.Index(fields=["event", "-created_at", "-id"], name="review_event_recent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title} - {self.rating} stars"
 
 
+def rating_average_expression():
+    return models.Case(
+        models.When(rating_count=0, then=models.Value(0.0)),
+        default=Cast("rating_sum", models.FloatField()) / models.F("rating_count"),
+        output_field=models.FloatField(),
+    )
+
+
+def record_rating(event_id, added=None, removed=None):
+    """Add and/or remove one review rating from the event's stats."""
+    deltas = {}
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating:
+            for field, delta in (
+                ("rating_sum", sign * rating),
+                ("rating_count", sign),
+                (f"rating_{rating}", sign),
+            ):
+                deltas[field] = deltas.get(field, 0) + delta
+    changes = {field: models.F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    events = Event.objects.filter(pk=event_id)
+    events.update(**changes)
+    # A second statement: MySQL evaluates SET assignments left to right
+    # against the new values, other backends against the old ones.
+    events.update(rating_average=rating_average_expression())
+    # The catalogue generation is left alone: bumping it on every review
+    # would empty the result cache and search index for all filters. Cached
+    # "top rated" orderings catch up when their TTL expires.
+
+
+@receiver(pre_save, sender=Review)
+def remember_rating(sender, instance, **kwargs):
+    instance._saved_rating = (
+        Review.objects.filter(pk=instance.pk).values_list("event_id", "rating").first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Review)
+def count_rating(sender, instance, created, **kwargs):
+    saved = instance._saved_rating
+    if saved is None:
+        record_rating(instance.event_id, added=instance.rating)
+    elif saved == (instance.event_id, instance.rating):
+        return
+    elif saved[0] == instance.event_id:
+        record_rating(instance.event_id, added=instance.rating, removed=saved[1])
+    else:
+        record_rating(saved[0], removed=saved[1])
+        record_rating(instance.event_id, added=instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_rating(sender, instance, **kwargs):
+    record_rating(instance.event_id, removed=instance.rating)
+
+
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -173,3 +451,261 @@ class FAQ(models.Model):
 
     def __str__(self):
         return self.question
+
+
+class OutboxMessage(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("dead", "Dead"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class WebhookEvent(models.Model):
+    """Raw Razorpay webhook delivery, queued for the process_webhooks worker."""
+
+    event_id = models.CharField(max_length=100, unique=True)
+    signature = models.CharField(max_length=200)
+    body = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["processed_at", "id"], name="webhook_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"Webhook {self.event_id}"
+
+
+# ─── Dashboard Rollups ───────────────────────────────────────────────────────
+# Pre-aggregated counters read by admin_dashboard. They are bumped in the same
+# transaction as the change they count, except bookings, which are counted
+# once the booking commits so concurrent bookings do not queue on the day's
+# and category's row locks; `manage.py rebuild_rollups` recomputes them from
+# scratch (after bulk imports, which bypass signals).
+
+
+def _bump(model, lookup, deltas, **defaults):
+    values = {field: models.F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**values):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first.
+        model.objects.filter(**lookup).update(**values)
+
+
+class DailyStats(models.Model):
+    date = models.DateField(unique=True)
+    new_users = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name_plural = "Daily stats"
+
+    def __str__(self):
+        return f"{self.date}: {self.bookings} bookings, Rs.{self.revenue}"
+
+    @classmethod
+    def bump(cls, day, **deltas):
+        _bump(cls, {"date": day}, deltas)
+
+
+class CategoryStats(models.Model):
+    """Running totals per category; the ``category=None`` row holds
+    uncategorized events. Bookings and revenue stay with the category the
+    event had when they were made."""
+
+    # The category id, or 0 for the uncategorized row. NULLs do not collide
+    # in a unique index, so ``category`` alone would let two first bumps
+    # both create an uncategorized row.
+    key = models.PositiveIntegerField(unique=True)
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, null=True, blank=True, related_name="stats"
+    )
+    events = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "Category stats"
+
+    def __str__(self):
+        return f"{self.category or 'Uncategorized'}: {self.events} events"
+
+    @classmethod
+    def bump(cls, category_id, **deltas):
+        _bump(cls, {"key": category_id or 0}, deltas, category_id=category_id)
+
+
+def record_revenue(payments, sign=1):
+    """Add (or with ``sign=-1`` remove) successful ``payments`` to the rollups."""
+    by_day, by_category = {}, {}
+    for payment in payments:
+        day = timezone.localdate(payment.created_at)
+        category_id = payment.booking.event.category_id
+        by_day[day] = by_day.get(day, 0) + sign * payment.amount
+        by_category[category_id] = by_category.get(category_id, 0) + sign * payment.amount
+    for day, amount in by_day.items():
+        DailyStats.bump(day, revenue=amount)
+    for category_id, amount in by_category.items():
+        CategoryStats.bump(category_id, revenue=amount)
+
+
+# ─── Media Blobs ─────────────────────────────────────────────────────────────
+# One row per file in ContentAddressedStorage. refcount follows the model
+# fields pointing at the blob; `manage.py gc_media` repairs drift (bulk
+# updates bypass signals) and deletes blobs that are no longer referenced.
+
+class Blob(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last upload of this content; gc_media leaves recently touched blobs
+    # alone so a file is not deleted between its upload and the save of the
+    # row that references it.
+    touched_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+    @classmethod
+    def touch(cls, name, size):
+        now = timezone.now()
+        if cls.objects.filter(name=name).update(touched_at=now):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, size=size, touched_at=now)
+        except IntegrityError:
+            cls.objects.filter(name=name).update(touched_at=now)
+
+    @classmethod
+    def replace(cls, old_name, new_name):
+        """Move one reference from ``old_name`` to ``new_name``; either may be
+        empty. Files outside the blob store are not counted."""
+        old_name, new_name = old_name or "", new_name or ""
+        if old_name == new_name:
+            return
+        if new_name.startswith(BLOB_PREFIX):
+            cls.objects.filter(name=new_name).update(refcount=models.F("refcount") + 1)
+        if old_name.startswith(BLOB_PREFIX):
+            cls.objects.filter(name=old_name).update(refcount=models.F("refcount") - 1)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def count_user(sender, instance, created=None, **kwargs):
+    if created is False:
+        return
+    DailyStats.bump(timezone.localdate(instance.date_joined), new_users=1 if created else -1)
+
+
+@receiver(post_delete, sender=Booking)
+def release_deleted_booking(sender, instance, **kwargs):
+    # Covers deletes cascading from the user or event as well.
+    if instance.status in Booking.SEAT_HOLDING_STATUSES:
+        instance.event.release_seats(instance.number_of_guests)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def count_booking(sender, instance, created=None, **kwargs):
+    if created is False:
+        return
+    delta = 1 if created else -1
+    day = timezone.localdate(instance.created_at)
+    category_id = instance.event.category_id
+
+    def bump():
+        DailyStats.bump(day, bookings=delta)
+        CategoryStats.bump(category_id, bookings=delta)
+
+    transaction.on_commit(bump)
+
+
+@receiver(post_delete, sender=Payment)
+def uncount_payment(sender, instance, **kwargs):
+    if instance.status == "success":
+        record_revenue([instance], sign=-1)
+
+
+@receiver(pre_save, sender=Event)
+def remember_saved_event(sender, instance, **kwargs):
+    saved = (
+        Event.objects.filter(pk=instance.pk).values_list("category_id", "image").first()
+        if instance.pk else None
+    )
+    instance._saved_category_id = saved[0] if saved else None
+    instance._saved_image = (saved[1] or "") if saved else ""
+    # A new or replaced image needs its derivatives generated again.
+    if saved is None or (saved[1] or "") != (instance.image.name or ""):
+        instance.image_digest = ""
+        instance.image_variants = {}
+
+
+@receiver(post_save, sender=Event)
+def count_event(sender, instance, created, **kwargs):
+    if created:
+        CategoryStats.bump(instance.category_id, events=1)
+    elif instance._saved_category_id != instance.category_id:
+        CategoryStats.bump(instance._saved_category_id, events=-1)
+        CategoryStats.bump(instance.category_id, events=1)
+
+
+@receiver(post_delete, sender=Event)
+def uncount_event(sender, instance, **kwargs):
+    CategoryStats.bump(instance.category_id, events=-1)
+
+
+@receiver(post_save, sender=Event)
+def count_event_image(sender, instance, **kwargs):
+    Blob.replace(instance._saved_image, instance.image.name)
+
+
+@receiver(post_delete, sender=Event)
+def uncount_event_image(sender, instance, **kwargs):
+    Blob.replace(instance.image.name, None)
+
+
+@receiver(pre_delete, sender=Category)
+def fold_category_stats(sender, instance, **kwargs):
+    # The category's events become uncategorized; carry its totals over
+    # before its stats row is deleted with it.
+    stats = CategoryStats.objects.filter(category=instance).first()
+    if stats:
+        CategoryStats.bump(
+            None, events=stats.events, bookings=stats.bookings, revenue=stats.revenue
+        )
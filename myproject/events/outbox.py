@@ -0,0 +1,137 @@
+"""Transactional email outbox.
+
+Views call :func:`queue_mail` inside the transaction that creates the booking
+or user, so a message exists exactly when the change it describes commits.
+The ``send_outbox`` management command drains the table in batches.
+"""
+
+import datetime
+import random
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+# How long a claimed batch is hidden from other workers while it is sent.
+CLAIM_LEASE = datetime.timedelta(minutes=5)
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def booking_confirmation(booking):
+    """Unsaved confirmation email for ``booking``, for bulk queueing."""
+    return OutboxMessage(
+        subject=f"Booking Confirmed - {booking.event.title}",
+        body=(
+            f"Hi {booking.user.first_name},\n\n"
+            f"Your booking for '{booking.event.title}' has been confirmed!\n\n"
+            f"Booking Details:\n"
+            f"- Event: {booking.event.title}\n"
+            f"- Date: {booking.booking_date}\n"
+            f"- Guests: {booking.number_of_guests}\n"
+            f"- Total Amount: Rs.{booking.total_amount}\n\n"
+            f"Thank you for using EventManager!"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=[booking.user.email],
+    )
+
+
+def queue_booking_confirmation(booking):
+    booking_confirmation(booking).save()
+
+
+def retry_delay(attempts, base=30, cap=3600):
+    """Exponential backoff with jitter: ~30s, 60s, 120s ... capped at an hour."""
+    delay = min(base * 2 ** (attempts - 1), cap)
+    return datetime.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size):
+    """Lease up to ``batch_size`` due messages to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in batch]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return batch
+
+
+def _open(connection):
+    """Open ``connection``; returns the error instead of raising it."""
+    try:
+        connection.open()
+    except Exception as exc:
+        return exc
+    return None
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def send_batch(batch, max_attempts=5, connection=None):
+    """Send ``batch`` over one reused connection; returns (sent, failed, dead).
+
+    A send error may leave the connection unusable, so it is reopened before
+    the next message.
+    """
+    connection = connection or get_connection()
+    sent = failed = dead = 0
+    connection_error = _open(connection)
+
+    for message in batch:
+        message.attempts += 1
+        error = connection_error
+        if error is None:
+            try:
+                EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=message.from_email,
+                    to=message.recipients,
+                    connection=connection,
+                ).send()
+            except Exception as exc:
+                error = exc
+                _close(connection)
+                connection_error = _open(connection)
+        if error is None:
+            message.status = "sent"
+            message.sent_at = timezone.now()
+            message.last_error = ""
+            sent += 1
+        elif message.attempts >= max_attempts:
+            message.status = "dead"
+            message.last_error = repr(error)
+            dead += 1
+        else:
+            message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+            message.last_error = repr(error)
+            failed += 1
+
+    if connection_error is None:
+        _close(connection)
+    OutboxMessage.objects.bulk_update(
+        batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+    return sent, failed, dead
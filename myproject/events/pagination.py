@@ -0,0 +1,183 @@
+import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+CURSOR_SALT = "events.pagination"
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset.
+
+    Iterates like a list; ``next_cursor``/``previous_cursor`` are opaque tokens
+    for the ``after``/``before`` query parameters (``None`` at either end).
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _parse_ordering(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(model, name, raw):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Annotations (e.g. a search rank) round-trip as plain JSON values.
+        return raw
+    return field.to_python(raw)
+
+
+def encode_cursor(obj, ordering):
+    return encode_key([getattr(obj, name) for name, _ in _parse_ordering(ordering)])
+
+
+def encode_key(values):
+    return signing.dumps(
+        [_encode_value(value) for value in values], salt=CURSOR_SALT, compress=True
+    )
+
+
+def decode_cursor(token, model, ordering):
+    """Return the key values stored in ``token``, or None if it is invalid."""
+    fields = _parse_ordering(ordering)
+    try:
+        values = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    try:
+        return [
+            _decode_value(model, name, raw) for (name, _), raw in zip(fields, values)
+        ]
+    except Exception:
+        return None
+
+
+def _keyset_filter(fields, values, forward):
+    """Build ``(a, b, c) > (x, y, z)`` as an OR of prefix-equality terms.
+
+    Spelled out rather than as a row-value comparison so that mixed
+    ascending/descending orderings work and every backend can use the
+    composite index for the leading column.
+    """
+    condition = Q()
+    for i, (name, descending) in enumerate(fields):
+        term = Q(**{prefix: values[j] for j, (prefix, _) in enumerate(fields[:i])})
+        lookup = "lt" if descending == forward else "gt"
+        term &= Q(**{f"{name}__{lookup}": values[i]})
+        condition |= term
+    return condition
+
+
+def paginate_keyset(queryset, ordering, after=None, before=None, per_page=12):
+    """Slice ``queryset`` into a :class:`KeysetPage` ordered by ``ordering``.
+
+    ``ordering`` must end in a unique column (normally ``id``) so every row has
+    a distinct key. Pages are fetched with ``WHERE key > cursor LIMIT n+1``;
+    no OFFSET or COUNT(*) is ever issued, and rows inserted concurrently never
+    shift the page boundaries.
+    """
+    fields = _parse_ordering(ordering)
+    model = queryset.model
+    forward = True
+    values = None
+    if after:
+        values = decode_cursor(after, model, ordering)
+    elif before:
+        values = decode_cursor(before, model, ordering)
+        forward = values is None
+
+    if forward:
+        queryset = queryset.order_by(*ordering)
+    else:
+        queryset = queryset.order_by(
+            *[name if desc else f"-{name}" for name, desc in fields]
+        )
+    if values is not None:
+        queryset = queryset.filter(_keyset_filter(fields, values, forward))
+
+    rows = list(queryset[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if has_more or not forward:
+            next_cursor = encode_cursor(rows[-1], ordering)
+        if (forward and values is not None) or (not forward and has_more):
+            previous_cursor = encode_cursor(rows[0], ordering)
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_keys(queryset, keys, ordering, after=None, before=None, per_page=12):
+    """Like :func:`paginate_keyset`, but over a precomputed, ordered list of
+    sort-key tuples (whose last element is the primary key).
+
+    Only the rows on the page are fetched, by primary key, from ``queryset``.
+    Cursors are interchangeable with those of :func:`paginate_keyset`.
+    Returns None if the cursor's row is not in ``keys``.
+    """
+    start, end = 0, per_page
+    cursor = after or before
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        if values is not None:
+            position = next(
+                (i for i, key in enumerate(keys) if key[-1] == values[-1]), None
+            )
+            if position is None:
+                return None
+            if after:
+                start, end = position + 1, position + 1 + per_page
+            else:
+                start, end = max(position - per_page, 0), position
+    page_keys = keys[start:end]
+    objects = queryset.in_bulk([key[-1] for key in page_keys])
+    rows = [objects[key[-1]] for key in page_keys if key[-1] in objects]
+
+    next_cursor = previous_cursor = None
+    if page_keys:
+        if end < len(keys):
+            next_cursor = encode_key(page_keys[-1])
+        if start > 0:
+            previous_cursor = encode_key(page_keys[0])
+    return KeysetPage(rows, next_cursor, previous_cursor)
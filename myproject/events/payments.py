@@ -0,0 +1,187 @@
+"""Process-wide Razorpay gateway adapter.
+
+One ``RazorpayGateway`` is shared by every request in the process
+(:func:`get_gateway`). It keeps a pooled keep-alive ``requests.Session``,
+applies connect/read timeouts and transport-level retries to every call,
+stops calling Razorpay for a cool-down period after repeated failures
+(circuit breaker) and records per-operation latency in the
+``razorpay_gateway_*`` series of :mod:`monitoring.metrics`, which
+``/monitoring/metrics/`` exports.
+"""
+
+import threading
+import time
+
+import razorpay
+import requests
+from django.conf import settings
+from razorpay.errors import (
+    BadRequestError,
+    GatewayError,
+    ServerError,
+    SignatureVerificationError,
+)
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from monitoring import metrics
+
+
+class PaymentGatewayError(Exception):
+    """Razorpay could not be reached or rejected the request."""
+
+
+class GatewayUnavailable(PaymentGatewayError):
+    """The circuit breaker is open; Razorpay was not called."""
+
+
+class _TimeoutSession(requests.Session):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures, then let a single
+    trial call through once ``reset_timeout`` seconds have passed."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # Re-arm the timer so only one trial call goes out at a time.
+                self.opened_at = time.monotonic()
+            return state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RazorpayGateway:
+    def __init__(
+        self,
+        key_id,
+        key_secret,
+        base_url=None,
+        timeout=(3.05, 10),
+        pool_size=10,
+        failure_threshold=5,
+        reset_timeout=30.0,
+    ):
+        session = _TimeoutSession(timeout)
+        retries = Retry(
+            total=2,
+            connect=2,
+            read=1,
+            status=2,
+            status_forcelist=(502, 503, 504),
+            # Never replay a POST that may have reached Razorpay.
+            allowed_methods=frozenset({"GET"}),
+            backoff_factor=0.2,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retries
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        options = {"base_url": base_url} if base_url else {}
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret), **options)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def _call(self, operation, func, *args):
+        if not self.breaker.allow():
+            metrics.GATEWAY_SHORT_CIRCUITS.inc(operation)
+            raise GatewayUnavailable("Payment gateway temporarily unavailable")
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except (requests.RequestException, ServerError) as exc:
+            self.breaker.record_failure()
+            metrics.GATEWAY_SECONDS.observe(time.perf_counter() - start, operation, "error")
+            raise PaymentGatewayError(str(exc)) from exc
+        except (BadRequestError, GatewayError) as exc:
+            # Razorpay answered; the request itself was bad. Not an outage.
+            self.breaker.record_success()
+            metrics.GATEWAY_SECONDS.observe(time.perf_counter() - start, operation, "error")
+            raise PaymentGatewayError(str(exc)) from exc
+        self.breaker.record_success()
+        metrics.GATEWAY_SECONDS.observe(time.perf_counter() - start, operation, "ok")
+        return result
+
+    def create_order(self, amount, currency="INR", receipt=None):
+        data = {"amount": amount, "currency": currency, "payment_capture": "1"}
+        if receipt:
+            data["receipt"] = receipt
+        return self._call("order.create", self.client.order.create, data)
+
+    def fetch_order(self, order_id):
+        return self._call("order.fetch", self.client.order.fetch, order_id)
+
+    def fetch_order_payments(self, order_id):
+        return self._call("order.payments", self.client.order.payments, order_id)
+
+    def verify_payment_signature(self, params):
+        """Return True if the checkout callback parameters are authentic."""
+        try:
+            self.client.utility.verify_payment_signature(params)
+        except SignatureVerificationError:
+            return False
+        return True
+
+    def verify_webhook_signature(self, body, signature, secret):
+        """Return True if ``body`` (the raw webhook payload) was signed with ``secret``."""
+        if not (secret and signature):
+            return False
+        try:
+            self.client.utility.verify_webhook_signature(body, signature, secret)
+        except SignatureVerificationError:
+            return False
+        return True
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = RazorpayGateway(
+                    settings.RAZORPAY_KEY_ID,
+                    settings.RAZORPAY_KEY_SECRET,
+                    base_url=getattr(settings, "RAZORPAY_BASE_URL", None),
+                    timeout=getattr(settings, "RAZORPAY_TIMEOUT", (3.05, 10)),
+                )
+    return _gateway
+
@@ -0,0 +1,160 @@
+"""Minimal in-memory stand-in for the Razorpay orders API.
+
+Used for offline development and load tests: point ``RAZORPAY_BASE_URL`` at
+it (see the ``razorpay_stub`` command). Besides the real endpoints it serves,
+``POST /stub/orders/<id>/pay`` simulates a customer paying an order and
+returns the signed parameters Razorpay would post to ``payment_callback``.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, key_secret, latency=0.0, failure_rate=0.0):
+        self.key_secret = key_secret
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.orders = {}
+        self.payments = {}  # order id -> [payment, ...]
+        self.lock = threading.Lock()
+
+    def create_order(self, data):
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": int(data.get("amount", 0)),
+            "amount_paid": 0,
+            "amount_due": int(data.get("amount", 0)),
+            "currency": data.get("currency", "INR"),
+            "receipt": data.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "created_at": int(time.time()),
+        }
+        with self.lock:
+            self.orders[order["id"]] = order
+            self.payments[order["id"]] = []
+        return order
+
+    def pay(self, order_id, status="captured"):
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                return None
+            payment = {
+                "id": f"pay_{uuid.uuid4().hex[:14]}",
+                "entity": "payment",
+                "amount": order["amount"],
+                "currency": order["currency"],
+                "status": status,
+                "order_id": order_id,
+                "created_at": int(time.time()),
+            }
+            self.payments[order_id].append(payment)
+            order["attempts"] += 1
+            if status == "captured":
+                order.update(status="paid", amount_paid=order["amount"], amount_due=0)
+            else:
+                order["status"] = "attempted"
+        signature = hmac.new(
+            self.key_secret.encode(),
+            f"{order_id}|{payment['id']}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment["id"],
+            "razorpay_signature": signature,
+        }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls on delayed ACKs (~40ms).
+    disable_nagle_algorithm = True
+    state = None  # set on the subclass built by make_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, code, description):
+        self._send(status, {"error": {"code": code, "description": description}})
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _before(self):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.state.failure_rate and random.random() < self.state.failure_rate:
+            self._error(503, "SERVER_ERROR", "Simulated outage")
+            return False
+        if not self.path.startswith("/stub/") and not self.headers.get("Authorization"):
+            self._error(401, "BAD_REQUEST_ERROR", "Authentication failed")
+            return False
+        return True
+
+    def do_POST(self):
+        data = self._read_json()
+        if not self._before():
+            return
+        if self.path == "/v1/orders":
+            if int(data.get("amount") or 0) < 100:
+                return self._error(400, "BAD_REQUEST_ERROR", "Order amount less than minimum amount allowed")
+            return self._send(200, self.state.create_order(data))
+        match = re.fullmatch(r"/stub/orders/([\w]+)/pay", self.path)
+        if match:
+            result = self.state.pay(match.group(1), data.get("status", "captured"))
+            if result is None:
+                return self._error(404, "BAD_REQUEST_ERROR", "The id provided does not exist")
+            return self._send(200, result)
+        self._error(404, "BAD_REQUEST_ERROR", "The requested URL was not found on the server.")
+
+    def do_GET(self):
+        if not self._before():
+            return
+        match = re.fullmatch(r"/v1/orders/([\w]+)(/payments)?", self.path.split("?")[0])
+        if match:
+            order_id, payments = match.groups()
+            with self.state.lock:
+                order = self.state.orders.get(order_id)
+                items = list(self.state.payments.get(order_id, []))
+            if order is None:
+                return self._error(400, "BAD_REQUEST_ERROR", "The id provided does not exist")
+            if payments:
+                return self._send(200, {"entity": "collection", "count": len(items), "items": items})
+            return self._send(200, order)
+        self._error(404, "BAD_REQUEST_ERROR", "The requested URL was not found on the server.")
+
+
+def make_server(host="127.0.0.1", port=0, key_secret="", latency=0.0, failure_rate=0.0):
+    """Build (but do not start) a stub server; ``port=0`` picks a free port."""
+    state = StubState(key_secret, latency, failure_rate)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
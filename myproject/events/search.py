@@ -0,0 +1,288 @@
+"""Full-text search over events for the ``q`` parameter of ``event_list``.
+
+Two backends share one interface:
+
+* ``backend.rank(queryset, query)`` returns ``[(search_rank, pk), ...]`` for
+  the best ``MAX_RESULTS`` matches among ``queryset``, best first, ready for
+  ``paginate_keys``. ``queryset`` carries the other listing filters, so they
+  apply before the cut rather than after it.
+* ``backend.search(queryset, query)`` narrows ``queryset`` to matching events,
+  for listings ordered by something other than relevance. With
+  ``InvertedIndexBackend`` these are the same ``MAX_RESULTS`` best matches,
+  so ``q`` with ``sort=top_rated`` orders at most that many events.
+
+``MySQLFulltextBackend`` uses the FULLTEXT index added in migration 0003.
+``InvertedIndexBackend`` is a pure-Python BM25 index of the active events for
+other databases. Each process builds its own copy on first use and then keeps
+it in step incrementally: every committed ``Event`` save or delete appends the
+event's pk to a short change log in ``CACHES["default"]`` (see
+:func:`event_changed`), and each search first re-reads the events logged
+since the index was last brought up to date. The index is only rebuilt when
+it has fallen further behind than the log reaches. With several workers this
+needs a shared ``CACHES["default"]`` (the ``events.W001`` check).
+
+``settings.EVENT_SEARCH_BACKEND`` may name a backend class explicitly;
+otherwise the backend is picked from the database vendor.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+MAX_RESULTS = 500
+# Ranked matches checked against the listing filters per query.
+FILTER_CHUNK = 500
+
+VERSION_KEY = "events:search:version"
+CHANGE_KEY = "events:search:change:{}"
+# An index further behind than this many changes is rebuilt instead.
+MAX_REPLAY = 1000
+CHANGE_TIMEOUT = 3600
+
+# Relative weight of each indexed field, applied as a term-frequency boost.
+FIELD_WEIGHTS = {"title": 3, "location": 2, "description": 1}
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that "
+    "the this to was were will with".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(word):
+    """Strip common English suffixes (a reduced Porter step 1)."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and not word.endswith("us"):
+        word = word[:-1]
+    for suffix in ("ingly", "edly", "ing", "ed", "ly", "ment", "ness"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            # "planned" -> "plann" -> "plan"
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    return word
+
+
+def tokenize(text):
+    return [
+        stem(token)
+        for token in _TOKEN_RE.findall((text or "").lower())
+        if token not in STOP_WORDS
+    ]
+
+
+class InvertedIndex:
+    """In-memory inverted index with Okapi BM25 ranking."""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = defaultdict(dict)  # term -> {doc_id: weighted tf}
+        self.doc_terms = {}  # doc_id -> Counter of terms, for removal
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, fields):
+        """Index (or re-index) ``doc_id`` from a ``{field_name: text}`` dict."""
+        terms = Counter()
+        for name, text in fields.items():
+            weight = FIELD_WEIGHTS.get(name, 1)
+            for token in tokenize(text):
+                terms[token] += weight
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in terms.items():
+                self.postings[term][doc_id] = tf
+            self.doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings[term]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query, limit=MAX_RESULTS, candidates=None):
+        """Return ``[(doc_id, score), ...]`` best first, at most ``limit`` long
+        (all matches when ``limit`` is None).
+
+        With ``candidates``, documents outside that set are not scored.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self.doc_lengths)
+            if not n or not terms:
+                return []
+            avg_length = self.total_length / n
+            scores = defaultdict(float)
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(doc_id, round(score, 6)) for doc_id, score in ranked[:limit]]
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def event_changed(pk):
+    """Log a committed change to event ``pk`` for every process's index."""
+    if not isinstance(get_search_backend(), InvertedIndexBackend):
+        return
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        # No log to replay from: every index rebuilds on its next search.
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+        return
+    cache.set(CHANGE_KEY.format(version), pk, timeout=CHANGE_TIMEOUT)
+
+
+class InvertedIndexBackend:
+    def __init__(self):
+        self.index = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def _get_index(self):
+        version = get_version()
+        if self.index is None or self.version != version:
+            # One request catches up; others keep using the index as it is
+            # meanwhile unless there is none yet.
+            if self._lock.acquire(blocking=self.index is None):
+                try:
+                    self._catch_up(version)
+                finally:
+                    self._lock.release()
+        return self.index
+
+    def _catch_up(self, version):
+        if self.index is not None:
+            behind = version - self.version
+            if behind == 0:  # another request got here first
+                return
+            if 0 < behind <= MAX_REPLAY:
+                keys = [CHANGE_KEY.format(v) for v in range(self.version + 1, version + 1)]
+                changes = cache.get_many(keys)
+                if len(changes) == len(keys):
+                    self.refresh(self.index, set(changes.values()))
+                    self.version = version
+                    return
+        # First use, or the log no longer covers the gap.
+        self.index = self.build()
+        self.version = version
+
+    def _rows(self, events):
+        rows = events.filter(is_active=True).values_list("pk", *FIELD_WEIGHTS).order_by()
+        for pk, *values in rows.iterator(chunk_size=2000):
+            yield pk, dict(zip(FIELD_WEIGHTS, values))
+
+    def build(self):
+        from .models import Event
+
+        index = InvertedIndex()
+        for pk, fields in self._rows(Event.objects.all()):
+            index.add(pk, fields)
+        return index
+
+    def refresh(self, index, pks):
+        """Re-read ``pks`` into ``index``; deleted or inactive ones drop out."""
+        from .models import Event
+
+        found = set()
+        for pk, fields in self._rows(Event.objects.filter(pk__in=pks)):
+            index.add(pk, fields)
+            found.add(pk)
+        for pk in pks - found:
+            index.remove(pk)
+
+    def rank(self, queryset, query):
+        # Walk the matches best first, checking them against the listing
+        # filters a chunk at a time, until MAX_RESULTS pass.
+        ranked = self._get_index().search(query, limit=None)
+        results = []
+        for start in range(0, len(ranked), FILTER_CHUNK):
+            chunk = ranked[start:start + FILTER_CHUNK]
+            allowed = set(
+                queryset.filter(pk__in=[pk for pk, _ in chunk]).values_list("pk", flat=True)
+            )
+            results.extend((score, pk) for pk, score in chunk if pk in allowed)
+            if len(results) >= MAX_RESULTS:
+                break
+        return results[:MAX_RESULTS]
+
+    def search(self, queryset, query):
+        return queryset.filter(pk__in=[pk for _, pk in self.rank(queryset, query)])
+
+
+class MySQLFulltextBackend:
+    def rank(self, queryset, query):
+        ranked = self.search(queryset, query).order_by("-search_rank", "pk")
+        return list(ranked.values_list("search_rank", "pk")[:MAX_RESULTS])
+
+    def search(self, queryset, query):
+        qn = connection.ops.quote_name
+        table = qn(queryset.model._meta.db_table)
+        columns = ", ".join(f"{table}.{qn(name)}" for name in FIELD_WEIGHTS)
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"MATCH ({columns}) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+                (query,),
+                output_field=FloatField(),
+            )
+        ).filter(search_rank__gt=0)
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, "EVENT_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == "mysql":
+        return MySQLFulltextBackend()
+    return InvertedIndexBackend()
@@ -0,0 +1,53 @@
+"""Content-addressed storage for uploaded media.
+
+``ContentAddressedStorage`` names every upload after the SHA-256 of its bytes
+(``blobs/ab/abcdef....jpg``), whatever the original filename, so a re-upload
+or an identical picture reuses the stored file instead of adding a copy. A
+name never changes content, so blobs (and the ``derivatives/`` made from
+them) can be served with far-future, immutable cache headers.
+
+Each blob has a ``Blob`` row whose ``refcount`` the model signals keep in
+step with the ``Event.image`` and ``UserProfile.profile_picture`` values that
+point at it; ``manage.py gc_media`` re-checks the counts against the tables
+and deletes blobs nothing references any more.
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = "blobs/"
+# Paths under MEDIA_URL whose content never changes for a given name.
+IMMUTABLE_PREFIXES = (BLOB_PREFIX, "derivatives/")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def blob_name(digest, extension):
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest}{extension.lower()}"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        """Store ``content`` under its digest; the upload's ``name`` only
+        contributes its extension."""
+        from .models import Blob
+
+        sha = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+        content.seek(0)
+        name = blob_name(sha.hexdigest(), os.path.splitext(name)[1])
+        # Recorded (and its grace period restarted) before the file is
+        # written, so gc_media never deletes a blob that is being uploaded.
+        Blob.touch(name, content.size)
+        if self.exists(name):
+            return name
+        saved = super()._save(name, content)
+        if saved != name:
+            # Another upload of the same content won the race.
+            super().delete(saved)
+        return name
@@ -0,0 +1,63 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.html import format_html
+
+from events.images import FORMATS, WIDTHS, derivative_name
+
+register = template.Library()
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+# Width of the plain ``src`` for browsers that ignore ``srcset``.
+FALLBACK_WIDTH = 640
+
+
+def _srcsets(event):
+    """``{format: [(url, width), ...]}`` for the event's image."""
+    if not event.image_digest:
+        # Not generated yet: the first browser to ask triggers generation.
+        return {
+            fmt: [
+                (reverse("events:event_image", args=[event.slug, width, fmt]), width)
+                for width in WIDTHS
+            ]
+            for fmt in FORMATS
+        }
+    return {
+        fmt: [
+            (default_storage.url(derivative_name(event.image_digest, width, fmt)), width)
+            for width in widths
+        ]
+        for fmt, widths in event.image_variants.items()
+    }
+
+
+@register.simple_tag
+def event_image(event, sizes="100vw", css_class="", style="", loading="lazy"):
+    """``<picture>`` with WebP and JPEG ``srcset``s for ``event.image``.
+
+    ``sizes`` should describe how wide the image is laid out so the browser
+    can pick the smallest file that is sharp enough.
+    """
+    srcsets = _srcsets(event)
+    jpeg = srcsets.get("jpeg")
+    if not jpeg:
+        # Pillow could not read the upload; serve it as it is.
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="{}" decoding="async">',
+            event.image.url, event.title, css_class, style, loading,
+        )
+
+    def srcset(candidates):
+        return ", ".join(f"{url} {width}w" for url, width in candidates)
+
+    fallback = next((url for url, width in jpeg if width >= FALLBACK_WIDTH), jpeg[-1][0])
+    sources = format_html(
+        '<source type="{}" srcset="{}" sizes="{}">',
+        CONTENT_TYPES["webp"], srcset(srcsets["webp"]), sizes,
+    ) if "webp" in srcsets else ""
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" '
+        'loading="{}" decoding="async"></picture>',
+        sources, fallback, srcset(jpeg), sizes, event.title, css_class, style, loading,
+    )
@@ -0,0 +1,136 @@
+"""Fixtures and assertions shared by the events and accounts test suites."""
+
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from .listing_cache import result_cache
+from .models import Booking, Category, Event, Payment, Review
+
+PASSWORD = "bench-pass-123"
+
+
+def seed_catalogue(n_events, n_users=10):
+    """Create a deterministic catalogue of ``n_events`` events with bookings,
+    payments and reviews spread across ``n_users`` users."""
+    categories = [
+        Category.objects.create(name=name, slug=name.lower())
+        for name in ("Wedding", "Birthday", "Festival")
+    ]
+    users = [
+        User.objects.create_user(f"user{i}", f"user{i}@example.com", PASSWORD)
+        for i in range(n_users)
+    ]
+    start = datetime.date.today() + datetime.timedelta(days=30)
+    events = Event.objects.bulk_create([
+        Event(
+            title=f"Event {i}",
+            slug=f"event-{i}",
+            description=f"Description for event {i}",
+            category=categories[i % len(categories)],
+            location=("Mumbai", "Delhi", "Pune")[i % 3],
+            date=start + datetime.timedelta(days=i % 60),
+            time=datetime.time(9 + i % 10),
+            price=Decimal(500 * (i % 25)),
+            capacity=100,
+            is_active=i % 5 != 0,
+        )
+        for i in range(n_events)
+    ])
+    bookings = Booking.objects.bulk_create([
+        Booking(
+            user=users[i % n_users],
+            event=events[i % n_events],
+            number_of_guests=1 + i % 3,
+            booking_date=events[i % n_events].date,
+            total_amount=events[i % n_events].price,
+            status=("confirmed", "pending", "cancelled")[i % 3],
+        )
+        for i in range(n_events * 2)
+    ])
+    Payment.objects.bulk_create([
+        Payment(
+            booking=booking,
+            amount=booking.total_amount,
+            razorpay_order_id=f"order_{booking.pk}",
+            status="success",
+        )
+        for booking in bookings
+        if booking.status == "confirmed"
+    ])
+    seen = set()
+    reviews = []
+    for booking in bookings:
+        key = (booking.user_id, booking.event_id)
+        if booking.status == "confirmed" and key not in seen:
+            seen.add(key)
+            reviews.append(Review(
+                user=booking.user, event=booking.event,
+                rating=1 + booking.pk % 5, comment="Great",
+            ))
+    Review.objects.bulk_create(reviews)
+    return users, events
+
+
+def create_event(category=None, **fields):
+    """One upcoming, active event; ``fields`` override the defaults."""
+    values = {
+        "title": "Concert",
+        "description": "-",
+        "category": category,
+        "location": "Pune",
+        "date": datetime.date.today() + datetime.timedelta(days=10),
+        "time": datetime.time(18),
+        "price": Decimal(100),
+        "capacity": 10,
+    }
+    values.update(fields)
+    return Event.objects.create(**values)
+
+
+def create_booking(user, event, guests=1, status="pending", **fields):
+    """A booking whose seats are held the way ``booking_create`` holds them."""
+    if status in Booking.SEAT_HOLDING_STATUSES:
+        assert event.reserve_seats(guests), "event is full"
+    return Booking.objects.create(
+        user=user, event=event, number_of_guests=guests, booking_date=event.date,
+        total_amount=event.price * guests, status=status, **fields,
+    )
+
+
+class QueryBudgetMixin:
+    """Every view must issue the same number of queries whatever the data
+    volume; subclasses run identical checks at two catalogue sizes, so an
+    N+1 fails at least one of them."""
+
+    n_events = None
+
+    def setUp(self):
+        self.clear_caches()
+        # Budgets cover the views; keep monitoring's own writes out of them.
+        monitoring = self.settings(
+            MONITORING_QUERY_STATS_INTERVAL=None, MONITORING_SLOW_QUERY_MS=None
+        )
+        monitoring.enable()
+        self.addCleanup(monitoring.disable)
+
+    @staticmethod
+    def clear_caches():
+        cache.clear()
+        result_cache.clear()
+
+    def assertQueryBudget(self, url, budget):
+        # The first request warms the category and listing caches.
+        self.assertLess(self.client.get(url).status_code, 400, url)
+        with self.assertNumQueries(budget, msg=url):
+            self.client.get(url)
+
+    def assertColdQueryBudget(self, url, budget):
+        """Like ``assertQueryBudget`` but for a request that finds every
+        cache empty, as the first one after a deploy or catalogue change."""
+        self.clear_caches()
+        with self.assertNumQueries(budget, msg=url):
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, url)
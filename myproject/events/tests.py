@@ -1,3 +1,1262 @@
-from django.test import TestCase
+import datetime
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import smtplib
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import QueryDict
+from django.template import Context, Template
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from monitoring import metrics
+
+from . import search, webhooks
+from .images import derivative_name
+from .listing_cache import (
+    TOO_BROAD, ResultCache, bump_generation, get_generation, normalize_filters, result_cache,
+)
+from .models import (
+    Blob, Booking, Category, CategoryStats, DailyStats, Event, OutboxMessage, Payment, Review, WebhookEvent,
+)
+from .outbox import CLAIM_LEASE, claim_batch, queue_booking_confirmation, queue_mail, send_batch
+from .payments import GatewayUnavailable, PaymentGatewayError, RazorpayGateway
+from .razorpay_stub import make_server
+from .search import InvertedIndex, stem, tokenize
+from .testing import PASSWORD, QueryBudgetMixin, create_booking, create_event, seed_catalogue
+from .views import serve_media
+
+
+class ExplainMixin:
+    """Run each view through the test client and EXPLAIN the SQL it issued."""
+
+    # Lookup tables small enough that scanning them is the right plan.
+    ALWAYS_SCANNED = {"events_category", "events_faq"}
+    # Largest LIMIT for which an index walk in ORDER BY order counts as a seek.
+    MAX_WALK_LIMIT = 100
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                return [row[-1] for row in cursor.fetchall()]
+            cursor.execute(f"EXPLAIN {sql}")
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def full_scans(self, plan, sql):
+        """Return the tables a plan reads without an index seek.
+
+        Walking a whole index (SQLite ``SCAN t USING INDEX``, MySQL
+        ``type=index``) counts as well as a bare table scan, unless the
+        index supplies the ORDER BY of a query with a small LIMIT: then the
+        walk stops after one page.
+        """
+        limit = re.search(r"\bLIMIT (\d+)", sql)
+        top_n = limit is not None and int(limit.group(1)) <= self.MAX_WALK_LIMIT
+        if connection.vendor == "sqlite":
+            sorted_in_temp = any("TEMP B-TREE FOR ORDER BY" in line for line in plan)
+            scans = []
+            for line in plan:
+                match = re.match(r"SCAN (\w+)( USING (?:COVERING )?INDEX)?", line)
+                if match and not (match.group(2) and top_n and not sorted_in_temp):
+                    scans.append(match.group(1))
+            return scans
+        return [
+            row["table"]
+            for row in plan
+            if row.get("type") == "ALL"
+            or (row.get("type") == "index" and not (top_n and "filesort" not in (row.get("Extra") or "")))
+        ]
+
+    def assertNoFullScans(self, url, allowed=()):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, url)
+        allowed = self.ALWAYS_SCANNED | set(allowed)
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            plan = self.explain(sql)
+            scanned = [table for table in self.full_scans(plan, sql) if table not in allowed]
+            self.assertFalse(
+                scanned,
+                f"{url} scans {scanned} in full:\n{sql}\nPlan: {plan}",
+            )
+
+
+class IndexUsageTests(ExplainMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, cls.events = seed_catalogue(300)
+        cls.staff = User.objects.create_user(
+            "staff", "staff@example.com", PASSWORD, is_staff=True
+        )
+        cls.event = Event.objects.filter(is_active=True).first()
+        cls.booking = Booking.objects.filter(user=cls.users[0]).first()
+        # Give the planner real statistics, as a long-lived database has.
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute("ANALYZE TABLE events_event, events_booking, events_review")
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+
+    def setUp(self):
+        # Cached categories would outlive the rolled-back test transaction.
+        cache.clear()
+
+    def test_public_pages(self):
+        self.assertNoFullScans(reverse("events:home"))
+        self.assertNoFullScans(reverse("events:event_detail", args=[self.event.slug]))
+        self.assertNoFullScans(
+            reverse("events:events_by_category", args=[self.event.category.slug])
+        )
+        self.assertNoFullScans(reverse("events:faq"))
+
+    def test_event_list_filters(self):
+        url = reverse("events:event_list")
+        self.assertNoFullScans(url)
+        self.assertNoFullScans(f"{url}?category={self.event.category.slug}")
+        self.assertNoFullScans(f"{url}?date={self.event.date.isoformat()}")
+        # A substring match cannot use a B-tree index. The walk runs once per
+        # location and catalogue generation; the result cache serves the rest.
+        self.assertNoFullScans(f"{url}?location=Pune", allowed={"events_event"})
+        self.assertNoFullScans(f"{url}?sort=top_rated")
+        for price_range in ("0-1000", "1000-5000", "5000-10000", "10000+"):
+            self.assertNoFullScans(f"{url}?price_range={price_range}")
+
+    def test_event_list_next_page(self):
+        url = reverse("events:event_list")
+        page = self.client.get(url).context["page"]
+        self.assertTrue(page.has_next)
+        self.assertNoFullScans(f"{url}?after={page.next_cursor}")
+
+    def test_member_pages(self):
+        self.client.login(username=self.users[0].username, password=PASSWORD)
+        self.assertNoFullScans(reverse("events:booking_history"))
+        self.assertNoFullScans(reverse("events:event_detail", args=[self.event.slug]))
+        self.assertNoFullScans(reverse("events:booking_create", args=[self.event.slug]))
+        self.assertNoFullScans(reverse("events:add_review", args=[self.booking.event.slug]))
+        self.assertNoFullScans(reverse("events:booking_detail", args=[self.booking.pk]))
+
+    def test_admin_dashboard(self):
+        self.client.login(username="staff", password=PASSWORD)
+        # Rollup tables are read whole: one row per category, and one per
+        # day for the user total.
+        self.assertNoFullScans(
+            reverse("events:admin_dashboard"),
+            allowed={"events_categorystats", "events_dailystats"},
+        )
+
+
+class EventQueryBudgetMixin(QueryBudgetMixin):
+    # Queries per request once the category list is cached. Logged-in pages
+    # include the session and user lookups.
+    PUBLIC_BUDGETS = {
+        "home": 1,
+        "event_list": 1,
+        "event_list_search": 1,
+        "event_list_top_rated": 1,
+        "event_list_next_page": 1,
+        "events_by_category": 1,
+        "event_detail": 2,
+        "event_reviews": 2,
+        "faq": 1,
+        "about": 0,
+        "contact": 0,
+    }
+    # event_list requests that find the listing and category caches empty.
+    COLD_BUDGETS = {
+        "event_list": 2,
+        "event_list_filtered": 3,
+        # Includes building the search index (the caches are cleared).
+        "event_list_search": 4,
+        "event_list_top_rated": 2,
+    }
+    MEMBER_BUDGETS = {
+        "booking_history": 3,
+        "booking_detail": 4,
+        "booking_create": 3,
+        "event_detail": 4,
+        "add_review": 3,
+    }
+    STAFF_BUDGETS = {
+        "admin_dashboard": 7,
+        "event_create": 3,
+        "event_edit": 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, cls.events = seed_catalogue(cls.n_events)
+        cls.staff = User.objects.create_user(
+            "staff", "staff@example.com", PASSWORD, is_staff=True
+        )
+        cls.event = Event.objects.filter(is_active=True).first()
+        cls.booking = Booking.objects.filter(user=cls.users[0], status="confirmed").first()
+
+    def test_public_pages(self):
+        event_list = reverse("events:event_list")
+        next_page = self.client.get(event_list).context["page"].next_cursor
+        urls = {
+            "home": reverse("events:home"),
+            "event_list": event_list,
+            "event_list_search": f"{event_list}?q=event",
+            "event_list_top_rated": f"{event_list}?sort=top_rated",
+            "event_list_next_page": f"{event_list}?after={next_page}",
+            "events_by_category": reverse(
+                "events:events_by_category", args=[self.event.category.slug]
+            ),
+            "event_detail": reverse("events:event_detail", args=[self.event.slug]),
+            "event_reviews": reverse("events:event_reviews", args=[self.event.slug]),
+            "faq": reverse("events:faq"),
+            "about": reverse("events:about"),
+            "contact": reverse("events:contact"),
+        }
+        for name, url in urls.items():
+            with self.subTest(name):
+                self.assertQueryBudget(url, self.PUBLIC_BUDGETS[name])
+
+    def test_event_list_cold(self):
+        event_list = reverse("events:event_list")
+        urls = {
+            "event_list": event_list,
+            "event_list_filtered": f"{event_list}?category={self.event.category.slug}",
+            "event_list_search": f"{event_list}?q=event",
+            "event_list_top_rated": f"{event_list}?sort=top_rated",
+        }
+        for name, url in urls.items():
+            with self.subTest(name):
+                self.assertColdQueryBudget(url, self.COLD_BUDGETS[name])
+
+    def test_member_pages(self):
+        self.client.login(username=self.users[0].username, password=PASSWORD)
+        urls = {
+            "booking_history": reverse("events:booking_history"),
+            "booking_detail": reverse("events:booking_detail", args=[self.booking.pk]),
+            "booking_create": reverse("events:booking_create", args=[self.event.slug]),
+            "event_detail": reverse("events:event_detail", args=[self.booking.event.slug]),
+            "add_review": reverse("events:add_review", args=[self.booking.event.slug]),
+        }
+        for name, url in urls.items():
+            with self.subTest(name):
+                self.assertQueryBudget(url, self.MEMBER_BUDGETS[name])
+
+    def test_staff_pages(self):
+        self.client.login(username="staff", password=PASSWORD)
+        urls = {
+            "admin_dashboard": reverse("events:admin_dashboard"),
+            "event_create": reverse("events:event_create"),
+            "event_edit": reverse("events:event_edit", args=[self.event.slug]),
+        }
+        for name, url in urls.items():
+            with self.subTest(name):
+                self.assertQueryBudget(url, self.STAFF_BUDGETS[name])
+
+
+class SmallCatalogueQueryTests(EventQueryBudgetMixin, TestCase):
+    n_events = 15
+
+
+class LargeCatalogueQueryTests(EventQueryBudgetMixin, TestCase):
+    n_events = 150
+
+
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        result_cache.clear()
+        self.category = Category.objects.create(name="Wedding", slug="wedding")
+
+    def test_normalize_filters(self):
+        self.assertEqual(
+            normalize_filters(QueryDict("location=  New   DELHI &category=Wedding&q=")),
+            (("category", "wedding"), ("location", "new delhi")),
+        )
+        self.assertEqual(
+            normalize_filters(QueryDict("date=2030-01-01&page=3")),
+            normalize_filters(QueryDict("page=1&date=2030-01-01")),
+        )
+        self.assertEqual(
+            normalize_filters(QueryDict("date=soon&price_range=free&sort=cheapest")), ()
+        )
+
+    def test_lru_and_ttl_eviction(self):
+        results = ResultCache(max_entries=2, ttl=60)
+        generation = get_generation()
+        results.set("a", [1], generation)
+        results.set("b", [2], generation)
+        self.assertEqual(results.get("a"), [1])
+        results.set("c", [3], generation)
+        self.assertIsNone(results.get("b"), "least recently used")
+        self.assertEqual(results.get("a"), [1])
+        with mock.patch("events.listing_cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(results.get("a"))
+
+    def test_generation_bump_invalidates(self):
+        results = ResultCache()
+        results.set("a", [1], get_generation())
+        bump_generation()
+        self.assertIsNone(results.get("a"))
+        with self.captureOnCommitCallbacks(execute=True):
+            generation = get_generation()
+            create_event(self.category)
+        self.assertNotEqual(get_generation(), generation)
+
+    def test_reviews_leave_the_generation_alone(self):
+        event = create_event(self.category)
+        user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        with self.captureOnCommitCallbacks(execute=True):
+            generation = get_generation()
+            review = Review.objects.create(user=user, event=event, rating=4, comment="-")
+            review.rating = 2
+            review.save()
+            review.delete()
+        self.assertEqual(get_generation(), generation)
+
+    def test_event_save_keeps_concurrent_rating_changes(self):
+        event = create_event(self.category)
+        stale = Event.objects.get(pk=event.pk)
+        user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        Review.objects.create(user=user, event=event, rating=4, comment="-")
+        stale.title = "Renamed"
+        stale.save()
+        event.refresh_from_db()
+        self.assertEqual(
+            (event.rating_count, event.rating_sum, event.rating_average, event.rating_4),
+            (1, 4, 4.0, 1),
+        )
+
+    def test_event_list_serves_cached_keys_until_the_catalogue_changes(self):
+        create_event(self.category, title="First")
+        url = f"{reverse('events:event_list')}?category=wedding"
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual([event.title for event in response.context["page"]], ["First"])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_event(self.category, title="Second", date=datetime.date(2099, 1, 1))
+        response = self.client.get(url)
+        self.assertEqual([event.title for event in response.context["page"]], ["First", "Second"])
+
+    def test_broad_and_unfiltered_listings_skip_the_cache(self):
+        with mock.patch("events.listing_cache.MAX_CACHED_RESULTS", 2):
+            for i in range(3):
+                create_event(self.category, title=f"Event {i}")
+            url = f"{reverse('events:event_list')}?category=wedding"
+            self.client.get(url)
+            self.assertIs(result_cache.get((("category", "wedding"),)), TOO_BROAD)
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(len(response.context["page"]), 3)
+        self.client.get(reverse("events:event_list"))
+        self.assertIsNone(result_cache.get(()))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        result_cache.clear()
+        self.wedding = Category.objects.create(name="Wedding", slug="wedding")
+        self.festival = Category.objects.create(name="Festival", slug="festival")
+
+    def search(self, query, **params):
+        response = self.client.get(reverse("events:event_list"), {"q": query, **params})
+        return [event.title for event in response.context["page"]]
+
+    def test_tokenize_stems_and_drops_stop_words(self):
+        self.assertEqual(tokenize("The Planned Weddings of Pune"), ["plan", "wed", "pune"])
+        self.assertEqual(stem("weddings"), stem("wedding"))
+        self.assertEqual(tokenize("parties, classes & venues"), ["party", "class", "venue"])
+        self.assertEqual(stem("running"), "run")
+        self.assertEqual(stem("2024"), "2024")
+
+    def test_bm25_prefers_rarer_terms_and_title_matches(self):
+        index = InvertedIndex()
+        index.add(1, {"title": "Jazz night", "description": "music"})
+        index.add(2, {"title": "Rock night", "description": "jazz music"})
+        index.add(3, {"title": "Food fair", "description": "music and food"})
+        self.assertEqual([doc for doc, _ in index.search("jazz")], [1, 2])
+        self.assertEqual([doc for doc, _ in index.search("jazz music")][:2], [1, 2])
+        self.assertEqual(index.search("music", candidates={3}), [(3, index.search("music")[-1][1])])
+        index.remove(1)
+        self.assertEqual([doc for doc, _ in index.search("jazz")], [2])
+
+    def test_filters_apply_before_the_result_cut(self):
+        Event.objects.bulk_create([
+            Event(
+                title=f"Music night {i}", slug=f"music-{i}", description="music",
+                category=self.wedding, location="Delhi", date=datetime.date(2030, 1, 1),
+                time=datetime.time(18), price=Decimal(100), capacity=10,
+            )
+            for i in range(search.MAX_RESULTS + 10)
+        ])
+        create_event(self.festival, title="Festival", description="music, music and more")
+        self.assertEqual(self.search("music", category="festival"), ["Festival"])
+
+    def test_inactive_events_are_not_indexed(self):
+        create_event(self.wedding, title="Jazz brunch", is_active=False)
+        self.assertEqual(self.search("jazz"), [])
+
+    def test_index_is_updated_incrementally(self):
+        create_event(self.wedding, title="Jazz night")
+        self.assertEqual(self.search("jazz"), ["Jazz night"])
+        backend = search.get_search_backend()
+        with mock.patch.object(backend, "build", side_effect=AssertionError("rebuilt")):
+            with self.captureOnCommitCallbacks(execute=True):
+                event = create_event(self.wedding, title="Jazz brunch")
+            self.assertEqual(self.search("jazz"), ["Jazz night", "Jazz brunch"])
+            with self.captureOnCommitCallbacks(execute=True):
+                event.is_active = False
+                event.save()
+            self.assertEqual(self.search("jazz"), ["Jazz night"])
+            with self.captureOnCommitCallbacks(execute=True):
+                Event.objects.get(title="Jazz night").delete()
+            self.assertEqual(self.search("jazz"), [])
+
+    def test_rebuilds_when_the_change_log_has_gaps(self):
+        self.assertEqual(self.search("jazz"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_event(self.wedding, title="Jazz brunch")
+        cache.delete(search.CHANGE_KEY.format(search.get_version()))
+        backend = search.get_search_backend()
+        with mock.patch.object(backend, "build", wraps=backend.build) as build:
+            self.assertEqual(self.search("jazz"), ["Jazz brunch"])
+        build.assert_called_once()
+
+
+class SeatCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        self.event = create_event(capacity=4)
+
+    def test_reserve_seats_refuses_past_capacity(self):
+        self.assertTrue(self.event.reserve_seats(3))
+        self.assertFalse(self.event.reserve_seats(2))
+        self.assertEqual(self.event.booked_seats, 3)
+        self.assertTrue(self.event.reserve_seats(1))
+        self.assertFalse(self.event.reserve_seats(1))
+        self.assertEqual(self.event.available_slots, 0)
+
+    def test_booking_create_stops_at_capacity(self):
+        self.client.login(username="guest", password=PASSWORD)
+        url = reverse("events:booking_create", args=[self.event.slug])
+        date = self.event.date.isoformat()
+        self.client.post(url, {"number_of_guests": 3, "booking_date": date})
+        response = self.client.post(url, {"number_of_guests": 2, "booking_date": date})
+        self.assertContains(response, "Only 1 slots available.")
+        self.assertEqual(Booking.objects.count(), 1)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 3)
+
+    def test_cancel_releases_seats(self):
+        booking = create_booking(self.user, self.event, guests=3)
+        self.client.login(username="guest", password=PASSWORD)
+        self.client.post(reverse("events:booking_cancel", args=[booking.pk]))
+        booking.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(booking.status, "cancelled")
+        self.assertEqual(self.event.booked_seats, 0)
+
+    def test_set_status_transitions(self):
+        booking = create_booking(self.user, self.event, guests=2)
+        booking.set_status("confirmed")
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 2, "pending and confirmed both hold seats")
+        booking.set_status("cancelled")
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 0)
+        booking.set_status("cancelled")
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 0, "released only once")
+        booking.set_status("confirmed")
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 2)
+
+    def test_reactivation_past_capacity_is_flagged(self):
+        booking = create_booking(self.user, self.event, guests=2)
+        booking.set_status("cancelled")
+        create_booking(self.user, self.event, guests=3)
+        with self.assertLogs("events.models", "ERROR"):
+            booking.set_status("confirmed")
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 5)
+        self.assertTrue(self.event.is_oversold)
+        self.assertEqual(self.event.available_slots, 0)
+        self.assertFalse(self.event.reserve_seats(1))
+
+    def test_event_save_keeps_concurrent_seat_changes(self):
+        stale = Event.objects.get(pk=self.event.pk)
+        create_booking(self.user, self.event, guests=3)
+        stale.title = "Renamed"
+        stale.save()
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.title, self.event.booked_seats), ("Renamed", 3))
+
+    def test_deleting_bookings_releases_seats(self):
+        create_booking(self.user, self.event, guests=1).delete()
+        create_booking(self.user, self.event, guests=1, status="cancelled")
+        create_booking(self.user, self.event, guests=2)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 2)
+        self.user.delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 0)
+
+    def test_admin_edits_move_seats(self):
+        User.objects.create_superuser("admin", "admin@example.com", PASSWORD)
+        self.client.login(username="admin", password=PASSWORD)
+        booking = create_booking(self.user, self.event, guests=1)
+        url = reverse("admin:events_booking_change", args=[booking.pk])
+
+        def edit(**changes):
+            data = {
+                "user": self.user.pk, "event": self.event.pk, "number_of_guests": 1,
+                "booking_date": booking.booking_date.isoformat(),
+                "total_amount": "100.00", "status": "pending", **changes,
+            }
+            self.assertEqual(self.client.post(url, data).status_code, 302)
+            self.event.refresh_from_db()
+            return self.event.booked_seats
+
+        self.assertEqual(edit(number_of_guests=3), 3)
+        self.assertEqual(edit(number_of_guests=3, status="confirmed"), 3)
+        self.assertEqual(edit(number_of_guests=2, status="cancelled"), 0)
+        self.assertEqual(edit(number_of_guests=2, status="pending"), 2)
+
+    def test_recount_repairs_drift(self):
+        create_booking(self.user, self.event, guests=2)
+        create_booking(self.user, self.event, guests=1, status="cancelled")
+        Event.objects.filter(pk=self.event.pk).update(booked_seats=4)
+        call_command("recount_booked_seats", "--dry-run", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 4)
+        out = StringIO()
+        call_command("recount_booked_seats", stdout=out)
+        self.assertIn("Fixed 1 event", out.getvalue())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.booked_seats, 2)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+
+    def test_bookings_are_counted_after_commit(self):
+        event = create_event()
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_booking(self.user, event)
+            self.assertEqual(DailyStats.objects.get().bookings, 0)
+            self.assertEqual(CategoryStats.objects.get().bookings, 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(DailyStats.objects.get().bookings, 1)
+        self.assertEqual(CategoryStats.objects.get().bookings, 1)
+
+    def test_one_uncategorized_row(self):
+        create_event()
+        create_event()
+        stats = CategoryStats.objects.get()
+        self.assertEqual((stats.key, stats.category_id, stats.events), (0, None, 2))
+        # A racing first bump that also tried to create it would now fail and
+        # fall back to the update.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CategoryStats.objects.create(key=0)
+
+    def test_rebuild_rollups(self):
+        wedding = Category.objects.create(name="Wedding", slug="wedding")
+        create_event(category=wedding)
+        create_booking(self.user, create_event())
+        CategoryStats.objects.all().delete()
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(
+            sorted(CategoryStats.objects.values_list("key", "category_id", "events", "bookings")),
+            [(0, None, 1, 1), (wedding.pk, wedding.pk, 1, 0)],
+        )
+
+
+class ReviewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        self.event = create_event()
+
+    def can_review(self):
+        return self.client.get(reverse("events:event_detail", args=[self.event.slug])).context["can_review"]
+
+    def test_eligibility(self):
+        self.assertFalse(self.can_review())
+        self.client.login(username="guest", password=PASSWORD)
+        booking = create_booking(self.user, self.event)
+        self.assertFalse(self.can_review(), "pending booking")
+        add_review = reverse("events:add_review", args=[self.event.slug])
+        self.assertRedirects(
+            self.client.post(add_review, {"rating": 5, "comment": "Great"}),
+            reverse("events:event_detail", args=[self.event.slug]),
+        )
+        self.assertFalse(Review.objects.exists())
+
+        Booking.objects.filter(pk=booking.pk).update(status="confirmed")
+        self.assertTrue(self.can_review())
+        self.client.post(add_review, {"rating": 5, "comment": "Great"})
+        self.assertEqual(Review.objects.get().rating, 5)
+        self.assertFalse(self.can_review(), "already reviewed")
+        self.client.post(add_review, {"rating": 1, "comment": "Again"})
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_load_more_walks_every_review_once(self):
+        reviewers = User.objects.bulk_create([User(username=f"reviewer{n}") for n in range(23)])
+        for n, user in enumerate(reviewers):
+            Review.objects.create(user=user, event=self.event, rating=n % 5 + 1, comment=str(n))
+        expected = list(Review.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+        page = self.client.get(reverse("events:event_detail", args=[self.event.slug])).context["reviews"]
+        seen = [review.pk for review in page]
+        url = reverse("events:event_reviews", args=[self.event.slug])
+        while page.has_next:
+            page = self.client.get(url, {"after": page.next_cursor}).context["reviews"]
+            seen += [review.pk for review in page]
+        self.assertEqual(seen, expected)
+
+    def test_reviews_of_unknown_or_inactive_events(self):
+        Review.objects.create(user=self.user, event=self.event, rating=4, comment="-")
+        url = reverse("events:event_reviews", args=[self.event.slug])
+        self.assertContains(self.client.get(url), "star-rating")
+        Event.objects.filter(pk=self.event.pk).update(is_active=False)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        missing = reverse("events:event_reviews", args=["no-such-event"])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """Records each open and fails once for subjects containing "fail" or
+    every time for "bounce"."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opens = 0
+        self.failed = set()
+
+    def open(self):
+        self.opens += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "bounce" in message.subject or (
+                "fail" in message.subject and message.subject not in self.failed
+            ):
+                self.failed.add(message.subject)
+                raise smtplib.SMTPServerDisconnected("connection lost")
+        return super().send_messages(messages)
+
+
+class OutboxTests(TestCase):
+    def queue(self, *subjects):
+        return [queue_mail(subject, "Body", ["guest@example.com"]) for subject in subjects]
+
+    def test_claim_leases_messages_to_one_worker(self):
+        self.queue("one", "two", "three")
+        first = claim_batch(2)
+        self.assertEqual([m.subject for m in first], ["one", "two"])
+        self.assertEqual([m.subject for m in claim_batch(10)], ["three"])
+        self.assertEqual(claim_batch(10), [], "leased messages are hidden")
+        with mock.patch("events.outbox.timezone.now", return_value=timezone.now() + CLAIM_LEASE * 2):
+            self.assertEqual(len(claim_batch(10)), 3, "an expired lease is claimable again")
+
+    def test_send_batch_delivers_over_one_connection(self):
+        self.queue("one", "two")
+        connection = FlakyEmailBackend()
+        self.assertEqual(send_batch(claim_batch(10), connection=connection), (2, 0, 0))
+        self.assertEqual([m.subject for m in mail.outbox], ["one", "two"])
+        self.assertEqual(connection.opens, 1)
+        self.assertEqual(
+            set(OutboxMessage.objects.values_list("status", flat=True)), {"sent"}
+        )
+
+    def test_failure_retries_later_on_a_fresh_connection(self):
+        self.queue("fail once", "after")
+        connection = FlakyEmailBackend()
+        self.assertEqual(send_batch(claim_batch(10), connection=connection), (1, 1, 0))
+        self.assertEqual(connection.opens, 2, "reopened after the error")
+        failed = OutboxMessage.objects.get(subject="fail once")
+        self.assertEqual((failed.status, failed.attempts), ("pending", 1))
+        self.assertIn("connection lost", failed.last_error)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+        OutboxMessage.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_batch(claim_batch(10), connection=connection), (1, 0, 0))
+        self.assertEqual([m.subject for m in mail.outbox], ["after", "fail once"])
+
+    def test_dead_letters_after_max_attempts(self):
+        (message,) = self.queue("bounce")
+        connection = FlakyEmailBackend()
+        for _ in range(3):
+            OutboxMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+            send_batch(claim_batch(10), max_attempts=3, connection=connection)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("dead", 3))
+        self.assertEqual(claim_batch(10), [])
+
+    def test_send_outbox_command_drains_due_messages(self):
+        self.queue("one", "two", "three")
+        call_command("send_outbox", "--once", "--batch-size=2", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class StubGatewayMixin:
+    """Run razorpay_stub on a free port and route the views' gateway to it."""
+
+    def setUp(self):
+        super().setUp()
+        self.stub = make_server(key_secret="stub-secret")
+        threading.Thread(target=self.stub.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+        host, port = self.stub.server_address
+        self.gateway = RazorpayGateway(
+            "rzp_test_stub", "stub-secret", base_url=f"http://{host}:{port}",
+            timeout=(1, 2), failure_threshold=2, reset_timeout=30,
+        )
+        for target in (
+            "events.views.get_gateway",
+            "events.management.commands.reconcile_payments.get_gateway",
+        ):
+            patcher = mock.patch(target, return_value=self.gateway)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        keys = self.settings(
+            RAZORPAY_KEY_ID="rzp_test_stub", RAZORPAY_KEY_SECRET="stub-secret",
+            RAZORPAY_WEBHOOK_SECRET="webhook-secret",
+        )
+        keys.enable()
+        self.addCleanup(keys.disable)
+
+
+class GatewayTests(StubGatewayMixin, TestCase):
+
+    def samples(self, outcome):
+        pattern = (
+            r'^razorpay_gateway_call_duration_seconds_count'
+            rf'\{{operation="order.create",outcome="{outcome}"\}} (\d+)$'
+        )
+        match = re.search(pattern, metrics.registry.render(), re.MULTILINE)
+        return int(match.group(1)) if match else 0
+
+    def short_circuits(self):
+        match = re.search(
+            r'^razorpay_gateway_short_circuited_total\{operation="order.create"\} (\d+)$',
+            metrics.registry.render(), re.MULTILINE,
+        )
+        return int(match.group(1)) if match else 0
+
+    def expire_cool_down(self):
+        self.gateway.breaker.opened_at -= self.gateway.breaker.reset_timeout
+
+    def test_breaker_opens_half_opens_and_closes(self):
+        ok, errors = self.samples("ok"), self.samples("error")
+        self.gateway.create_order(50000)
+        self.assertEqual(self.samples("ok"), ok + 1)
+
+        self.stub.state.failure_rate = 1.0
+        for _ in range(2):
+            with self.assertRaises(PaymentGatewayError):
+                self.gateway.create_order(50000)
+        self.assertEqual(self.gateway.breaker.state, "open")
+        self.assertEqual(self.samples("error"), errors + 2)
+
+        # Open: refused without a request, counted apart from the latencies.
+        short_circuits = self.short_circuits()
+        with self.assertRaises(GatewayUnavailable):
+            self.gateway.create_order(50000)
+        self.assertEqual(self.short_circuits(), short_circuits + 1)
+        self.assertEqual(self.samples("error"), errors + 2)
+
+        # Half-open: one trial call; a failure opens the breaker again.
+        self.expire_cool_down()
+        self.assertEqual(self.gateway.breaker.state, "half-open")
+        with self.assertRaises(PaymentGatewayError):
+            self.gateway.create_order(50000)
+        self.assertEqual(self.gateway.breaker.state, "open")
+
+        # A successful trial closes it.
+        self.stub.state.failure_rate = 0.0
+        self.expire_cool_down()
+        order = self.gateway.create_order(50000)
+        self.assertEqual(order["amount"], 50000)
+        self.assertEqual(self.gateway.breaker.state, "closed")
+
+    def test_rejected_requests_do_not_trip_the_breaker(self):
+        for _ in range(3):
+            with self.assertRaises(PaymentGatewayError):
+                self.gateway.create_order(1)  # below Razorpay's minimum
+        self.assertEqual(self.gateway.breaker.state, "closed")
+
+
+class CheckoutTests(StubGatewayMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        self.booking = create_booking(self.user, create_event(price=Decimal(250)), guests=2)
+        self.url = reverse("events:payment_checkout", args=[self.booking.pk])
+        self.client.login(username="guest", password=PASSWORD)
+
+    def checkout(self):
+        return self.client.get(self.url).context["razorpay_order_id"]
+
+    def test_reload_reuses_the_order(self):
+        order_id = self.checkout()
+        self.assertEqual(self.checkout(), order_id)
+        self.assertEqual(list(self.stub.state.orders), [order_id])
+        self.assertEqual(self.stub.state.orders[order_id]["amount"], 50000)
+
+    def test_new_order_when_the_amount_changes(self):
+        order_id = self.checkout()
+        Booking.objects.filter(pk=self.booking.pk).update(total_amount=Decimal(750))
+        new_order_id = self.checkout()
+        self.assertNotEqual(new_order_id, order_id)
+        self.assertEqual(self.stub.state.orders[new_order_id]["amount"], 75000)
+        self.assertEqual(Payment.objects.get().amount, Decimal(750))
+
+    def test_new_order_when_the_order_expires(self):
+        order_id = self.checkout()
+        Payment.objects.update(razorpay_order_created_at=timezone.now() - datetime.timedelta(hours=2))
+        self.assertNotEqual(self.checkout(), order_id)
+        self.assertEqual(len(self.stub.state.orders), 2)
+
+    def test_booking_cancelled_during_order_creation(self):
+        create_order = self.gateway.create_order
+
+        def cancel_then_create(*args, **kwargs):
+            Booking.objects.filter(pk=self.booking.pk).update(status="cancelled")
+            return create_order(*args, **kwargs)
+
+        with mock.patch.object(self.gateway, "create_order", side_effect=cancel_then_create):
+            response = self.client.get(self.url)
+        self.assertRedirects(response, reverse("events:booking_history"))
+        self.assertIsNone(Payment.objects.get().razorpay_order_id)
+
+    def test_concurrent_checkout_renders_the_stored_order(self):
+        create_order = self.gateway.create_order
+
+        def race(*args, **kwargs):
+            # Another checkout stores its order while this one is in flight.
+            Payment.objects.update(
+                razorpay_order_id="order_first", razorpay_order_amount=50000,
+                razorpay_order_created_at=timezone.now(),
+            )
+            return create_order(*args, **kwargs)
+
+        with mock.patch.object(self.gateway, "create_order", side_effect=race):
+            self.assertEqual(self.checkout(), "order_first")
+
+    def test_gateway_outage(self):
+        self.stub.state.failure_rate = 1.0
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse("events:booking_history"))
+
+
+class CallbackTestMixin(StubGatewayMixin):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        self.event = create_event(price=Decimal(250))
+        self.booking = create_booking(self.user, self.event, guests=2)
+        self.client.login(username="guest", password=PASSWORD)
+        self.client.get(reverse("events:payment_checkout", args=[self.booking.pk]))
+        self.order_id = Payment.objects.get(booking=self.booking).razorpay_order_id
+
+    def callback(self, params, client=None):
+        return (client or self.client).post(reverse("events:payment_callback"), params)
+
+    def assertConfirmedOnce(self):
+        payment = Payment.objects.select_related("booking__event").get(booking=self.booking)
+        self.assertEqual(payment.status, "success")
+        self.assertEqual(payment.booking.status, "confirmed")
+        self.assertEqual(payment.booking.event.booked_seats, 2)
+        self.assertEqual(OutboxMessage.objects.filter(recipients=["guest@example.com"]).count(), 1)
+        self.assertEqual(DailyStats.objects.get().revenue, Decimal(500))
+
+
+class PaymentCallbackTests(CallbackTestMixin, TestCase):
+    def test_replayed_callback_confirms_once(self):
+        params = self.stub.state.pay(self.order_id)
+        success = reverse("events:payment_success", args=[self.booking.pk])
+        self.assertRedirects(self.callback(params), success)
+        self.assertRedirects(self.callback(params), success)
+        self.assertConfirmedOnce()
+
+    def test_bad_signature_fails_until_a_genuine_capture(self):
+        params = self.stub.state.pay(self.order_id)
+        response = self.callback({**params, "razorpay_signature": "forged"})
+        self.assertRedirects(response, reverse("events:payment_failure", args=[self.booking.pk]))
+        self.assertEqual(Payment.objects.get().status, "failed")
+        self.callback(params)
+        self.assertConfirmedOnce()
+
+    def test_unknown_order(self):
+        response = self.callback({"razorpay_order_id": "order_unknown"})
+        self.assertRedirects(response, reverse("events:home"))
+
+
+class WebhookTests(CallbackTestMixin, TestCase):
+    def deliver(self, name, order_id=None, event_id=None, signature=None):
+        payment = {"id": "pay_webhook", "order_id": order_id or self.order_id}
+        body = json.dumps({"event": name, "payload": {"payment": {"entity": payment}}})
+        if signature is None:
+            signature = hmac.new(b"webhook-secret", body.encode(), hashlib.sha256).hexdigest()
+        headers = {"HTTP_X_RAZORPAY_SIGNATURE": signature}
+        if event_id:
+            headers["HTTP_X_RAZORPAY_EVENT_ID"] = event_id
+        return self.client.post(
+            reverse("events:payment_webhook"), body, content_type="application/json", **headers
+        )
+
+    def test_bad_signature_is_rejected(self):
+        response = self.deliver("payment.captured", signature="forged")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_redelivery_is_applied_once(self):
+        for _ in range(2):
+            self.assertEqual(self.deliver("payment.captured", event_id="evt_1").status_code, 204)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        self.assertEqual(webhooks.process_batch(), (1, 1, 0))
+        self.assertConfirmedOnce()
+        self.assertEqual(webhooks.process_batch(), (0, 0, 0))
+
+    def test_capture_wins_over_failure(self):
+        self.deliver("payment.captured", event_id="evt_1")
+        self.deliver("payment.failed", event_id="evt_2")
+        self.assertEqual(webhooks.process_batch(), (2, 1, 0))
+        self.assertConfirmedOnce()
+
+    def test_failure_after_capture_is_ignored(self):
+        self.deliver("payment.captured", event_id="evt_1")
+        webhooks.process_batch()
+        self.deliver("payment.failed", event_id="evt_2")
+        self.assertEqual(webhooks.process_batch(), (1, 0, 0))
+        self.assertConfirmedOnce()
+
+    def test_poison_deliveries_are_retired(self):
+        other = create_booking(self.user, create_event(price=Decimal(100)))
+        other_order = "order_other"
+        Payment.objects.create(
+            booking=other, amount=other.total_amount, razorpay_order_id=other_order
+        )
+        self.deliver("payment.captured", order_id=["not", "hashable"], event_id="evt_bad")
+        self.deliver("payment.captured", order_id=other_order, event_id="evt_other")
+        self.deliver("payment.captured", event_id="evt_good")
+
+        def fail_for_other(booking):
+            if booking.pk == other.pk:
+                raise RuntimeError("mail template missing")
+            return queue_booking_confirmation(booking)
+
+        with mock.patch("events.webhooks.queue_booking_confirmation", side_effect=fail_for_other):
+            self.assertEqual(webhooks.process_batch(), (3, 1, 2))
+        self.assertConfirmedOnce()
+        # The failed order rolled back to its savepoint; nothing is left queued.
+        self.assertEqual(Payment.objects.get(booking=other).status, "pending")
+        self.assertFalse(WebhookEvent.objects.filter(processed_at__isnull=True).exists())
+        errors = dict(WebhookEvent.objects.values_list("event_id", "last_error"))
+        self.assertIn("order id", errors["evt_bad"])
+        self.assertIn("mail template missing", errors["evt_other"])
+        self.assertEqual(errors["evt_good"], "")
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentPaymentCallbackTests(CallbackTestMixin, TransactionTestCase):
+    def test_concurrent_callbacks_confirm_once(self):
+        params = self.stub.state.pay(self.order_id)
+        barrier = threading.Barrier(4)
+
+        def post():
+            barrier.wait()
+            try:
+                self.callback(params, client=Client())
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertConfirmedOnce()
+
+
+class ReconcilePaymentsTests(StubGatewayMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("guest", "guest@example.com", PASSWORD)
+        self.event = create_event(price=Decimal(250))
+
+    def create_payment(self, status="pending", order_age=datetime.timedelta(hours=1)):
+        booking = create_booking(self.user, self.event)
+        payment = Payment.objects.create(
+            booking=booking, amount=booking.total_amount, status=status,
+            razorpay_order_id=self.gateway.create_order(25000)["id"],
+            razorpay_order_created_at=timezone.now() - order_age,
+        )
+        Payment.objects.filter(pk=payment.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        return payment
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command("reconcile_payments", "--rate=0", "--workers=2", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def statuses(self):
+        return list(Payment.objects.order_by("pk").values_list("status", "booking__status"))
+
+    def seed_outcomes(self):
+        payments = [self.create_payment() for _ in range(5)]
+        for payment in payments[:3]:
+            self.stub.state.pay(payment.razorpay_order_id)
+        self.stub.state.pay(payments[3].razorpay_order_id, status="failed")
+        # payments[4] has no attempt yet and stays open.
+
+    def test_resolves_in_chunks(self):
+        self.seed_outcomes()
+        output = self.reconcile("--chunk-size=2")
+        self.assertIn("Resolved 3 succeeded and 1 failed of 5 checked; 1 still open", output)
+        self.assertEqual(self.statuses(), [("success", "confirmed")] * 3 + [
+            ("failed", "pending"), ("pending", "pending"),
+        ])
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+        self.assertEqual(DailyStats.objects.get().revenue, Decimal(750))
+
+    def test_dry_run_writes_nothing(self):
+        self.seed_outcomes()
+        output = self.reconcile("--chunk-size=2", "--dry-run")
+        self.assertIn("Would resolve 3 succeeded and 1 failed of 5 checked", output)
+        self.assertEqual(self.statuses(), [("pending", "pending")] * 5)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failed_payment_captured_later(self):
+        recent = self.create_payment(status="failed")
+        stale = self.create_payment(status="failed", order_age=datetime.timedelta(days=3))
+        for payment in (recent, stale):
+            self.stub.state.pay(payment.razorpay_order_id, status="failed")
+            self.stub.state.pay(payment.razorpay_order_id)
+        self.assertIn("Resolved 1 succeeded and 0 failed of 1 checked", self.reconcile())
+        self.assertEqual(self.statuses(), [("success", "confirmed"), ("failed", "pending")])
+        self.assertEqual(Event.objects.get().booked_seats, 2)
+
+
+def image_upload(name="poster.png", size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new("RGBA", size, (200, 40, 40, 128)).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class MediaTestMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = self.settings(MEDIA_ROOT=self.media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        self.category = Category.objects.create(name="Wedding", slug="wedding")
+        self.event = create_event(self.category, title="Poster", image=image_upload())
+
+
+class ImageDerivativeTests(MediaTestMixin, TestCase):
+
+    def render(self):
+        return Template("{% load event_images %}{% event_image event %}").render(
+            Context({"event": self.event})
+        )
+
+    def test_worker_writes_content_addressed_derivatives(self):
+        self.assertIn(reverse("events:event_image", args=[self.event.slug, 320, "webp"]), self.render())
+        call_command("generate_image_derivatives", "--once", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(len(self.event.image_digest), 64)
+        self.assertEqual(self.event.image_variants["jpeg"], [320, 640, 1024, 1200])
+        for fmt, widths in self.event.image_variants.items():
+            for width in widths:
+                name = derivative_name(self.event.image_digest, width, fmt)
+                with default_storage.open(name) as fh:
+                    self.assertEqual(Image.open(fh).width, width)
+        html = self.render()
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(default_storage.url(derivative_name(self.event.image_digest, 640, "jpeg")) + " 640w", html)
+
+    def test_on_demand_view_generates_and_redirects(self):
+        url = reverse("events:event_image", args=[self.event.slug, 500, "jpeg"])
+        response = self.client.get(url)
+        self.event.refresh_from_db()
+        self.assertRedirects(
+            response,
+            default_storage.url(derivative_name(self.event.image_digest, 640, "jpeg")),
+            fetch_redirect_response=False,
+        )
+
+    def test_on_demand_view_does_not_wait_for_the_lock(self):
+        cache.add(f"events:image-derivatives:{self.event.pk}", 1)
+        url = reverse("events:event_image", args=[self.event.slug, 500, "jpeg"])
+        with mock.patch("events.images.generate_derivatives") as generate:
+            response = self.client.get(url)
+        generate.assert_not_called()
+        self.assertRedirects(response, self.event.image.url, fetch_redirect_response=False)
+
+    def test_on_demand_view_ignores_inactive_events(self):
+        Event.objects.filter(pk=self.event.pk).update(is_active=False)
+        with mock.patch("events.images.generate_derivatives") as generate:
+            response = self.client.get(
+                reverse("events:event_image", args=[self.event.slug, 500, "jpeg"])
+            )
+        self.assertEqual(response.status_code, 404)
+        generate.assert_not_called()
+
+    def test_locked_event_is_left_to_the_lock_holder(self):
+        cache.add(f"events:image-derivatives:{self.event.pk}", 1)
+        call_command("generate_image_derivatives", "--once", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.image_digest, "")
+
+    def test_replacing_the_image_resets_derivatives(self):
+        call_command("generate_image_derivatives", "--once", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.event.title = "Renamed"
+        self.event.save()
+        self.assertTrue(self.event.image_digest)
+        self.event.image = image_upload("other.png", size=(300, 200))
+        self.event.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.image_digest, "")
+        call_command("generate_image_derivatives", "--once", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.image_variants["jpeg"], [300])
+
+
+class BlobStorageTests(MediaTestMixin, TestCase):
+    def refcount(self, name):
+        return Blob.objects.get(name=name).refcount
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        other = create_event(self.category, title="Poster", image=image_upload("copy-of-poster.png"))
+        profile = User.objects.create_user("member", "m@example.com", PASSWORD).profile
+        profile.profile_picture = image_upload("me.png")
+        profile.save()
+
+        name = self.event.image.name
+        self.assertRegex(name, r"^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        self.assertEqual(other.image.name, name)
+        self.assertEqual(profile.profile_picture.name, name)
+        self.assertEqual(self.refcount(name), 3)
+
+        other.image = image_upload("new.png", size=(100, 100))
+        other.save()
+        profile.delete()
+        self.assertEqual(self.refcount(name), 1)
+        self.assertEqual(self.refcount(other.image.name), 1)
+
+    def test_gc_deletes_unreferenced_blobs_and_derivatives(self):
+        call_command("generate_image_derivatives", "--once", stdout=StringIO())
+        self.event.refresh_from_db()
+        old_name, digest = self.event.image.name, self.event.image_digest
+        self.event.image = image_upload("new.png", size=(100, 100))
+        self.event.save()
+        # Drift from a bulk update that bypassed the signals.
+        Blob.objects.filter(name=self.event.image.name).update(refcount=7)
+
+        call_command("gc_media", stdout=StringIO())
+        self.assertTrue(default_storage.exists(old_name), "inside the grace period")
+
+        call_command("gc_media", "--grace-hours=0", stdout=StringIO())
+        self.assertFalse(Blob.objects.filter(name=old_name).exists())
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertFalse(default_storage.exists(derivative_name(digest, 320, "jpeg")))
+        self.assertEqual(self.refcount(self.event.image.name), 1)
+        self.assertTrue(default_storage.exists(self.event.image.name))
+
+    def test_blobs_are_served_as_immutable(self):
+        request = RequestFactory().get("/media/")
+        response = serve_media(request, self.event.image.name, document_root=self.media_root)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+
+class StaticAssetsTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        storages = {
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "myproject.static_assets.CompressedManifestStaticFilesStorage"},
+        }
+        overrides = self.settings(STATIC_ROOT=self.static_root, STORAGES=storages)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command("collectstatic", "--noinput", verbosity=0)
+        with open(os.path.join(self.static_root, "staticfiles.json")) as manifest:
+            self.css = json.load(manifest)["paths"]["css/style.css"]
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.css, r"^css/style\.[0-9a-f]{12}\.css$")
+        with open(os.path.join(self.static_root, self.css), "rb") as original:
+            content = original.read()
+        with open(os.path.join(self.static_root, self.css + ".gz"), "rb") as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), content)
+        self.assertContains(self.client.get(reverse("events:home")), f"/static/{self.css}")
+
+    def test_serves_negotiated_variant_with_immutable_caching(self):
+        response = self.client.get(f"/static/{self.css}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertTrue(response["Content-Type"].startswith("text/css"))
+        with open(os.path.join(self.static_root, self.css), "rb") as original:
+            self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), original.read())
+
+        response = self.client.get(f"/static/{self.css}", HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        etag = response["ETag"]
+        response = self.client.get(f"/static/{self.css}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unhashed_names_get_short_caching(self):
+        response = self.client.get("/static/css/style.css")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+    def test_files_changed_in_place_are_picked_up(self):
+        path = os.path.join(self.static_root, "robots.txt")
+        self.assertEqual(self.client.get("/static/robots.txt").status_code, 404)
+        with open(path, "w") as fh:
+            fh.write("User-agent: *\n")
+        etag = self.client.get("/static/robots.txt")["ETag"]
+        with open(path, "a") as fh:
+            fh.write("Disallow: /admin/\n")
+        self.assertNotEqual(self.client.get("/static/robots.txt")["ETag"], etag)
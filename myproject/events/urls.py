@@ -13,11 +13,14 @@ urlpatterns = [
     path("events/<slug:slug>/delete/", views.event_delete, name="event_delete"),
     path("events/<slug:slug>/book/", views.booking_create, name="booking_create"),
     path("events/<slug:slug>/review/", views.add_review, name="add_review"),
+    path("events/<slug:slug>/reviews/", views.event_reviews, name="event_reviews"),
+    path("events/<slug:slug>/image/<int:width>w.<str:fmt>", views.event_image, name="event_image"),
     path("bookings/", views.booking_history, name="booking_history"),
     path("bookings/<int:pk>/", views.booking_detail, name="booking_detail"),
     path("bookings/<int:pk>/cancel/", views.booking_cancel, name="booking_cancel"),
     path("payment/<int:booking_id>/checkout/", views.payment_checkout, name="payment_checkout"),
     path("payment/callback/", views.payment_callback, name="payment_callback"),
+    path("payment/webhook/", views.payment_webhook, name="payment_webhook"),
     path("payment/success/<int:booking_id>/", views.payment_success, name="payment_success"),
     path("payment/failure/<int:booking_id>/", views.payment_failure, name="payment_failure"),
     path("dashboard/", views.admin_dashboard, name="admin_dashboard"),
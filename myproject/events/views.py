@@ -1,27 +1,49 @@
 import json
 from decimal import Decimal
 
-import razorpay
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
-from django.core.mail import send_mail
-from django.db.models import Sum, Count, Q, Avg
+from django.db import transaction
+from django.db.models import Sum
 from django.db.models.functions import TruncMonth
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed,
+)
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
+from django.views.static import serve as static_serve
 
 from accounts.decorators import admin_required
+from . import images, webhooks
+from .categories import get_categories, get_category
 from .forms import EventForm, BookingForm, ReviewForm, ContactForm
-from .models import Category, Event, Booking, Payment, Review, FAQ
+from .listing_cache import (
+    TOO_BROAD, get_generation, is_cacheable, normalize_filters, result_cache,
+)
+from .models import Event, Booking, Payment, Review, FAQ, CategoryStats, DailyStats
+from .outbox import queue_booking_confirmation, queue_mail
+from .pagination import paginate_keys, paginate_keyset
+from .payments import PaymentGatewayError, get_gateway
+from .search import get_search_backend
+from .storage import IMMUTABLE_CACHE_CONTROL, IMMUTABLE_PREFIXES
+
+EVENTS_PER_PAGE = 12
+BOOKINGS_PER_PAGE = 20
+EVENT_ORDERING = ("date", "time", "id")
+SEARCH_ORDERING = ("-search_rank", "id")
+TOP_RATED_ORDERING = ("-rating_average", "-rating_count", "id")
+REVIEWS_PER_PAGE = 10
+REVIEW_ORDERING = ("-created_at", "-id")
+BOOKING_ORDERING = ("-created_at", "id")
 
 
 # ─── Home ─────────────────────────────────────────────────────────────────────
 
 def home(request):
-    featured_events = Event.objects.filter(is_active=True)[:6]
-    categories = Category.objects.all()
+    featured_events = Event.objects.with_listing_stats().filter(is_active=True)[:6]
+    categories = get_categories()
     return render(request, "events/home.html", {
         "featured_events": featured_events,
         "categories": categories,
@@ -30,30 +52,23 @@ def home(request):
 
 # ─── Event Browsing ──────────────────────────────────────────────────────────
 
-def event_list(request):
-    events = Event.objects.filter(is_active=True)
-
-    query = request.GET.get("q")
-    if query:
-        events = events.filter(
-            Q(title__icontains=query)
-            | Q(description__icontains=query)
-            | Q(location__icontains=query)
-        )
+def _filter_events(filters):
+    """Active events matching every filter except the ``q`` search."""
+    events = Event.objects.with_listing_stats().filter(is_active=True)
 
-    category = request.GET.get("category")
+    category = filters.get("category")
     if category:
         events = events.filter(category__slug=category)
 
-    location = request.GET.get("location")
+    location = filters.get("location")
     if location:
         events = events.filter(location__icontains=location)
 
-    date = request.GET.get("date")
+    date = filters.get("date")
     if date:
         events = events.filter(date=date)
 
-    price_range = request.GET.get("price_range")
+    price_range = filters.get("price_range")
     if price_range:
         if price_range == "0-1000":
             events = events.filter(price__lte=1000)
@@ -63,42 +78,123 @@ def event_list(request):
             events = events.filter(price__gte=5000, price__lte=10000)
         elif price_range == "10000+":
             events = events.filter(price__gte=10000)
+    return events
+
 
+def event_list(request):
+    filter_key = normalize_filters(request.GET)
+    filters = dict(filter_key)
+    if filters.get("sort") == "top_rated":
+        ordering = TOP_RATED_ORDERING
+    elif "q" in filters:
+        ordering = SEARCH_ORDERING
+    else:
+        ordering = EVENT_ORDERING
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+
+    # Repeated filter combinations are served from the cached sort keys; the
+    # database is only asked for the handful of events on the page.
+    page = None
+    events = None
+    keys = result_cache.get(filter_key) if is_cacheable(filter_key) else TOO_BROAD
+    if keys is None:
+        events = _filter_events(filters)
+        if ordering == SEARCH_ORDERING:
+            generation = get_generation()
+            keys = get_search_backend().rank(events, filters["q"])
+            result_cache.set(filter_key, keys, generation)
+        else:
+            if "q" in filters:
+                events = get_search_backend().search(events, filters["q"])
+            keys = result_cache.fetch(filter_key, events, ordering)
+    if keys is not TOO_BROAD:
+        page = paginate_keys(
+            Event.objects.with_listing_stats(), keys, ordering,
+            after=after, before=before, per_page=EVENTS_PER_PAGE,
+        )
+        if page is None and ordering == SEARCH_ORDERING:
+            # The cursor's event dropped out of the results; start over.
+            page = paginate_keys(
+                Event.objects.with_listing_stats(), keys, ordering, per_page=EVENTS_PER_PAGE,
+            )
+    if page is None:
+        if events is None:
+            events = _filter_events(filters)
+            if "q" in filters:
+                events = get_search_backend().search(events, filters["q"])
+        page = paginate_keyset(
+            events, ordering, after=after, before=before, per_page=EVENTS_PER_PAGE,
+        )
     return render(request, "events/event_list.html", {
-        "events": events,
-        "categories": Category.objects.all(),
+        "events": page,
+        "page": page,
+        "categories": get_categories(),
     })
 
 
 def events_by_category(request, slug):
-    category = get_object_or_404(Category, slug=slug)
-    events = Event.objects.filter(category=category, is_active=True)
+    category = get_category(slug)
+    if category is None:
+        raise Http404("No category matches the given query.")
+    events = Event.objects.with_listing_stats().filter(category=category, is_active=True)
+    page = paginate_keyset(
+        events, EVENT_ORDERING,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=EVENTS_PER_PAGE,
+    )
     return render(request, "events/event_list.html", {
-        "events": events,
-        "categories": Category.objects.all(),
+        "events": page,
+        "page": page,
+        "categories": get_categories(),
         "current_category": category,
     })
 
 
 def event_detail(request, slug):
-    event = get_object_or_404(Event, slug=slug)
-    reviews = event.reviews.select_related("user").all()
-    can_review = False
-    if request.user.is_authenticated:
-        has_booking = Booking.objects.filter(
-            user=request.user, event=event, status="confirmed"
-        ).exists()
-        has_reviewed = Review.objects.filter(
-            user=request.user, event=event
-        ).exists()
-        can_review = has_booking and not has_reviewed
+    event = get_object_or_404(
+        Event.objects.with_listing_stats().with_review_eligibility(request.user),
+        slug=slug,
+    )
     return render(request, "events/event_detail.html", {
         "event": event,
-        "reviews": reviews,
-        "can_review": can_review,
+        "reviews": _review_page(event.pk, request.GET.get("reviews_after")),
+        "can_review": event.user_has_booking and not event.user_has_review,
     })
 
 
+def event_reviews(request, slug):
+    """Next page of an event's reviews, as an HTML fragment for "load more"."""
+    event = get_object_or_404(Event.objects.only("pk", "slug"), slug=slug, is_active=True)
+    return render(request, "events/review_list.html", {
+        "reviews": _review_page(event.pk, request.GET.get("after")),
+        "event_slug": event.slug,
+    })
+
+
+def _review_page(event_id, after=None):
+    return paginate_keyset(
+        Review.objects.filter(event_id=event_id).select_related("user"),
+        REVIEW_ORDERING, after=after, per_page=REVIEWS_PER_PAGE,
+    )
+
+
+def event_image(request, slug, width, fmt):
+    """Redirect to a resized copy of the event image, generating the copies
+    first if the background worker has not got to this event yet."""
+    if fmt not in images.FORMATS:
+        raise Http404
+    event = get_object_or_404(Event, slug=slug, is_active=True)
+    if not event.image:
+        raise Http404
+    if not images.generate_for_event(event):
+        # Another request or the worker holds the lock: serve the original
+        # rather than tie up this worker waiting for it.
+        return redirect(event.image.url)
+    return redirect(images.variant_url(event, width, fmt))
+
+
 # ─── Event CRUD (Admin) ─────────────────────────────────────────────────────
 
 @admin_required
@@ -154,19 +250,21 @@ def booking_create(request, slug):
         form = BookingForm(request.POST)
         if form.is_valid():
             guests = form.cleaned_data["number_of_guests"]
-            if guests > event.available_slots:
-                messages.error(
-                    request,
-                    f"Only {event.available_slots} slots available."
-                )
-            else:
-                booking = form.save(commit=False)
-                booking.user = request.user
-                booking.event = event
-                booking.total_amount = event.price * guests
-                booking.save()
+            with transaction.atomic():
+                reserved = event.reserve_seats(guests)
+                if reserved:
+                    booking = form.save(commit=False)
+                    booking.user = request.user
+                    booking.event = event
+                    booking.total_amount = event.price * guests
+                    booking.save()
+            if reserved:
                 messages.success(request, "Booking created! Please proceed to payment.")
                 return redirect("events:payment_checkout", booking_id=booking.pk)
+            messages.error(
+                request,
+                f"Only {event.available_slots} slots available."
+            )
     else:
         form = BookingForm()
     return render(request, "events/booking_form.html", {
@@ -178,7 +276,16 @@ def booking_create(request, slug):
 @login_required
 def booking_history(request):
     bookings = Booking.objects.filter(user=request.user).select_related("event", "payment")
-    return render(request, "events/booking_history.html", {"bookings": bookings})
+    page = paginate_keyset(
+        bookings, BOOKING_ORDERING,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=BOOKINGS_PER_PAGE,
+    )
+    return render(request, "events/booking_history.html", {
+        "bookings": page,
+        "page": page,
+    })
 
 
 @login_required
@@ -189,10 +296,14 @@ def booking_detail(request, pk):
 
 @login_required
 def booking_cancel(request, pk):
-    booking = get_object_or_404(Booking, pk=pk, user=request.user)
-    if booking.status == "pending":
-        booking.status = "cancelled"
-        booking.save()
+    with transaction.atomic():
+        booking = get_object_or_404(
+            Booking.objects.select_for_update(), pk=pk, user=request.user
+        )
+        cancelled = booking.status == "pending"
+        if cancelled:
+            booking.set_status("cancelled")
+    if cancelled:
         messages.success(request, "Booking cancelled successfully.")
     else:
         messages.error(request, "This booking cannot be cancelled.")
@@ -220,83 +331,137 @@ def payment_checkout(request, booking_id):
 
     # Demo mode: confirm booking directly if Razorpay not configured
     if not _razorpay_configured():
-        payment, _ = Payment.objects.get_or_create(
-            booking=booking,
-            defaults={"amount": booking.total_amount},
-        )
-        payment.razorpay_payment_id = "demo_payment"
-        payment.status = "success"
-        payment.save()
-        booking.status = "confirmed"
-        booking.save()
-        _send_booking_confirmation(booking)
+        with transaction.atomic():
+            booking = get_object_or_404(
+                Booking.objects.select_for_update(), pk=booking_id, user=request.user
+            )
+            if booking.status != "pending":
+                messages.error(request, "This booking cannot be paid for.")
+                return redirect("events:booking_history")
+            payment, _ = Payment.objects.get_or_create(
+                booking=booking,
+                defaults={"amount": booking.total_amount},
+            )
+            payment.booking = booking
+            payment.mark_success("demo_payment")
+            queue_booking_confirmation(booking)
         messages.success(request, "Booking confirmed! (Demo mode - Razorpay not configured)")
         return redirect("events:payment_success", booking_id=booking.pk)
 
     # Real Razorpay flow
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
     amount_in_paise = int(booking.total_amount * 100)
-
-    razorpay_order = client.order.create({
-        "amount": amount_in_paise,
-        "currency": "INR",
-        "payment_capture": "1",
-    })
-
-    payment, _ = Payment.objects.get_or_create(
-        booking=booking,
-        defaults={"amount": booking.total_amount},
-    )
-    payment.razorpay_order_id = razorpay_order["id"]
-    payment.save()
+    try:
+        payment = _get_or_create_order(booking, amount_in_paise)
+    except PaymentGatewayError:
+        messages.error(request, "Payment service is unavailable right now. Please try again shortly.")
+        return redirect("events:booking_history")
+    if payment is None:
+        messages.error(request, "This booking cannot be paid for.")
+        return redirect("events:booking_history")
 
     return render(request, "events/payment_checkout.html", {
         "booking": booking,
-        "razorpay_order_id": razorpay_order["id"],
+        "razorpay_order_id": payment.razorpay_order_id,
         "razorpay_key_id": settings.RAZORPAY_KEY_ID,
         "amount": amount_in_paise,
         "currency": "INR",
     })
 
 
+def _lock_pending_booking(booking):
+    """Lock the booking row; returns False if it is no longer pending."""
+    status = Booking.objects.select_for_update().values_list("status", flat=True).get(pk=booking.pk)
+    return status == "pending"
+
+
+def _get_or_create_order(booking, amount_in_paise):
+    """Return the booking's Payment with a usable Razorpay order, or None if
+    the booking stopped being pending.
+
+    Reloads reuse the stored order while its amount matches and it has not
+    expired. The booking row is locked only around the reads and writes, not
+    across the gateway call; when two checkouts race to create an order, the
+    first one stored wins and both pages render it.
+    """
+    with transaction.atomic():
+        if not _lock_pending_booking(booking):
+            return None
+        payment, _ = Payment.objects.get_or_create(
+            booking=booking,
+            defaults={"amount": booking.total_amount},
+        )
+        if payment.has_reusable_order(amount_in_paise):
+            return payment
+
+    razorpay_order = get_gateway().create_order(
+        amount_in_paise, currency="INR", receipt=f"booking_{booking.pk}"
+    )
+
+    with transaction.atomic():
+        if not _lock_pending_booking(booking):
+            return None
+        payment = Payment.objects.get(booking=booking)
+        if payment.has_reusable_order(amount_in_paise):
+            return payment
+        payment.amount = booking.total_amount
+        payment.razorpay_order_id = razorpay_order["id"]
+        payment.razorpay_order_amount = amount_in_paise
+        payment.razorpay_order_created_at = timezone.now()
+        payment.save()
+    return payment
+
+
 @csrf_exempt
 def payment_callback(request):
-    if request.method == "POST":
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        params_dict = {
-            "razorpay_order_id": request.POST.get("razorpay_order_id"),
-            "razorpay_payment_id": request.POST.get("razorpay_payment_id"),
-            "razorpay_signature": request.POST.get("razorpay_signature"),
-        }
-        try:
-            client.utility.verify_payment_signature(params_dict)
-            payment = Payment.objects.get(
-                razorpay_order_id=params_dict["razorpay_order_id"]
-            )
-            payment.razorpay_payment_id = params_dict["razorpay_payment_id"]
-            payment.razorpay_signature = params_dict["razorpay_signature"]
-            payment.status = "success"
-            payment.save()
-
-            payment.booking.status = "confirmed"
-            payment.booking.save()
-
-            # Send confirmation emails
-            _send_booking_confirmation(payment.booking)
-
-            return redirect("events:payment_success", booking_id=payment.booking.pk)
-        except Exception:
-            if params_dict["razorpay_order_id"]:
-                try:
-                    payment = Payment.objects.get(
-                        razorpay_order_id=params_dict["razorpay_order_id"]
-                    )
-                    payment.status = "failed"
-                    payment.save()
-                    return redirect("events:payment_failure", booking_id=payment.booking.pk)
-                except Payment.DoesNotExist:
-                    pass
-    return redirect("events:home")
+    if request.method != "POST":
+        return redirect("events:home")
+    params_dict = {
+        "razorpay_order_id": request.POST.get("razorpay_order_id"),
+        "razorpay_payment_id": request.POST.get("razorpay_payment_id"),
+        "razorpay_signature": request.POST.get("razorpay_signature"),
+    }
+    if not params_dict["razorpay_order_id"]:
+        return redirect("events:home")
+    verified = get_gateway().verify_payment_signature(params_dict)
+
+    with transaction.atomic():
+        payment = (
+            Payment.objects.select_related("booking__event", "booking__user")
+            .select_for_update(of=("self", "booking"))
+            .filter(razorpay_order_id=params_dict["razorpay_order_id"])
+            .first()
+        )
+        if payment is None:
+            return redirect("events:home")
+        booking = payment.booking
+        # A replayed callback for a completed payment changes nothing and
+        # does not queue a second confirmation email.
+        if payment.status != "success":
+            if verified:
+                payment.mark_success(
+                    params_dict["razorpay_payment_id"], params_dict["razorpay_signature"]
+                )
+                queue_booking_confirmation(booking)
+            else:
+                payment.mark_failed()
+
+    if payment.status == "success":
+        return redirect("events:payment_success", booking_id=booking.pk)
+    return redirect("events:payment_failure", booking_id=booking.pk)
+
+
+@csrf_exempt
+def payment_webhook(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    body = request.body.decode("utf-8", errors="replace")
+    signature = request.headers.get("X-Razorpay-Signature", "")
+    if not get_gateway().verify_webhook_signature(
+        body, signature, settings.RAZORPAY_WEBHOOK_SECRET
+    ):
+        return HttpResponseBadRequest("Invalid signature")
+    webhooks.enqueue(body, signature, request.headers.get("X-Razorpay-Event-Id"))
+    return HttpResponse(status=204)
 
 
 @login_required
@@ -315,16 +480,14 @@ def payment_failure(request, booking_id):
 
 @login_required
 def add_review(request, slug):
-    event = get_object_or_404(Event, slug=slug)
-
-    has_booking = Booking.objects.filter(
-        user=request.user, event=event, status="confirmed"
-    ).exists()
-    if not has_booking:
+    event = get_object_or_404(
+        Event.objects.with_review_eligibility(request.user), slug=slug
+    )
+    if not event.user_has_booking:
         messages.error(request, "You can only review events you have attended.")
         return redirect("events:event_detail", slug=slug)
 
-    if Review.objects.filter(user=request.user, event=event).exists():
+    if event.user_has_review:
         messages.error(request, "You have already reviewed this event.")
         return redirect("events:event_detail", slug=slug)
 
@@ -346,32 +509,39 @@ def add_review(request, slug):
 
 @admin_required
 def admin_dashboard(request):
-    total_users = User.objects.count()
-    total_bookings = Booking.objects.count()
-    total_revenue = Payment.objects.filter(status="success").aggregate(
-        total=Sum("amount")
-    )["total"] or 0
+    # Everything except recent bookings comes from the rollup tables, so the
+    # page reads a few hundred rows at most however much history there is.
+    totals = CategoryStats.objects.aggregate(
+        bookings=Sum("bookings"), revenue=Sum("revenue")
+    )
+    total_users = DailyStats.objects.aggregate(total=Sum("new_users"))["total"] or 0
     recent_bookings = (
         Booking.objects.select_related("user", "event")
         .order_by("-created_at")[:10]
     )
 
-    monthly_revenue_qs = list(
-        Payment.objects.filter(status="success")
-        .annotate(month=TruncMonth("created_at"))
+    today = timezone.localdate()
+    month = today.month - 5
+    first_month = today.replace(
+        year=today.year + (month - 1) // 12, month=(month - 1) % 12 + 1, day=1
+    )
+    monthly_revenue_qs = (
+        DailyStats.objects.filter(date__gte=first_month)
+        .annotate(month=TruncMonth("date"))
         .values("month")
-        .annotate(total=Sum("amount"))
+        .annotate(total=Sum("revenue"))
         .order_by("month")
-    )[-6:]
+    )
     # Serialize for Chart.js (datetime/Decimal not JSON-safe)
     monthly_revenue = json.dumps([
         {"month": item["month"].strftime("%Y-%m-%d"), "total": float(item["total"])}
         for item in monthly_revenue_qs
     ])
 
-    category_counts_qs = list(
-        Event.objects.values("category__name")
-        .annotate(count=Count("id"))
+    category_counts_qs = (
+        CategoryStats.objects.filter(events__gt=0)
+        .values("category__name")
+        .annotate(count=Sum("events"))
         .order_by("-count")
     )
     category_counts = json.dumps([
@@ -381,8 +551,8 @@ def admin_dashboard(request):
 
     return render(request, "events/admin_dashboard.html", {
         "total_users": total_users,
-        "total_bookings": total_bookings,
-        "total_revenue": total_revenue,
+        "total_bookings": totals["bookings"] or 0,
+        "total_revenue": totals["revenue"] or 0,
         "recent_bookings": recent_bookings,
         "monthly_revenue": monthly_revenue,
         "category_counts": category_counts,
@@ -416,21 +586,15 @@ def about(request):
     return render(request, "events/about.html")
 
 
-# ─── Email Helpers ───────────────────────────────────────────────────────────
-
-def _send_booking_confirmation(booking):
-    send_mail(
-        subject=f"Booking Confirmed - {booking.event.title}",
-        message=(
-            f"Hi {booking.user.first_name},\n\n"
-            f"Your booking for '{booking.event.title}' has been confirmed!\n\n"
-            f"Booking Details:\n"
-            f"- Event: {booking.event.title}\n"
-            f"- Date: {booking.booking_date}\n"
-            f"- Guests: {booking.number_of_guests}\n"
-            f"- Total Amount: Rs.{booking.total_amount}\n\n"
-            f"Thank you for using EventManager!"
-        ),
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[booking.user.email],
-    )
+# ─── Media ───────────────────────────────────────────────────────────────────
+
+def serve_media(request, path, document_root=None):
+    """Development media server; content-addressed files are cached for good.
+
+    In production the web server serves MEDIA_ROOT and should send the same
+    header for the ``IMMUTABLE_PREFIXES`` (see SETUP.md).
+    """
+    response = static_serve(request, path, document_root=document_root)
+    if response.status_code == 200 and path.startswith(IMMUTABLE_PREFIXES):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
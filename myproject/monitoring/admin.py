@@ -0,0 +1,29 @@
+from django.contrib import admin
+from .models import QueryFingerprint, SlowQuery
+
+
+@admin.register(QueryFingerprint)
+class QueryFingerprintAdmin(admin.ModelAdmin):
+    list_display = ["fingerprint", "short_statement", "count", "total_ms", "average_ms", "max_ms", "slow_count", "last_seen"]
+    search_fields = ["fingerprint", "statement"]
+    readonly_fields = ["fingerprint", "statement", "count", "total_ms", "max_ms", "slow_count", "first_seen", "last_seen"]
+
+    @admin.display(description="Statement")
+    def short_statement(self, obj):
+        return obj.statement[:120]
+
+    @admin.display(description="Average ms")
+    def average_ms(self, obj):
+        return round(obj.average_ms, 2)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ["created_at", "duration_ms", "view", "fingerprint", "short_sql"]
+    list_filter = ["view", "database"]
+    search_fields = ["fingerprint", "sql", "path"]
+    readonly_fields = ["fingerprint", "sql", "duration_ms", "database", "view", "path", "stack", "plan", "created_at"]
+
+    @admin.display(description="SQL")
+    def short_sql(self, obj):
+        return obj.sql[:120]
@@ -0,0 +1,98 @@
+import datetime
+import json
+import textwrap
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from monitoring.models import QueryFingerprint, SlowQuery
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query fingerprints with the most total time and the most "
+        "recent slow queries with their view, stack and EXPLAIN plan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="Fingerprints to list")
+        parser.add_argument("--slow", type=int, default=20, help="Slow queries to list")
+        parser.add_argument(
+            "--since",
+            type=float,
+            default=24,
+            help="Only fingerprints seen and slow queries captured in the last N hours",
+        )
+        parser.add_argument("--view", default="", help="Only slow queries from this view name")
+        parser.add_argument("--json", action="store_true", help="Write JSON instead of text")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - datetime.timedelta(hours=options["since"])
+        fingerprints = list(
+            QueryFingerprint.objects.filter(last_seen__gte=since)
+            .order_by("-total_ms")[:options["top"]]
+        )
+        slow = SlowQuery.objects.filter(created_at__gte=since)
+        if options["view"]:
+            slow = slow.filter(view=options["view"])
+        slow = list(slow.order_by("-id")[:options["slow"]])
+
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "fingerprints": [
+                    {
+                        "fingerprint": fp.fingerprint,
+                        "statement": fp.statement,
+                        "count": fp.count,
+                        "total_ms": fp.total_ms,
+                        "average_ms": fp.average_ms,
+                        "max_ms": fp.max_ms,
+                        "slow_count": fp.slow_count,
+                        "last_seen": fp.last_seen.isoformat(),
+                    }
+                    for fp in fingerprints
+                ],
+                "slow_queries": [
+                    {
+                        "id": query.pk,
+                        "created_at": query.created_at.isoformat(),
+                        "duration_ms": query.duration_ms,
+                        "database": query.database,
+                        "view": query.view,
+                        "path": query.path,
+                        "fingerprint": query.fingerprint,
+                        "sql": query.sql,
+                        "stack": query.stack,
+                        "plan": query.plan,
+                    }
+                    for query in slow
+                ],
+            }, indent=2))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Fingerprints by total time"))
+        self.stdout.write(
+            f"{'total':>10} {'count':>8} {'avg':>8} {'max':>8} {'slow':>5}  fingerprint       statement"
+        )
+        for fp in fingerprints:
+            self.stdout.write(
+                f"{fp.total_ms:>8.0f}ms {fp.count:>8} {fp.average_ms:>6.1f}ms {fp.max_ms:>6.0f}ms "
+                f"{fp.slow_count:>5}  {fp.fingerprint}  {fp.statement[:100]}"
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nSlow queries"))
+        for query in slow:
+            self.stdout.write(
+                f"#{query.pk} {query.created_at:%Y-%m-%d %H:%M:%S} {query.duration_ms:.1f}ms "
+                f"{query.view} {query.path} [{query.fingerprint}]"
+            )
+            self.stdout.write(textwrap.indent(query.sql, "    "))
+            if query.plan:
+                self.stdout.write("  Plan:")
+                self.stdout.write(textwrap.indent(query.plan, "    "))
+            if query.stack:
+                self.stdout.write("  Stack:")
+                self.stdout.write(textwrap.indent(query.stack.rstrip(), "  "))
+            self.stdout.write("")
+        if not fingerprints and not slow:
+            self.stdout.write("Nothing recorded in that window.")
@@ -0,0 +1,154 @@
+"""In-process metric registry rendered in the Prometheus text format.
+
+Each worker process keeps its own counters; scrape every worker (or run
+Prometheus against each one) and aggregate on the Prometheus side.
+"""
+
+import threading
+
+# Upper bounds (seconds) of the latency histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {
+                    "buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0,
+                }
+            series["sum"] += value
+            series["count"] += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+                    break
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: {**s, "buckets": list(s["buckets"])} for key, s in self._series.items()}
+        for label_values, s in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, s["buckets"]):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, [("le", _format_number(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {s['count']}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(s['sum'])}")
+            lines.append(f"{self.name}_count{labels} {s['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = dict(self._series)
+        for label_values, value in sorted(series.items()):
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}{labels} {_format_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, labels, buckets)
+            return self._metrics[name]
+
+    def counter(self, name, help_text, labels=()):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text, labels)
+            return self._metrics[name]
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "django_request_duration_seconds",
+    "Wall time of each request, by view.",
+    labels=("view", "method", "status"),
+)
+SQL_SECONDS = registry.histogram(
+    "django_request_sql_duration_seconds",
+    "Total SQL time per request, by view.",
+    labels=("view",),
+)
+SQL_QUERIES = registry.histogram(
+    "django_request_sql_queries",
+    "SQL statements per request, by view.",
+    labels=("view",),
+    buckets=COUNT_BUCKETS,
+)
+TEMPLATE_SECONDS = registry.histogram(
+    "django_request_template_duration_seconds",
+    "Template rendering time per request, by view.",
+    labels=("view",),
+)
+HTTP_SECONDS = registry.histogram(
+    "django_outbound_http_duration_seconds",
+    "Outbound HTTP calls made while serving requests, by view and host.",
+    labels=("view", "host"),
+)
+GATEWAY_SECONDS = registry.histogram(
+    "razorpay_gateway_call_duration_seconds",
+    "Razorpay API calls, by operation and outcome (ok or error).",
+    labels=("operation", "outcome"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+GATEWAY_SHORT_CIRCUITS = registry.counter(
+    "razorpay_gateway_short_circuited_total",
+    "Razorpay calls refused without a request while the circuit breaker was open.",
+    labels=("operation",),
+)
@@ -0,0 +1,140 @@
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+
+from . import metrics, profiler, queries, timing
+
+
+class InstrumentationMiddleware:
+    """Time each request and its SQL, template and outbound HTTP work.
+
+    Every request feeds the histograms in :mod:`monitoring.metrics` and the
+    SQL fingerprint statistics in :mod:`monitoring.queries`; staff users
+    additionally get the breakdown as a ``Server-Timing`` header (see
+    :class:`ServerTimingMiddleware`), which browser dev tools show in the
+    network panel. Place it near the top of ``MIDDLEWARE`` so the total covers
+    the other middleware too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.RequestTimings()
+        token = timing.activate(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+        total = timings.elapsed()
+
+        view = self._view_name(request)
+        metrics.REQUEST_SECONDS.observe(total, view, request.method, str(response.status_code))
+        metrics.SQL_SECONDS.observe(timings.sql_seconds, view)
+        metrics.SQL_QUERIES.observe(timings.sql_count, view)
+        metrics.TEMPLATE_SECONDS.observe(timings.template_seconds, view)
+        for host, seconds in timings.http_calls:
+            metrics.HTTP_SECONDS.observe(seconds, view, host)
+        # Stored with their EXPLAIN by the writer thread, off this request.
+        if timings.slow_queries:
+            queries.writer.submit(timings.slow_queries, view, request.get_full_path())
+
+        if timings.server_timing:
+            response["Server-Timing"] = self.server_timing(timings, total)
+            patch_vary_headers(response, ("Cookie",))
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else "<unresolved>"
+
+    @staticmethod
+    def server_timing(timings, total):
+        entries = [
+            f"total;dur={total * 1000:.1f}",
+            f'sql;dur={timings.sql_seconds * 1000:.1f};desc="SQL ({timings.sql_count} queries)"',
+            f'tpl;dur={timings.template_seconds * 1000:.1f};desc="Templates"',
+        ]
+        if timings.http_calls:
+            entries.append(
+                f'http;dur={timings.http_seconds * 1000:.1f};'
+                f'desc="Outbound HTTP ({len(timings.http_calls)} calls)"'
+            )
+        return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """Mark staff requests for the ``Server-Timing`` header added by
+    ``InstrumentationMiddleware``. Place it right after
+    ``AuthenticationMiddleware``, so the user lookup happens inside the
+    request's SQL timing rather than after the response is built.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.current()
+        # Without a session cookie there is no user to load.
+        if (
+            timings is not None
+            and settings.SESSION_COOKIE_NAME in request.COOKIES
+            and request.user.is_staff
+        ):
+            timings.server_timing = True
+        return self.get_response(request)
+
+
+class ProfilerMiddleware:
+    """Profile a single request when a staff user asks for it.
+
+    Add ``?_profile=1`` to the URL or send an ``X-Profile: 1`` header. The
+    response carries ``X-Profile-Id`` and ``X-Profile-Url`` pointing at the
+    stored profile. Place it after ``AuthenticationMiddleware`` and below
+    ``InstrumentationMiddleware``, whose timings supply the SQL and template
+    detail.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Only look at the user once profiling is asked for: loading it costs
+        # a session query on pages that would not otherwise need one.
+        if not profiler.requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        timings = timing.current()
+        if timings is not None:
+            timings.record_details()
+        sampler = profiler.StackSampler(
+            threading.get_ident(),
+            sys._getframe(),
+            getattr(settings, "MONITORING_PROFILER_INTERVAL", 0.001),
+        )
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        seconds = time.perf_counter() - start
+
+        profile_id = profiler.save(
+            profiler.build_profile(request, response, seconds, sampler, timings)
+        )
+        response["X-Profile-Id"] = str(profile_id)
+        response["X-Profile-Url"] = reverse("monitoring:profile_detail", args=[profile_id])
+        return response
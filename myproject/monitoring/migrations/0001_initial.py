@@ -0,0 +1,65 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="QueryFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=16, unique=True)),
+                ("statement", models.TextField()),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                ("total_ms", models.FloatField(default=0)),
+                ("max_ms", models.FloatField(default=0)),
+                ("slow_count", models.PositiveIntegerField(default=0)),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["-total_ms"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(db_index=True, max_length=16)),
+                ("sql", models.TextField()),
+                ("duration_ms", models.FloatField()),
+                ("database", models.CharField(max_length=100)),
+                ("view", models.CharField(max_length=200)),
+                ("path", models.CharField(max_length=500)),
+                ("stack", models.TextField(blank=True)),
+                ("plan", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name_plural": "Slow queries",
+                "ordering": ["-id"],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import models
+
+
+class QueryFingerprint(models.Model):
+    """Running totals for every SQL statement of the same shape.
+
+    Statements are grouped by :func:`monitoring.queries.fingerprint`, which
+    replaces literals and placeholder lists; each process adds its counts every
+    ``MONITORING_QUERY_STATS_INTERVAL`` seconds.
+    """
+
+    fingerprint = models.CharField(max_length=16, unique=True)
+    statement = models.TextField()
+    count = models.PositiveBigIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    slow_count = models.PositiveIntegerField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-total_ms"]
+
+    def __str__(self):
+        return f"{self.fingerprint}: {self.statement[:80]}"
+
+    @property
+    def average_ms(self):
+        return self.total_ms / self.count if self.count else 0
+
+
+class SlowQuery(models.Model):
+    """One statement that ran longer than ``MONITORING_SLOW_QUERY_MS``.
+
+    Parameters are not stored; the plan is taken with them right after the
+    request finishes.
+    """
+
+    fingerprint = models.CharField(max_length=16, db_index=True)
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=100)
+    view = models.CharField(max_length=200)
+    path = models.CharField(max_length=500)
+    stack = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name_plural = "Slow queries"
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms in {self.view}"
@@ -0,0 +1,194 @@
+"""On-demand sampling profiler for single staff requests.
+
+``ProfilerMiddleware`` runs a :class:`StackSampler` thread for the duration of
+a request that asks for it. Every ``MONITORING_PROFILER_INTERVAL`` seconds the
+sampler records the request thread's Python stack; the stacks are counted in
+the "collapsed" format used by flamegraph.pl, speedscope and inferno
+(``outer;inner;leaf count``), so the export needs no conversion.
+
+Finished profiles, together with the request's SQL and template timings, are
+kept in the default cache as a ring buffer of the last
+``MONITORING_PROFILER_KEEP`` entries; with several workers that cache must be
+shared (the ``events.W001`` check), or the list only shows the profiles of
+whichever worker serves it. Requests that do not ask to be profiled
+only pay for the check of the query string and header.
+"""
+
+import os
+import sys
+import sysconfig
+import threading
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+QUERY_PARAM = "_profile"
+HEADER = "X-Profile"
+
+SEQUENCE_KEY = "monitoring:profiles:seq"
+SLOT_KEY = "monitoring:profiles:slot:{}"
+
+# Statements kept per profile; the count and total time cover all of them.
+MAX_QUERIES = 500
+
+
+def requested(request):
+    return bool(request.GET.get(QUERY_PARAM) or request.headers.get(HEADER))
+
+
+@lru_cache(maxsize=4096)
+def _frame_label(code):
+    filename = code.co_filename
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        _, found, rest = filename.rpartition(marker)
+        if found:
+            filename = rest
+            break
+    else:
+        for base in (str(settings.BASE_DIR), sysconfig.get_path("stdlib")):
+            if filename.startswith(base + os.sep):
+                filename = filename[len(base) + 1:]
+                break
+    # ";" separates frames in the collapsed format.
+    # co_qualname is new in Python 3.11.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler(threading.Thread):
+    """Count the stacks one thread passes through below ``root_frame``."""
+
+    def __init__(self, thread_id, root_frame, interval):
+        super().__init__(name="monitoring-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root_frame:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            # Samples taken outside the profiled call, or while stop() is
+            # waiting for this thread, are not part of it.
+            if frame is not None and stack and not self._stopped.is_set():
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        self.root_frame = None
+
+
+def build_profile(request, response, seconds, sampler, timings):
+    match = getattr(request, "resolver_match", None)
+    profile = {
+        "created_at": timezone.now(),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "view": match.view_name if match else "<unresolved>",
+        "status": response.status_code,
+        "user": request.user.get_username(),
+        "total_ms": seconds * 1000,
+        "interval_ms": sampler.interval * 1000,
+        "samples": dict(sampler.counts),
+        "query_count": 0,
+        "sql_ms": 0.0,
+        "queries": [],
+        "templates": [],
+        "http": [],
+    }
+    if timings is not None and timings.queries is not None:
+        profile["query_count"] = len(timings.queries)
+        profile["sql_ms"] = sum(seconds for _, _, seconds in timings.queries) * 1000
+        profile["queries"] = [
+            {"sql": sql, "many": many, "ms": seconds * 1000}
+            for sql, many, seconds in timings.queries[:MAX_QUERIES]
+        ]
+        profile["templates"] = [
+            {"name": name, "depth": depth, "ms": seconds * 1000}
+            for name, depth, seconds in timings.templates
+        ]
+        profile["http"] = [
+            {"host": host, "ms": seconds * 1000} for host, seconds in timings.http_calls
+        ]
+    return profile
+
+
+# ─── Ring Buffer ─────────────────────────────────────────────────────────────
+
+
+def _keep():
+    return max(1, getattr(settings, "MONITORING_PROFILER_KEEP", 50))
+
+
+def save(profile):
+    """Store ``profile`` in the next slot, overwriting the oldest, and return its id."""
+    try:
+        profile_id = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, timeout=None)
+        profile_id = cache.incr(SEQUENCE_KEY)
+    profile["id"] = profile_id
+    cache.set(SLOT_KEY.format(profile_id % _keep()), profile, timeout=None)
+    return profile_id
+
+
+def recent():
+    slots = cache.get_many([SLOT_KEY.format(slot) for slot in range(_keep())])
+    return sorted(slots.values(), key=lambda profile: profile["id"], reverse=True)
+
+
+def get(profile_id):
+    profile = cache.get(SLOT_KEY.format(profile_id % _keep()))
+    if profile is None or profile["id"] != profile_id:
+        return None
+    return profile
+
+
+# ─── Views Of A Profile ──────────────────────────────────────────────────────
+
+
+def collapsed(profile):
+    """The samples as collapsed stacks, one ``frame;frame;frame count`` per line."""
+    return "".join(
+        f"{stack} {count}\n" for stack, count in sorted(profile["samples"].items())
+    )
+
+
+def call_tree(profile, min_share=0.01):
+    """Flatten the sampled call tree into ``(depth, frame, samples, share)`` rows.
+
+    Children are ordered by samples; branches under ``min_share`` of the total
+    are dropped to keep deep framework stacks readable.
+    """
+    root = {"count": 0, "children": {}}
+    for stack, count in profile["samples"].items():
+        root["count"] += count
+        node = root
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"count": 0, "children": {}})
+            node["count"] += count
+
+    total = root["count"]
+    rows = []
+
+    def walk(node, depth):
+        children = sorted(node["children"].items(), key=lambda item: -item[1]["count"])
+        for frame, child in children:
+            share = child["count"] / total
+            if share < min_share:
+                continue
+            rows.append((depth, frame, child["count"], share))
+            walk(child, depth + 1)
+
+    if total:
+        walk(root, 0)
+    return rows
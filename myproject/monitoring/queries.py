@@ -0,0 +1,329 @@
+"""SQL fingerprints, per-fingerprint statistics and slow-query capture.
+
+Every statement run while ``InstrumentationMiddleware`` is active is added to
+this process's pending totals. Every ``MONITORING_QUERY_STATS_INTERVAL``
+seconds they are reduced to fingerprints (literals and placeholder lists
+replaced) and written to :class:`QueryFingerprint`. Statements slower than
+``MONITORING_SLOW_QUERY_MS`` also keep the project frames that issued them,
+and are stored as :class:`SlowQuery` rows with an ``EXPLAIN`` of the
+statement.
+
+The database work happens on a :class:`BackgroundWriter` thread, started by
+the WSGI/ASGI entry points; a request only adds to in-memory buffers.
+Processes that never start it (tests, management commands) keep the totals
+in memory until :meth:`BackgroundWriter.drain` is called.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, models, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_VALUE_LIST = re.compile(r"\(\?(?:, ?\?)+\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:, ?\(\.\.\.\))+")
+
+_MONITORING_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Return ``(fingerprint, normalized statement)`` for ``sql``.
+
+    ``IN (%s, %s, ...)`` lists and multi-row ``VALUES`` collapse to ``(...)``
+    so statements that differ only in the number of values group together.
+    """
+    statement = _STRING.sub("?", sql).replace("%s", "?")
+    statement = _NUMBER.sub("?", statement)
+    statement = _SPACE.sub(" ", statement).strip()
+    statement = _VALUE_LIST.sub("(...)", statement)
+    statement = _REPEATED_LISTS.sub("(...), ...", statement)
+    return hashlib.sha1(statement.encode()).hexdigest()[:16], statement
+
+
+def slow_threshold():
+    """Milliseconds above which a statement is captured, or None when disabled."""
+    return getattr(settings, "MONITORING_SLOW_QUERY_MS", 100)
+
+
+def project_stack():
+    """The frames of this project's own code, outermost first, as text."""
+    base = str(settings.BASE_DIR) + os.sep
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base)
+        and not frame.filename.startswith(_MONITORING_DIR)
+        and "-packages" + os.sep not in frame.filename
+    ]
+    return "".join(traceback.format_list(frames))
+
+
+class SlowStatement:
+    def __init__(self, sql, params, many, seconds, alias):
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.seconds = seconds
+        self.alias = alias
+        self.stack = project_stack()
+
+
+# ─── Fingerprint Statistics ──────────────────────────────────────────────────
+
+
+class QueryStats:
+    """This process's totals per statement since the last flush, keyed by
+    the SQL text; fingerprinting waits for the flush."""
+
+    # Distinct statements held before a flush is due regardless of the
+    # interval; further new statements are dropped until it has run.
+    MAX_PENDING = 5000
+
+    def __init__(self):
+        self._pending = {}
+        self._next_flush = None
+        self._lock = threading.Lock()
+
+    def add(self, sql, seconds, slow):
+        interval = self._interval()
+        if interval is None:
+            return
+        with self._lock:
+            entry = self._pending.get(sql)
+            if entry is None:
+                if len(self._pending) >= self.MAX_PENDING:
+                    return
+                entry = self._pending[sql] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += slow
+            if self._next_flush is None:
+                self._next_flush = time.monotonic() + interval
+            elif len(self._pending) >= self.MAX_PENDING:
+                self._next_flush = time.monotonic()
+            else:
+                return
+        # Let the writer thread pick up the new flush time.
+        writer.wake()
+
+    def take(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._next_flush = None
+        return pending
+
+    def until_due(self):
+        """Seconds until the next flush, or None when nothing is pending."""
+        next_flush = self._next_flush
+        return None if next_flush is None else max(next_flush - time.monotonic(), 0)
+
+    def flush_if_due(self):
+        """Write the pending totals if the flush interval has passed."""
+        if self._interval() is None or self.until_due() != 0:
+            return
+        try:
+            flush(self.take())
+        except DatabaseError:
+            logger.exception("Could not write query statistics")
+
+    @staticmethod
+    def _interval():
+        return getattr(settings, "MONITORING_QUERY_STATS_INTERVAL", 60)
+
+
+stats = QueryStats()
+
+
+def flush(pending):
+    from .models import QueryFingerprint
+
+    totals = {}
+    for sql, (count, seconds, max_seconds, slow) in pending.items():
+        key, statement = fingerprint(sql)
+        entry = totals.setdefault(key, [statement, 0, 0.0, 0.0, 0])
+        entry[1] += count
+        entry[2] += seconds
+        entry[3] = max(entry[3], max_seconds)
+        entry[4] += slow
+
+    now = timezone.now()
+    for key, (statement, count, seconds, max_seconds, slow) in totals.items():
+        values = {
+            "count": models.F("count") + count,
+            "total_ms": models.F("total_ms") + seconds * 1000,
+            "max_ms": Greatest("max_ms", models.Value(max_seconds * 1000)),
+            "slow_count": models.F("slow_count") + slow,
+            "last_seen": now,
+        }
+        if QueryFingerprint.objects.filter(fingerprint=key).update(**values):
+            continue
+        try:
+            with transaction.atomic():
+                QueryFingerprint.objects.create(
+                    fingerprint=key,
+                    statement=statement,
+                    count=count,
+                    total_ms=seconds * 1000,
+                    max_ms=max_seconds * 1000,
+                    slow_count=slow,
+                    last_seen=now,
+                )
+        except IntegrityError:
+            # Another process created the row first.
+            QueryFingerprint.objects.filter(fingerprint=key).update(**values)
+
+
+# ─── Slow Queries ────────────────────────────────────────────────────────────
+
+
+def explain(statement):
+    """The database's plan for a slow SELECT, as text."""
+    if statement.many or not statement.sql.lstrip().upper().startswith("SELECT"):
+        return ""
+    connection = connections[statement.alias]
+    try:
+        with transaction.atomic(using=statement.alias), connection.cursor() as cursor:
+            cursor.execute(
+                f"{connection.ops.explain_query_prefix()} {statement.sql}", statement.params
+            )
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    lines = [" | ".join(columns)]
+    lines.extend(" | ".join(str(value) for value in row) for row in rows)
+    return "\n".join(lines)
+
+
+def capture(statements, view, path):
+    """Store a finished request's slow statements, keeping the newest
+    ``MONITORING_SLOW_QUERY_KEEP`` rows."""
+    from .models import SlowQuery
+
+    rows = [
+        SlowQuery(
+            fingerprint=fingerprint(statement.sql)[0],
+            sql=statement.sql,
+            duration_ms=statement.seconds * 1000,
+            database=statement.alias,
+            view=view[:200],
+            path=path[:500],
+            stack=statement.stack,
+            plan=explain(statement),
+        )
+        for statement in statements
+    ]
+    keep = getattr(settings, "MONITORING_SLOW_QUERY_KEEP", 1000)
+    try:
+        SlowQuery.objects.bulk_create(rows)
+        oldest_kept = list(
+            SlowQuery.objects.order_by("-id").values_list("id", flat=True)[keep - 1:keep]
+        )
+        if oldest_kept:
+            SlowQuery.objects.filter(id__lt=oldest_kept[0]).delete()
+    except DatabaseError:
+        logger.exception("Could not store slow queries")
+
+
+# ─── Background Writer ───────────────────────────────────────────────────────
+
+
+class BackgroundWriter:
+    """Daemon thread that flushes the fingerprint totals and stores slow
+    queries, with their EXPLAIN, off the request threads. Once started it is
+    restarted on next use in a forked worker."""
+
+    # Requests' slow statements waiting to be stored; the oldest are dropped
+    # if the database cannot keep up.
+    MAX_CAPTURES = 100
+
+    def __init__(self):
+        self._captures = deque(maxlen=self.MAX_CAPTURES)
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._enabled = False
+        self._stopping = False
+
+    def submit(self, statements, view, path):
+        self._captures.append((statements, view, path))
+        self.wake()
+
+    def wake(self):
+        if self._enabled:
+            self._start_thread()
+        self._wake.set()
+
+    def start(self):
+        self._enabled = True
+        self._start_thread()
+
+    def _start_thread(self):
+        if self._running():
+            return
+        with self._lock:
+            if not self._running():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="monitoring-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        """Stop the thread after its current round; anything still queued
+        stays for :meth:`drain` or the next :meth:`start`."""
+        with self._lock:
+            self._enabled = False
+            thread, self._thread = self._thread, None
+            if thread is None or not self._running_thread(thread):
+                return
+            self._stopping = True
+            self._wake.set()
+            thread.join(timeout=5)
+            self._stopping = False
+
+    def _running_thread(self, thread):
+        return self._pid == os.getpid() and thread.is_alive()
+
+    def _running(self):
+        return self._thread is not None and self._running_thread(self._thread)
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=stats.until_due())
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Monitoring writer failed")
+            finally:
+                # This thread's own connections; requests never use them.
+                connections.close_all()
+
+    def drain(self):
+        """Store queued slow queries and flush the totals if they are due."""
+        while self._captures:
+            capture(*self._captures.popleft())
+        stats.flush_if_due()
+
+
+writer = BackgroundWriter()
@@ -0,0 +1,199 @@
+import time
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from . import profiler, queries
+from .metrics import Counter, Histogram
+from .models import QueryFingerprint, SlowQuery
+
+
+class HistogramTests(TestCase):
+    def test_prometheus_rendering(self):
+        histogram = Histogram("demo_seconds", "Demo.", labels=("view",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, 'a"b')
+        histogram.observe(0.5, 'a"b')
+        self.assertEqual(histogram.render(), [
+            "# HELP demo_seconds Demo.",
+            "# TYPE demo_seconds histogram",
+            'demo_seconds_bucket{view="a\\"b",le="0.1"} 1',
+            'demo_seconds_bucket{view="a\\"b",le="1.0"} 2',
+            'demo_seconds_bucket{view="a\\"b",le="+Inf"} 2',
+            'demo_seconds_sum{view="a\\"b"} 0.55',
+            'demo_seconds_count{view="a\\"b"} 2',
+        ])
+
+    def test_counter_rendering(self):
+        counter = Counter("demo_total", "Demo.", labels=("op",))
+        counter.inc("b")
+        counter.inc("a", amount=2)
+        counter.inc("b")
+        self.assertEqual(counter.render(), [
+            "# HELP demo_total Demo.",
+            "# TYPE demo_total counter",
+            'demo_total{op="a"} 2',
+            'demo_total{op="b"} 2',
+        ])
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", "staff@example.com", "pw", is_staff=True)
+
+    def test_server_timing_only_for_staff(self):
+        response = self.client.get(reverse("events:faq"))
+        self.assertNotIn("Server-Timing", response)
+        self.client.force_login(self.staff)
+        header = self.client.get(reverse("events:faq"))["Server-Timing"]
+        self.assertRegex(header, r'^total;dur=[\d.]+, sql;dur=[\d.]+;desc="SQL \(\d+ queries\)", tpl;')
+
+    def test_user_is_loaded_inside_the_timing(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("events:faq"))
+        self.assertIn("Cookie", response["Vary"])
+        # The FAQ query plus the session and user lookups.
+        self.assertIn('desc="SQL (3 queries)"', response["Server-Timing"])
+
+    def test_no_user_lookup_without_a_session_cookie(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("events:faq"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(MONITORING_METRICS_TOKEN="scrape-token")
+    def test_metrics_endpoint_access(self):
+        self.client.get(reverse("events:faq"))
+        url = reverse("monitoring:metrics")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertContains(response, 'django_request_duration_seconds_count{view="events:faq"')
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@override_settings(MONITORING_PROFILER_KEEP=3, MONITORING_PROFILER_INTERVAL=0.0005)
+class ProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user("staff", "staff@example.com", "pw", is_staff=True)
+
+    def test_only_staff_requests_that_ask_are_profiled(self):
+        url = reverse("events:event_list")
+        self.assertNotIn("X-Profile-Id", self.client.get(f"{url}?_profile=1"))
+        self.client.force_login(self.staff)
+        self.assertNotIn("X-Profile-Id", self.client.get(url))
+        self.assertIn("X-Profile-Id", self.client.get(url, HTTP_X_PROFILE="1"))
+
+    def test_profile_is_stored_and_browsable(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("events:event_list") + "?_profile=1")
+        profile = profiler.get(int(response["X-Profile-Id"]))
+        self.assertEqual(profile["view"], "events:event_list")
+        self.assertTrue(profile["queries"])
+        self.assertEqual(profile["templates"][0]["name"], "events/event_list.html")
+        self.assertGreater(profile["templates"][0]["ms"], 0)
+
+        detail = self.client.get(response["X-Profile-Url"])
+        self.assertContains(detail, "events/event_list.html")
+        collapsed = self.client.get(
+            reverse("monitoring:profile_collapsed", args=[profile["id"]])
+        ).content.decode()
+        for line in collapsed.splitlines():
+            self.assertRegex(line, r"^\S.* \d+$")
+        self.assertContains(self.client.get(reverse("monitoring:profile_list")), "events:event_list")
+
+    def test_ring_buffer_keeps_the_latest_profiles(self):
+        self.client.force_login(self.staff)
+        ids = [
+            int(self.client.get(reverse("events:faq"), HTTP_X_PROFILE="1")["X-Profile-Id"])
+            for _ in range(5)
+        ]
+        self.assertEqual([profile["id"] for profile in profiler.recent()], ids[:1:-1])
+        self.assertIsNone(profiler.get(ids[0]))
+        response = self.client.get(reverse("monitoring:profile_detail", args=[ids[0]]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_call_tree_and_collapsed_export(self):
+        profile = {"samples": {"view;query": 3, "view;render": 1, "other": 1}}
+        self.assertEqual(profiler.collapsed(profile), "other 1\nview;query 3\nview;render 1\n")
+        self.assertEqual(profiler.call_tree(profile, min_share=0.25), [
+            (0, "view", 4, 0.8),
+            (1, "query", 3, 0.6),
+        ])
+
+
+    def test_frame_labels_without_co_qualname(self):
+        class Python310Code:  # code objects gained co_qualname in 3.11
+            co_name = "handle"
+            co_filename = "/srv/app/tasks.py"
+            co_firstlineno = 12
+
+        self.assertEqual(profiler._frame_label(Python310Code()), "handle (/srv/app/tasks.py:12)")
+
+
+class QueryCaptureTests(TestCase):
+    def setUp(self):
+        # No writer thread runs under the test runner; these tests drain by
+        # hand, after dropping whatever earlier tests left queued.
+        queries.writer._captures.clear()
+        queries.stats.take()
+
+    def test_fingerprint_ignores_values(self):
+        fp, statement = queries.fingerprint(
+            "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"
+        )
+        self.assertEqual(statement, "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?")
+        self.assertEqual(fp, queries.fingerprint(
+            "SELECT *  FROM t\nWHERE id IN (%s, %s) AND name = 'it''s' LIMIT 5"
+        )[0])
+        self.assertEqual(
+            queries.fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)")[1],
+            "INSERT INTO t (a, b) VALUES (...), ...",
+        )
+        self.assertNotEqual(fp, queries.fingerprint("SELECT * FROM t WHERE id = %s")[0])
+
+    @override_settings(MONITORING_SLOW_QUERY_MS=0, MONITORING_SLOW_QUERY_KEEP=3)
+    def test_slow_queries_are_captured_with_plan_and_stack(self):
+        for _ in range(4):
+            self.client.get(reverse("events:faq"))
+        self.assertFalse(SlowQuery.objects.exists(), "written by the writer, not the request")
+        queries.writer.drain()
+        captured = list(SlowQuery.objects.all())
+        self.assertEqual(len(captured), 3)
+        query = captured[0]
+        self.assertEqual(query.view, "events:faq")
+        self.assertTrue(query.sql.startswith("SELECT"))
+        self.assertIn("events/views.py", query.stack)
+        self.assertTrue(query.plan)
+        self.assertNotIn("EXPLAIN failed", query.plan)
+
+        out = StringIO()
+        call_command("dump_slow_queries", stdout=out)
+        self.assertIn("events:faq", out.getvalue())
+
+    @override_settings(MONITORING_QUERY_STATS_INTERVAL=0)
+    def test_fingerprint_totals_are_flushed(self):
+        self.client.get(reverse("events:faq"))
+        self.client.get(reverse("events:faq"))
+        self.assertFalse(QueryFingerprint.objects.exists())
+        queries.writer.drain()
+        faq = QueryFingerprint.objects.get(statement__contains="events_faq")
+        self.assertEqual(faq.count, 2)
+        self.assertGreaterEqual(faq.total_ms, faq.max_ms)
+
+
+@override_settings(MONITORING_SLOW_QUERY_MS=0, MONITORING_QUERY_STATS_INTERVAL=None)
+class BackgroundWriterTests(TransactionTestCase):
+    def setUp(self):
+        queries.writer.start()
+        self.addCleanup(queries.writer.stop)
+
+    def test_slow_queries_are_stored_by_the_writer_thread(self):
+        self.client.get(reverse("events:faq"))
+        deadline = time.monotonic() + 5
+        while not SlowQuery.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(SlowQuery.objects.first().view, "events:faq")
@@ -0,0 +1,139 @@
+"""Per-request breakdown of where the time goes.
+
+``InstrumentationMiddleware`` opens a :class:`RequestTimings` for each request
+and makes it current for the request's context. SQL is timed through
+``connection.execute_wrapper``; template rendering and outbound HTTP (the
+Razorpay client uses ``requests``) are timed by the hooks installed from
+``MonitoringConfig.ready()``, which do nothing outside a request.
+"""
+
+import time
+from contextvars import ContextVar
+from functools import wraps
+from urllib.parse import urlsplit
+
+from . import queries
+
+_current = ContextVar("monitoring_request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.http_calls = []  # [(host, seconds), ...]
+        self.slow_queries = []  # [queries.SlowStatement, ...]
+        # Set by ServerTimingMiddleware for staff users.
+        self.server_timing = False
+        # Per-statement and per-template detail, only kept while profiling.
+        self.queries = None
+        self.templates = None
+        self._template_depth = 0
+
+    def record_details(self):
+        self.queries = []
+        self.templates = []
+
+    @property
+    def http_seconds(self):
+        return sum(seconds for _, seconds in self.http_calls)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return _current.get()
+
+
+def activate(timings):
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook adding each statement's time and
+    feeding the per-fingerprint statistics."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        timings.sql_count += 1
+        timings.sql_seconds += seconds
+        if timings.queries is not None:
+            timings.queries.append((sql, many, seconds))
+        threshold = queries.slow_threshold()
+        slow = threshold is not None and seconds * 1000 >= threshold
+        queries.stats.add(sql, seconds, slow)
+        if slow:
+            timings.slow_queries.append(queries.SlowStatement(
+                sql, params, many, seconds, context["connection"].alias
+            ))
+
+
+def _timed_template_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        timings = _current.get()
+        if timings is None:
+            return render(self, context)
+        # {% include %} and {% extends %} render nested templates; only the
+        # outermost render is timed so nothing is counted twice.
+        entry = None
+        if timings.templates is not None:
+            entry = [self.name or "<string>", timings._template_depth, 0.0]
+            timings.templates.append(entry)
+        timings._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            seconds = time.perf_counter() - start
+            timings._template_depth -= 1
+            if not timings._template_depth:
+                timings.template_seconds += seconds
+            if entry is not None:
+                entry[2] = seconds
+
+    wrapper._monitoring_hook = True
+    return wrapper
+
+
+def _timed_http_send(send):
+    @wraps(send)
+    def wrapper(self, request, *args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return send(self, request, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return send(self, request, *args, **kwargs)
+        finally:
+            host = urlsplit(request.url).hostname or "unknown"
+            timings.http_calls.append((host, time.perf_counter() - start))
+
+    wrapper._monitoring_hook = True
+    return wrapper
+
+
+def install_hooks():
+    from django.template.base import Template
+
+    if not getattr(Template.render, "_monitoring_hook", False):
+        Template.render = _timed_template_render(Template.render)
+
+    try:
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        return
+    if not getattr(HTTPAdapter.send, "_monitoring_hook", False):
+        HTTPAdapter.send = _timed_http_send(HTTPAdapter.send)
@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+app_name = "monitoring"
+
+urlpatterns = [
+    path("metrics/", views.metrics_view, name="metrics"),
+    path("profiles/", views.profile_list, name="profile_list"),
+    path("profiles/<int:profile_id>/", views.profile_detail, name="profile_detail"),
+    path(
+        "profiles/<int:profile_id>/collapsed.txt",
+        views.profile_collapsed,
+        name="profile_collapsed",
+    ),
+]
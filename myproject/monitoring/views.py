@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from accounts.decorators import admin_required
+from . import metrics, profiler
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _has_scrape_token(request):
+    token = getattr(settings, "MONITORING_METRICS_TOKEN", "")
+    return bool(token) and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: staff sessions, or the configured bearer token."""
+    if _has_scrape_token(request):
+        return _render_metrics(request)
+    return admin_required(_render_metrics)(request)
+
+
+def _render_metrics(request):
+    return HttpResponse(metrics.registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# ─── Profiles ────────────────────────────────────────────────────────────────
+
+
+def _get_profile(profile_id):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise Http404("Profile not found; it may have been overwritten by newer ones")
+    return profile
+
+
+@admin_required
+def profile_list(request):
+    return render(request, "monitoring/profile_list.html", {
+        "profiles": profiler.recent(),
+        "query_param": profiler.QUERY_PARAM,
+        "header": profiler.HEADER,
+    })
+
+
+@admin_required
+def profile_detail(request, profile_id):
+    profile = _get_profile(profile_id)
+    return render(request, "monitoring/profile_detail.html", {
+        "profile": profile,
+        "sample_count": sum(profile["samples"].values()),
+        "call_tree": profiler.call_tree(profile),
+    })
+
+
+@admin_required
+def profile_collapsed(request, profile_id):
+    """Collapsed stacks for flamegraph.pl, speedscope or inferno."""
+    response = HttpResponse(
+        profiler.collapsed(_get_profile(profile_id)), content_type="text/plain; charset=utf-8"
+    )
+    response["Content-Disposition"] = f'attachment; filename="profile-{profile_id}.collapsed.txt"'
+    return response
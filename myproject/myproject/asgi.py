@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
 
 application = get_asgi_application()
+
+# Query statistics and slow queries are written by a thread in each serving
+# process; see monitoring.queries.
+from monitoring.queries import writer  # noqa: E402
+
+writer.start()
@@ -26,14 +26,19 @@ INSTALLED_APPS = [
     # Local apps
     "accounts",
     "events",
+    "monitoring",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "myproject.static_assets.StaticAssetsMiddleware",
+    "monitoring.middleware.InstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "monitoring.middleware.ServerTimingMiddleware",
+    "monitoring.middleware.ProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -69,6 +74,15 @@ DATABASES = {
     }
 }
 
+# Cache - per-process memory by default. Point this at a shared backend
+# (e.g. Redis or Memcached) when running several workers so cached
+# category lists and their version keys are shared between them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -86,6 +100,19 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic writes content-hashed copies plus .gz/.br siblings (brotli is
+# optional); see myproject/static_assets.py. Development links the source
+# files, as it has no manifest to look names up in; tests that need the
+# manifest storage select it with override_settings.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "myproject.static_assets.CompressedManifestStaticFilesStorage"},
+}
+if DEBUG:
+    STORAGES["staticfiles"] = {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    }
+
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -118,3 +145,35 @@ DEFAULT_FROM_EMAIL = "noreply@eventmanagement.com"
 # Razorpay (placeholder test keys)
 RAZORPAY_KEY_ID = "rzp_test_XXXXXXXXXXXXXX"
 RAZORPAY_KEY_SECRET = "XXXXXXXXXXXXXXXXXXXXXXXX"
+# (connect, read) timeouts in seconds for every Razorpay API call
+RAZORPAY_TIMEOUT = (3.05, 10)
+# Seconds a Razorpay order is reused for repeat visits to the checkout page
+RAZORPAY_ORDER_TTL = 60 * 60
+# Secret set on the webhook in the Razorpay dashboard (payment/webhook/)
+RAZORPAY_WEBHOOK_SECRET = "XXXXXXXXXXXXXXXXXXXXXXXX"
+# Point at `python manage.py razorpay_stub` to test payments offline:
+# RAZORPAY_BASE_URL = "http://127.0.0.1:8765"
+
+# Event search backend. Left unset, MySQL uses its FULLTEXT index and other
+# databases fall back to the in-process BM25 index in events.search.
+# EVENT_SEARCH_BACKEND = "events.search.InvertedIndexBackend"
+
+# Prometheus can scrape /monitoring/metrics/ with "Authorization: Bearer <token>"
+# instead of a staff session. Leave empty to allow staff sessions only.
+MONITORING_METRICS_TOKEN = ""
+
+# Staff can profile any page with ?_profile=1 (or an "X-Profile: 1" header);
+# the last MONITORING_PROFILER_KEEP profiles are listed at /monitoring/profiles/.
+MONITORING_PROFILER_KEEP = 50
+# Seconds between stack samples while a request is being profiled.
+MONITORING_PROFILER_INTERVAL = 0.001
+
+# Statements slower than this many milliseconds are stored with their view,
+# stack and EXPLAIN plan (admin: Monitoring > Slow queries) by a background
+# thread in each worker, after the request. None disables it.
+MONITORING_SLOW_QUERY_MS = 100
+# Slow queries kept; older ones are deleted as new ones arrive.
+MONITORING_SLOW_QUERY_KEEP = 1000
+# Seconds between writes of each process's per-fingerprint query totals
+# (admin: Monitoring > Query fingerprints). None disables the totals.
+MONITORING_QUERY_STATS_INTERVAL = 60
@@ -0,0 +1,184 @@
+"""Fingerprinted, precompressed static files.
+
+``collectstatic`` with :class:`CompressedManifestStaticFilesStorage` copies
+each asset to ``STATIC_ROOT`` under a content-hashed name as well
+(``css/style.3f2a9c81d4e7.css``), records the mapping in ``staticfiles.json``
+for ``{% static %}``, and writes ``.gz`` and, when the ``brotli`` package is
+installed, ``.br`` siblings of every text asset.
+
+:class:`StaticAssetsMiddleware` serves ``STATIC_URL`` from ``STATIC_ROOT``
+when ``DEBUG`` is off, choosing the smallest variant the client accepts.
+Hashed names never change content, so they are cached for a year as
+``immutable``; anything else gets a short ``max-age``. In front of nginx or a
+CDN, ``gzip_static``/``brotli_static`` over the same directory does the same
+job and the middleware never sees static requests.
+"""
+
+import gzip
+import mimetypes
+import os
+import stat as stat_module
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip siblings are written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".xml", ".html", ".ico")
+MIN_COMPRESS_SIZE = 512
+# Preferred first when the client accepts both equally.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SHORT_CACHE_CONTROL = "public, max-age=300"
+
+
+def _compress(data):
+    """Yield ``(suffix, bytes)`` for each encoding that makes ``data`` smaller."""
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            yield suffix, compressed
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        hashed = set(self.hashed_files.values())
+        for name in sorted(set(paths) | hashed):
+            if not name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            # A hashed name's content is fixed, so siblings from an earlier
+            # run are still correct.
+            if name in hashed and self.exists(f"{name}.gz"):
+                continue
+            self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for suffix in (".gz", ".br"):
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressed in _compress(data):
+            self._save(name + suffix, ContentFile(compressed))
+
+
+# ─── Serving ─────────────────────────────────────────────────────────────────
+
+
+def _accepted(header):
+    """Map each coding in an ``Accept-Encoding`` header to its q-value."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _variants(root, name):
+    """``{encoding: (path, stat)}`` for ``name`` under ``root``; empty when it
+    is not a file there. The identity encoding is keyed by ``""``.
+
+    Not cached: a few ``stat`` calls cost less than serving stale ETags for
+    unhashed names that change in place."""
+    try:
+        path = safe_join(root, name)
+    except Exception:  # SuspiciousFileOperation for paths escaping root
+        return {}
+    found = {}
+    for encoding, suffix in (("", ""),) + ENCODINGS:
+        try:
+            stat = os.stat(path + suffix)
+        except OSError:
+            continue
+        if stat_module.S_ISREG(stat.st_mode):
+            found[encoding] = (path + suffix, stat)
+    return found if "" in found else {}
+
+
+class StaticAssetsMiddleware:
+    """Serve collected static files with precompressed variants and
+    far-future caching for fingerprinted names. Place it right after
+    ``SecurityMiddleware``; it is skipped under ``DEBUG``, where ``runserver``
+    serves the source files."""
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT)
+        self.hashed = frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD") or not request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+        name = request.path_info[len(self.prefix):]
+        variants = _variants(self.root, name)
+        if not variants:
+            return self.get_response(request)
+        return self.serve(request, name, variants)
+
+    def serve(self, request, name, variants):
+        accepted = _accepted(request.headers.get("Accept-Encoding", ""))
+        encoding = ""
+        best = 0.0
+        for candidate, _ in ENCODINGS:
+            quality = accepted.get(candidate, accepted.get("*", 0.0))
+            if candidate in variants and quality > best:
+                encoding, best = candidate, quality
+        path, stat = variants[encoding]
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if name in self.hashed else SHORT_CACHE_CONTROL,
+        }
+        if len(variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in parse_etags(if_none_match)):
+            response = HttpResponseNotModified()
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml"):
+            content_type += "; charset=utf-8"
+        if request.method == "HEAD":
+            response = HttpResponse(content_type=content_type)
+            response["Content-Length"] = stat.st_size
+        else:
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+            del response["Content-Disposition"]
+        if encoding:
+            response["Content-Encoding"] = encoding
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
 
 application = get_wsgi_application()
+
+# Query statistics and slow queries are written by a thread in each serving
+# process; see monitoring.queries.
+from monitoring.queries import writer  # noqa: E402
+
+writer.start()
@@ -10,3 +10,26 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     });
 });
+
+// "Load more" links fetch the next page as a fragment and replace themselves with it
+document.addEventListener('click', function(event) {
+    const link = event.target.closest('[data-load-more]');
+    if (!link) {
+        return;
+    }
+    event.preventDefault();
+    link.classList.add('disabled');
+    fetch(link.dataset.loadMore, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.text();
+        })
+        .then(function(html) {
+            link.parentElement.outerHTML = html;
+        })
+        .catch(function() {
+            window.location = link.href;
+        });
+});